@@ -1,8 +1,35 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, Response
+import calculator
 from calculator import get_risk_for_city, get_all_cities, get_last_updated, get_timeline_data
-import pandas as pd
+import metrics
+from metrics import stage
+from scoring import load_profiles
+from profiling import ProfilerMiddleware
+import warmup
+import time
 
 app = Flask(__name__)
+app.wsgi_app = ProfilerMiddleware(app.wsgi_app)
+
+@app.before_request
+def start_request_timing():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+
+@app.after_request
+def add_server_timing(response):
+    """Record request metrics and expose per-stage timings in a Server-Timing header"""
+    total = time.perf_counter() - g.pop('request_started', time.perf_counter())
+    timings = metrics.end_request()
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe_request(endpoint, response.status_code, total)
+    response.headers['Server-Timing'] = metrics.server_timing_header(timings, total)
+    return response
+
+def timed_jsonify(payload):
+    """jsonify() with serialization time recorded as its own stage"""
+    with stage('serialize'):
+        return jsonify(payload)
 
 @app.route('/')
 def index():
@@ -18,7 +45,7 @@ def check_risk():
     
     risk_data = get_risk_for_city(city_input)
     
-    if 'error' in risk_data:
+    if 'error' in risk_data and not risk_data.get('ambiguous'):
         return render_template('index.html',
             error=risk_data['error'],
             suggestions=risk_data.get('suggestions', []))
@@ -29,26 +56,37 @@ def check_risk():
 def api_check_post():
     """API endpoint for programmatic access (POST with JSON)"""
     data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object required'}), 400
     city = data.get('city', '').strip()
     
     if not city:
         return jsonify({'error': 'City name required'}), 400
     
     risk_data = get_risk_for_city(city)
-    return jsonify(risk_data)
+    return timed_jsonify(risk_data)
 
 @app.route('/api/check/<city>')
 def api_check_get(city):
     """API endpoint for programmatic access (GET with URL param)"""
     risk_data = get_risk_for_city(city)
-    return jsonify(risk_data)
+    return timed_jsonify(risk_data)
+
+@app.route('/api/check/state/<state>')
+def api_check_state(state):
+    """Risk rolled up over every city in a state (two-letter code)"""
+    return timed_jsonify(calculator.get_risk_for_state(state))
+
+@app.route('/api/summary')
+def api_summary():
+    """National risk rollup with every state's score"""
+    return timed_jsonify(calculator.get_summary())
 
 @app.route('/cities')
 def list_cities():
     """List all available cities"""
     try:
-        df = pd.read_csv('protest_data_oversight.csv')
-        cities = sorted(df['location'].str.strip().unique())
+        cities = get_all_cities()
         return render_template('cities.html', cities=cities)
     except:
         return "Error loading cities", 500
@@ -57,7 +95,7 @@ def list_cities():
 def api_cities():
     """Autocomplete endpoint - returns all cities as JSON"""
     cities = get_all_cities()
-    return jsonify(cities)
+    return timed_jsonify(cities)
 
 @app.route('/api/last_updated')
 def api_last_updated():
@@ -69,7 +107,101 @@ def api_timeline():
     """Get timeline data (all incidents or filtered by city)"""
     city = request.args.get('city', None)
     timeline = get_timeline_data(city)
-    return jsonify(timeline)
+    return timed_jsonify(timeline)
+
+@app.route('/api/ranking')
+def api_ranking():
+    """Locations ranked by time-decayed, severity-weighted risk"""
+    try:
+        top = int(request.args.get('top', 20))
+        as_of = request.args.get('as_of') or None
+        ranking = calculator.get_ranking(top, as_of, request.args.get('city'))
+    except ValueError:
+        return jsonify({'error': 'top must be a positive integer and as_of a YYYY-MM-DD date'}), 400
+    return timed_jsonify(ranking)
+
+@app.route('/api/incidents')
+def api_incidents():
+    """Incidents newest first, a page at a time (cursor from the previous page's next_cursor)"""
+    args = request.args
+    try:
+        page = calculator.get_incidents(args.get('city') or None, args.get('category') or None,
+                                        args.get('cursor') or None, args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return timed_jsonify(page)
+
+@app.route('/api/search')
+def api_search():
+    """Full-text search over incident titles, best match first"""
+    args = request.args
+    try:
+        found = calculator.get_search(args.get('q', ''), args.get('city') or None, args.get('category') or None,
+                                      args.get('since') or None, args.get('until') or None, args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return timed_jsonify(found)
+
+@app.route('/api/facets')
+def api_facets():
+    """Incident counts per state, category label and month under the selected filters"""
+    args = request.args
+    try:
+        counts = calculator.get_facets(args.getlist('state'), args.getlist('category'),
+                                       args.get('since') or None, args.get('until') or None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return timed_jsonify(counts)
+
+@app.route('/api/risk/profiles')
+def api_risk_profiles():
+    """Configured scoring profiles"""
+    return jsonify(load_profiles())
+
+@app.route('/api/risk/whatif', methods=['POST'])
+def api_risk_whatif():
+    """
+    Rescore every location with alternative weights. JSON body: optional
+    "profile" (base profile name), "top", and any profile settings to override
+    (per_incident, volume_cap, max_score, weights, thresholds).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'JSON object required'}), 400
+    overrides = {k: v for k, v in data.items() if k not in ('profile', 'top')}
+    try:
+        top = int(data['top']) if data.get('top') is not None else None
+        result = calculator.get_whatif(overrides, top, data.get('profile'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 400
+    return timed_jsonify(result)
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and answering"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 once the dataset is loaded and warmed (see warmup.py), else 503"""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def create_app():
+    """
+    Preload and warm the dataset and return the app. gunicorn.conf.py loads this
+    in the master before forking, so every worker shares the same read-only copy
+    and its indexes, and is ready as soon as it starts.
+    """
+    warmup.warm_up()
+    return app
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
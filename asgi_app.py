@@ -0,0 +1,402 @@
+"""
+ASGI variant of the web app - same routes and JSON contracts as app.py
+
+Requests are served from an in-memory Dataset held on the event loop; matching
+and scoring run in a thread pool so the loop never blocks, and the data file is
+re-read in the background when it changes, swapping in the new Dataset only
+once it is fully loaded and warmed (warmup.py). /readyz answers 200 from then on.
+
+    uvicorn asgi_app:app --workers 4
+    gunicorn asgi_app:app -k uvicorn.workers.UvicornWorker --workers 4
+
+Environment:
+    DATA_PATH         CSV to serve (default protest_data_unified.csv if built,
+                      else protest_data_oversight.csv)
+    RELOAD_INTERVAL   seconds between data file change checks (default 5, 0 = never)
+    WORKER_THREADS    size of the computation thread pool (default 4)
+    REFRESH_INTERVAL  seconds between scrape/clean runs (default 0 = never); the
+                      reload above then indexes and swaps in the new file
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+from starlette.applications import Starlette
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+import metrics
+from metrics import stage
+from snapshots import data_path, data_version
+from calculator import (
+    load_dataset,
+    risk_from_dataset,
+    cities_from_dataset,
+    facets_from_dataset,
+    timeline_from_dataset,
+    incidents_from_dataset,
+    ranking_from_dataset,
+    search_from_dataset,
+    state_from_dataset,
+    summary_from_dataset,
+    whatif_from_dataset,
+    get_last_updated
+)
+from scoring import load_profiles
+import warmup
+
+DATA_PATH = os.environ.get('DATA_PATH') or data_path()
+RELOAD_INTERVAL = float(os.environ.get('RELOAD_INTERVAL', '5'))
+WORKER_THREADS = int(os.environ.get('WORKER_THREADS', '4'))
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', '0'))
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
+
+
+class DatasetHolder:
+    """
+    Holds the current Dataset. refresh() builds and warms the replacement
+    completely before a single reference assignment, so concurrent requests see
+    either the old or the new dataset, never a partial or cold one.
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.current = None
+        self.signature = None
+        self.loaded_at = None
+
+    def refresh(self):
+        """Reload if the file changed; returns True when a new dataset was swapped in"""
+        try:
+            _, signature = data_version(self.csv_path)
+        except FileNotFoundError:
+            return False
+        if signature == self.signature:
+            return False
+        current = load_dataset(self.csv_path)
+        warmup.warm(current, os.path.abspath(self.csv_path))
+        self.current, self.signature, self.loaded_at = current, signature, time.time()
+        return True
+
+
+dataset = DatasetHolder(DATA_PATH)
+executor = ThreadPoolExecutor(max_workers=WORKER_THREADS, thread_name_prefix='compute')
+reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reload')
+
+
+async def run_in_pool(fn, *args, pool=None):
+    """Run fn in a thread pool, keeping contextvars so stage timings reach the request"""
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool or executor, functools.partial(ctx.run, fn, *args))
+
+
+async def watch_dataset():
+    """Poll the data file and reload it off the event loop when it changes"""
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        try:
+            await run_in_pool(dataset.refresh, pool=reload_executor)
+        except Exception as e:
+            print(f"⚠️  Dataset reload failed: {e}")
+
+
+def timed_json(payload, status_code=200):
+    with stage('serialize'):
+        return JSONResponse(payload, status_code=status_code)
+
+
+def compute_risk(city_input, current):
+    """get_risk_for_city() against the in-memory dataset"""
+    if current is None:
+        return {'error': 'Data file not found. Please run scraper first.'}
+    risk_data = risk_from_dataset(city_input, current)
+    if 'error' not in risk_data:
+        risk_data['last_updated'] = get_last_updated(dataset.csv_path)
+    return risk_data
+
+
+async def index(request):
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def check_risk(request):
+    form = parse_qs((await request.body()).decode())
+    city_input = form.get('city', [''])[0].strip()
+
+    if not city_input:
+        return templates.TemplateResponse(request, 'index.html', {'error': 'Please enter a city name'})
+
+    risk_data = await run_in_pool(compute_risk, city_input, dataset.current)
+
+    if 'error' in risk_data and not risk_data.get('ambiguous'):
+        return templates.TemplateResponse(request, 'index.html', {
+            'error': risk_data['error'],
+            'suggestions': risk_data.get('suggestions', [])
+        })
+
+    return templates.TemplateResponse(request, 'results.html', {'data': risk_data})
+
+
+async def api_check_post(request):
+    """API endpoint for programmatic access (POST with JSON)"""
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JSONResponse({'error': 'Invalid JSON'}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'JSON object required'}, status_code=400)
+    city = data.get('city', '').strip()
+
+    if not city:
+        return JSONResponse({'error': 'City name required'}, status_code=400)
+
+    risk_data = await run_in_pool(compute_risk, city, dataset.current)
+    return timed_json(risk_data)
+
+
+async def api_check_get(request):
+    """API endpoint for programmatic access (GET with URL param)"""
+    risk_data = await run_in_pool(compute_risk, request.path_params['city'], dataset.current)
+    return timed_json(risk_data)
+
+
+def compute_state(state, current):
+    """get_risk_for_state() against the in-memory dataset"""
+    if current is None:
+        return {'error': 'Data file not found. Please run scraper first.'}
+    risk_data = state_from_dataset(state, current, os.path.abspath(dataset.csv_path))
+    if 'error' not in risk_data:
+        risk_data['last_updated'] = get_last_updated(dataset.csv_path)
+    return risk_data
+
+
+async def api_check_state(request):
+    """Risk rolled up over every city in a state (see app.api_check_state)"""
+    risk_data = await run_in_pool(compute_state, request.path_params['state'], dataset.current)
+    return timed_json(risk_data)
+
+
+async def api_summary(request):
+    """National risk rollup with every state's score (see app.api_summary)"""
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+    summary = await run_in_pool(summary_from_dataset, current, os.path.abspath(dataset.csv_path))
+    summary['last_updated'] = get_last_updated(dataset.csv_path)
+    return timed_json(summary)
+
+
+async def list_cities(request):
+    """List all available cities"""
+    try:
+        cities = await run_in_pool(cities_from_dataset, dataset.current)
+        return templates.TemplateResponse(request, 'cities.html', {'cities': cities})
+    except Exception:
+        return PlainTextResponse("Error loading cities", status_code=500)
+
+
+async def api_cities(request):
+    """Autocomplete endpoint - returns all cities as JSON"""
+    current = dataset.current
+    cities = await run_in_pool(cities_from_dataset, current) if current is not None else []
+    return timed_json(cities)
+
+
+async def api_last_updated(request):
+    """Get last data update time"""
+    return timed_json(get_last_updated(dataset.csv_path))
+
+
+async def api_timeline(request):
+    """Get timeline data (all incidents or filtered by city)"""
+    current = dataset.current
+    city = request.query_params.get('city')
+    timeline = await run_in_pool(timeline_from_dataset, city, current) if current is not None else []
+    return timed_json(timeline)
+
+
+async def api_ranking(request):
+    """Locations ranked by time-decayed, severity-weighted risk"""
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+    params = request.query_params
+    try:
+        ranking = await run_in_pool(ranking_from_dataset, current, os.path.abspath(dataset.csv_path),
+                                    int(params.get('top', 20)), params.get('as_of') or None,
+                                    params.get('city'))
+    except ValueError:
+        return JSONResponse({'error': 'top must be a positive integer and as_of a YYYY-MM-DD date'}, status_code=400)
+    return timed_json(ranking)
+
+
+async def api_incidents(request):
+    """Incidents newest first, a page at a time (see app.api_incidents)"""
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+    params = request.query_params
+    try:
+        page = await run_in_pool(incidents_from_dataset, current, params.get('city') or None,
+                                 params.get('category') or None, params.get('cursor') or None,
+                                 params.get('limit'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return timed_json(page)
+
+
+async def api_search(request):
+    """Full-text search over incident titles (see app.api_search)"""
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+    params = request.query_params
+    try:
+        found = await run_in_pool(search_from_dataset, current, params.get('q', ''), params.get('city') or None,
+                                  params.get('category') or None, params.get('since') or None,
+                                  params.get('until') or None, params.get('limit'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return timed_json(found)
+
+
+async def api_facets(request):
+    """Incident counts per state, category label and month (see app.api_facets)"""
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+    params = request.query_params
+    try:
+        counts = await run_in_pool(facets_from_dataset, current, params.getlist('state'),
+                                   params.getlist('category'), params.get('since') or None,
+                                   params.get('until') or None)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    return timed_json(counts)
+
+
+async def api_risk_profiles(request):
+    """Configured scoring profiles"""
+    return timed_json(load_profiles())
+
+
+async def api_risk_whatif(request):
+    """Rescore every location with alternative weights (see app.api_risk_whatif)"""
+    try:
+        data = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JSONResponse({'error': 'Invalid JSON'}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'JSON object required'}, status_code=400)
+    current = dataset.current
+    if current is None:
+        return timed_json({'error': 'Data file not found. Please run scraper first.'})
+
+    overrides = {k: v for k, v in data.items() if k not in ('profile', 'top')}
+    try:
+        top = int(data['top']) if data.get('top') is not None else None
+        result = await run_in_pool(whatif_from_dataset, current, overrides, top, data.get('profile'))
+    except (ValueError, TypeError) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    except KeyError as e:
+        return JSONResponse({'error': e.args[0]}, status_code=400)
+    return timed_json(result)
+
+
+async def healthz(request):
+    """Liveness: the process is up and answering"""
+    return JSONResponse({'status': 'ok'})
+
+
+async def readyz(request):
+    """Readiness: 200 once the served dataset is warmed (see warmup.py), else 503"""
+    status = warmup.status()
+    ready = status['ready'] and dataset.current is not None
+    return JSONResponse(dict(status, ready=ready), status_code=200 if ready else 503)
+
+
+async def prometheus_metrics(request):
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+routes = [
+    Route('/', index),
+    Route('/check', check_risk, methods=['POST']),
+    Route('/api/check', api_check_post, methods=['POST']),
+    Route('/api/check/state/{state}', api_check_state),
+    Route('/api/check/{city}', api_check_get),
+    Route('/api/summary', api_summary),
+    Route('/cities', list_cities),
+    Route('/api/cities', api_cities),
+    Route('/api/last_updated', api_last_updated),
+    Route('/api/timeline', api_timeline),
+    Route('/api/ranking', api_ranking),
+    Route('/api/incidents', api_incidents),
+    Route('/api/search', api_search),
+    Route('/api/facets', api_facets),
+    Route('/api/risk/profiles', api_risk_profiles),
+    Route('/api/risk/whatif', api_risk_whatif, methods=['POST']),
+    Route('/healthz', healthz),
+    Route('/readyz', readyz),
+    Route('/metrics', prometheus_metrics),
+]
+_route_paths = {route.endpoint: route.path for route in routes}
+
+
+class TimingMiddleware:
+    """Per-request stage collection, Server-Timing header and request metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        metrics.begin_request()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                total = time.perf_counter() - started
+                timings = metrics.end_request()
+                endpoint = _route_paths.get(scope.get('endpoint'), 'unmatched')
+                metrics.observe_request(endpoint, message['status'], total)
+                MutableHeaders(scope=message).append(
+                    'Server-Timing', metrics.server_timing_header(timings, total)
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_pool(dataset.refresh, pool=reload_executor)
+    watcher = asyncio.create_task(watch_dataset()) if RELOAD_INTERVAL > 0 else None
+    scheduler = None
+    if REFRESH_INTERVAL > 0:
+        from refresh import RefreshScheduler, FILE_STEPS
+        scheduler = RefreshScheduler(REFRESH_INTERVAL, FILE_STEPS, dataset.csv_path).start()
+    try:
+        yield
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        if scheduler is not None:
+            scheduler.stop(timeout=0)
+
+
+app = Starlette(routes=routes, lifespan=lifespan)
+app.add_middleware(TimingMiddleware)
@@ -0,0 +1,107 @@
+"""
+Batch mode shared by the command-line checkers
+
+Reads city names (one per line) from a file or stdin, scores each with the
+data loaded once per process, and streams results as JSONL or CSV as they are
+produced. With workers > 1 the cities are spread over a process pool; results
+still come out in input order.
+"""
+import csv
+import json
+import sys
+
+# Output formats: human is the checkers' existing text output
+FORMATS = ('human', 'jsonl', 'csv')
+
+
+def read_cities(source):
+    """City names from a path ('-' = stdin), skipping blank lines and # comments"""
+    stream = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        for line in stream:
+            city = line.strip()
+            if city and not city.startswith('#'):
+                yield city
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+_worker_state = {}
+
+
+def _init_worker(load, score):
+    # A failing initializer makes the pool respawn workers forever, so keep the
+    # error and raise it from each task instead, where the parent sees it
+    _worker_state['score'] = score
+    try:
+        _worker_state['data'] = load()
+    except Exception as e:
+        _worker_state['error'] = e
+
+
+def _score_in_worker(city):
+    if 'error' in _worker_state:
+        raise _worker_state['error']
+    return _worker_state['score'](city, _worker_state['data'])
+
+
+def score_cities(cities, load, score, workers=1, chunksize=8):
+    """
+    Yield score(city, data) for each city, in order. load() runs once per
+    process; load and score must be module-level functions when workers > 1.
+    """
+    if workers <= 1:
+        data = load()
+        for city in cities:
+            yield score(city, data)
+        return
+
+    import multiprocessing
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(load, score)) as pool:
+        yield from pool.imap(_score_in_worker, cities, chunksize)
+
+
+def _csv_value(value):
+    if isinstance(value, (list, tuple)):
+        return '; '.join(str(v) for v in value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def write_results(results, fmt, fields, out=None, human=None):
+    """
+    Stream results to out (stdout by default), flushing after each one.
+      jsonl  one JSON object per line
+      csv    header plus one row per result, restricted to `fields`
+      human  human(result) for each result
+    Returns the number of results written.
+    """
+    out = out or sys.stdout
+    count = 0
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+
+    for result in results:
+        if fmt == 'jsonl':
+            out.write(json.dumps(result, default=str) + '\n')
+        elif fmt == 'csv':
+            writer.writerow({field: _csv_value(result.get(field)) for field in fields})
+        else:
+            human(result)
+        out.flush()
+        count += 1
+    return count
+
+
+def add_batch_arguments(parser):
+    """--batch / --format / --workers options for a checker's argument parser"""
+    parser.add_argument('--batch', metavar='FILE',
+                        help="Read city names, one per line, from FILE ('-' for stdin)")
+    parser.add_argument('--format', choices=FORMATS, default='human',
+                        help='Output format (default: human-readable text)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Score batch cities across this many processes (default 1)')
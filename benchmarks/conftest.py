@@ -0,0 +1,91 @@
+"""
+Benchmark configuration and synthetic dataset fixtures
+
+Run with:
+    pytest benchmarks/ --scales 1k,100k --benchmark-autosave
+    pytest benchmarks/ --scales 1k,100k --benchmark-compare
+"""
+
+import os
+import tracemalloc
+
+import pytest
+
+from generate_synthetic_data import generate_incidents
+
+
+SCALES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--scales',
+        default='1k,100k,1m',
+        help='Comma-separated dataset scales to benchmark (1k, 100k, 1m)'
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [s.strip() for s in metafunc.config.getoption('scales').split(',') if s.strip()]
+        metafunc.parametrize('scale', scales, scope='session')
+
+
+@pytest.fixture(scope='session')
+def incidents_df(scale):
+    """Synthetic incidents DataFrame for the requested scale"""
+    if scale not in SCALES:
+        pytest.skip(f'Unknown scale {scale!r}')
+    return generate_incidents(SCALES[scale], cities=200, misaligned_rate=0)
+
+
+@pytest.fixture(scope='session')
+def incidents_csv(incidents_df, scale, tmp_path_factory):
+    """Synthetic dataset written as protest_data_oversight.csv in its own directory"""
+    data_dir = tmp_path_factory.mktemp(f'bench_{scale}')
+    csv_path = data_dir / 'protest_data_oversight.csv'
+    incidents_df.to_csv(csv_path, index=False)
+    return str(csv_path)
+
+
+@pytest.fixture
+def app_client(incidents_csv, monkeypatch):
+    """Flask test client reading the synthetic dataset via its default relative path"""
+    from app import app
+
+    monkeypatch.chdir(os.path.dirname(incidents_csv))
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def measure(benchmark, incidents_df):
+    """
+    Benchmark a callable, then record throughput and peak memory in extra_info.
+    Peak memory is measured on a separate untimed call so tracemalloc overhead
+    does not distort the latency numbers.
+    """
+    def run(fn, *args, **kwargs):
+        result = benchmark(fn, *args, **kwargs)
+
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        n = len(incidents_df)
+        mean = benchmark.stats.stats.mean if benchmark.stats else None
+        benchmark.extra_info['incidents'] = n
+        benchmark.extra_info['peak_memory_mb'] = round(peak / 1024 / 1024, 2)
+        if mean:
+            benchmark.extra_info['incidents_per_sec'] = round(n / mean)
+        return result
+
+    return run
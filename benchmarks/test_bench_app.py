@@ -0,0 +1,35 @@
+"""
+Benchmarks for the Flask API endpoints (via the test client)
+"""
+
+import json
+
+
+class TestBenchAPI:
+    """End-to-end request benchmarks including routing and JSON serialization"""
+
+    def test_api_check_post(self, measure, app_client):
+        def request():
+            response = app_client.post('/api/check',
+                                       data=json.dumps({'city': 'Chicago'}),
+                                       content_type='application/json')
+            assert response.status_code == 200
+        measure(request)
+
+    def test_api_check_get(self, measure, app_client):
+        def request():
+            response = app_client.get('/api/check/Portland')
+            assert response.status_code == 200
+        measure(request)
+
+    def test_api_cities(self, measure, app_client):
+        def request():
+            response = app_client.get('/api/cities')
+            assert response.status_code == 200
+        measure(request)
+
+    def test_api_timeline(self, measure, app_client):
+        def request():
+            response = app_client.get('/api/timeline?city=Minneapolis')
+            assert response.status_code == 200
+        measure(request)
@@ -0,0 +1,70 @@
+"""
+Benchmarks for the calculator hot path
+"""
+
+from calculator import (
+    find_matching_cities,
+    calculate_risk_score,
+    get_timeline_data,
+    get_risk_for_city
+)
+from locations import LocationIndex
+
+
+class TestBenchFindMatchingCities:
+    """Benchmarks for find_matching_cities()"""
+
+    def test_exact_match(self, measure, incidents_df):
+        measure(find_matching_cities, 'Portland, OR', incidents_df)
+
+    def test_partial_match(self, measure, incidents_df):
+        measure(find_matching_cities, 'Portland', incidents_df)
+
+    def test_prefix_fallback(self, measure, incidents_df):
+        measure(find_matching_cities, 'phoeni', incidents_df)
+
+
+class TestBenchResolveLocation:
+    """Benchmarks for the location planner (locations.py) over a prebuilt index"""
+
+    def test_city_state(self, measure, incidents_df):
+        index = LocationIndex(incidents_df['location'].drop_duplicates().astype(str).str.strip())
+        measure(index.resolve, 'Portland, Oregon')
+
+    def test_ambiguous_city(self, measure, incidents_df):
+        index = LocationIndex(incidents_df['location'].drop_duplicates().astype(str).str.strip())
+        measure(index.resolve, 'Portland')
+
+
+class TestBenchCalculateRiskScore:
+    """Benchmarks for calculate_risk_score()"""
+
+    def test_large_city(self, measure, incidents_df):
+        city_data = find_matching_cities('Chicago, IL', incidents_df)
+        measure(calculate_risk_score, city_data)
+
+    def test_all_incidents(self, measure, incidents_df):
+        measure(calculate_risk_score, incidents_df)
+
+
+class TestBenchGetTimelineData:
+    """Benchmarks for get_timeline_data()"""
+
+    def test_all_incidents(self, measure, incidents_csv):
+        measure(get_timeline_data, csv_path=incidents_csv)
+
+    def test_filtered_by_city(self, measure, incidents_csv):
+        measure(get_timeline_data, 'Minneapolis', csv_path=incidents_csv)
+
+
+class TestBenchGetRiskForCity:
+    """Benchmarks for get_risk_for_city() - the full per-request path"""
+
+    def test_large_city(self, measure, incidents_csv):
+        measure(get_risk_for_city, 'Chicago', csv_path=incidents_csv)
+
+    def test_small_city(self, measure, incidents_csv):
+        measure(get_risk_for_city, 'Baltimore', csv_path=incidents_csv)
+
+    def test_city_not_found(self, measure, incidents_csv):
+        measure(get_risk_for_city, 'Nowhere', csv_path=incidents_csv)
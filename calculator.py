@@ -1,18 +1,102 @@
+import numpy as np
 import pandas as pd
-import re
+import threading
 from datetime import datetime
 import os
 
-def normalize_city_input(city_input):
+from metrics import stage, DATASET_ROWS, DATASET_CACHE_HITS, DATASET_CACHE_MISSES, DATASET_RELOADS
+from dataset import Dataset, most_recent, normalize_locations, recency_keys
+from snapshots import current_snapshot, data_path, data_version
+from scoring import (normalize_city_input, score_counts, get_profile, resolve_profile,
+                     profile_labels, FACTOR_LABELS)
+import decay
+import facets
+import listing
+import locations
+import risk_matrix
+import rollups
+import search
+
+# Loaded datasets keyed by absolute path; each Dataset carries its version
+_dataset_cache = {}
+_dataset_lock = threading.Lock()
+# Datasets pinned by preload_dataset(): served without checking the file again
+_pinned_datasets = {}
+
+def load_dataset(csv_path=None):
     """
-    Normalize user input: strip, lowercase, remove extra spaces/punctuation
-    'Portland, OR' -> 'portland or'
-    'Phoenix  ' -> 'phoenix'
+    Load incidents CSV as an indexed Dataset, reusing it until the file changes.
+    Raises FileNotFoundError if the file does not exist.
     """
-    city_input = city_input.strip().lower()
-    # Remove commas, extra spaces
-    city_input = re.sub(r'[,\s]+', ' ', city_input).strip()
-    return city_input
+    csv_path = csv_path or data_path()
+    key = os.path.abspath(csv_path)
+    pinned = _pinned_datasets.get(key)
+    if pinned is not None:
+        DATASET_CACHE_HITS.inc()
+        return pinned
+    
+    source, signature = data_version(key)
+    cached = _dataset_cache.get(key)
+    if cached is not None and cached.signature == signature:
+        DATASET_CACHE_HITS.inc()
+        return cached
+    
+    with _dataset_lock:
+        cached = _dataset_cache.get(key)
+        if cached is not None and cached.signature == signature:
+            DATASET_CACHE_HITS.inc()
+            return cached
+        
+        DATASET_CACHE_MISSES.inc()
+        with stage('load'):
+            dataset = Dataset.from_csv(source, signature=signature)
+        if cached is not None:
+            DATASET_RELOADS.inc()
+        _dataset_cache[key] = dataset
+        DATASET_ROWS.set(len(dataset))
+        return dataset
+
+def preload_dataset(csv_path=None):
+    """
+    Load a dataset and pin it: later load_dataset() calls return it without
+    re-checking the file, until preload_dataset() is called again. Used by the
+    gunicorn master so forked workers share one copy and reloads are coordinated.
+    """
+    csv_path = csv_path or data_path()
+    key = os.path.abspath(csv_path)
+    source, signature = data_version(key)
+    with stage('load'):
+        dataset = Dataset.from_csv(source, signature=signature)
+    if key in _pinned_datasets:
+        DATASET_RELOADS.inc()
+    risk_matrix.for_dataset(dataset)
+    _pinned_datasets[key] = dataset
+    DATASET_ROWS.set(len(dataset))
+    return dataset
+
+def _dataset_or_error(csv_path=None):
+    """
+    (csv_path, Dataset, None) for a data file (default: data_path()), or
+    (csv_path, None, error response) when it does not exist
+    """
+    csv_path = csv_path or data_path()
+    try:
+        return csv_path, load_dataset(csv_path), None
+    except FileNotFoundError:
+        return csv_path, None, {'error': 'Data file not found. Please run scraper first.'}
+
+def _no_match(city_input, dataset):
+    """Error response for city input matching no location, suggesting some (in file order like before)"""
+    unique_cities = list(dict.fromkeys(dataset.location_names))[:20]
+    return {
+        'error': f'No data found for "{city_input}"',
+        'suggestions': sorted(unique_cities)
+    }
+
+def _matched_cities(dataset, codes):
+    """Names of the matched locations, in order of first incident"""
+    codes = sorted(codes, key=dataset.first_row)
+    return list(dict.fromkeys(dataset.location_names[codes]))
 
 def find_matching_cities(user_input, df):
     """
@@ -21,10 +105,10 @@ def find_matching_cities(user_input, df):
     """
     normalized_input = normalize_city_input(user_input)
     
-    # Normalize CSV city names for comparison (column is 'location' not 'City')
-    df['location_normalized'] = df['location'].str.strip().str.lower().apply(
-        lambda x: re.sub(r'[,\s]+', ' ', x).strip()
-    )
+    # Normalize CSV city names for comparison (column is 'location' not 'City').
+    # Dataset.location_frame already carries the normalized column.
+    if 'location_normalized' not in df.columns:
+        df['location_normalized'] = normalize_locations(df['location'])
     
     # Try exact match first
     exact_match = df[df['location_normalized'] == normalized_input]
@@ -61,53 +145,33 @@ def calculate_risk_score(city_data):
     
     total_incidents = len(city_data)
     
-    # Count specific risk factors (column is 'category' not 'Tags')
-    use_of_force = len(city_data[city_data['category'].str.contains('Use of Force', na=False)])
-    us_citizens = len(city_data[city_data['category'].str.contains('U.S. Citizen', na=False)])
-    sensitive_locations = len(city_data[city_data['category'].str.contains('Sensitive Location', na=False)])
-    
-    # Scoring weights
-    base_score = min(total_incidents * 2, 40)  # Cap at 40 for volume
-    force_score = use_of_force * 1.5
-    citizen_score = us_citizens * 1.2
-    sensitive_score = sensitive_locations * 2
-    
-    total_score = base_score + force_score + citizen_score + sensitive_score
-    risk_score = min(int(total_score), 100)  # Cap at 100
-    
-    # Determine risk level
-    if risk_score >= 70:
-        risk_level = "High"
-    elif risk_score >= 40:
-        risk_level = "Medium"
-    else:
-        risk_level = "Low"
-    
-    # Convert to dict and clean NaN values for JSON serialization
-    incidents_list = city_data.head(5).to_dict('records')
+    # Count specific risk factors (column is 'category' not 'Tags'), plus any
+    # other labels the scoring profile weights
+    labels = profile_labels()
+    flags = risk_matrix.category_flags(city_data['category'], labels)
+    label_counts = dict(zip(labels, flags.sum(axis=0).tolist()))
+    
+    risk_data = score_counts(total_incidents, *(label_counts.pop(label) for label in FACTOR_LABELS),
+                             other_counts=label_counts)
+    
+    # Five most recent incidents; convert to dict and clean NaN values for JSON serialization
+    latest = most_recent(recency_keys(city_data['date']), 5) if 'date' in city_data else slice(5)
+    incidents_list = city_data.iloc[latest].to_dict('records')
     for incident in incidents_list:
         # Replace NaN/None with empty strings for clean JSON
         for key, value in incident.items():
             if pd.isna(value):
                 incident[key] = None
     
-    return {
-        'risk_level': risk_level,
-        'risk_score': risk_score,
-        'total_incidents': total_incidents,
-        'use_of_force': use_of_force,
-        'use_of_force_pct': round((use_of_force / total_incidents * 100) if total_incidents else 0, 1),
-        'us_citizens': us_citizens,
-        'us_citizens_pct': round((us_citizens / total_incidents * 100) if total_incidents else 0, 1),
-        'sensitive_locations': sensitive_locations,
-        'sensitive_locations_pct': round((sensitive_locations / total_incidents * 100) if total_incidents else 0, 1),
-        'recent_incidents': incidents_list
-    }
+    risk_data['recent_incidents'] = incidents_list
+    return risk_data
 
-def get_last_updated(csv_path='protest_data_oversight.csv'):
-    """Get last modified time of CSV file"""
+def get_last_updated(csv_path=None):
+    """Get when the current data was written (snapshot time, else file mtime)"""
+    csv_path = csv_path or data_path()
     try:
-        mtime = os.path.getmtime(csv_path)
+        snapshot = current_snapshot(csv_path)
+        mtime = snapshot['created_at'] if snapshot else os.path.getmtime(csv_path)
         dt = datetime.fromtimestamp(mtime)
         hours_ago = int((datetime.now() - dt).total_seconds() / 3600)
         
@@ -123,65 +187,303 @@ def get_last_updated(csv_path='protest_data_oversight.csv'):
     except:
         return {'hours_ago': None, 'time_str': None, 'timestamp': None}
 
-def get_all_cities(csv_path='protest_data_oversight.csv'):
+def get_all_cities(csv_path=None):
     """Get sorted list of all cities for autocomplete"""
+    csv_path = csv_path or data_path()
     try:
-        df = pd.read_csv(csv_path)
-        cities = sorted(df['location'].str.strip().unique())
-        return cities
+        return cities_from_dataset(load_dataset(csv_path))
     except:
         return []
 
-def get_timeline_data(city_input=None, csv_path='protest_data_oversight.csv'):
-    """Get incident counts by date for timeline chart"""
+def cities_from_dataset(dataset):
+    """Sorted unique locations in a Dataset"""
+    return sorted(set(dataset.location_names))
+
+def get_timeline_data(city_input=None, csv_path=None):
+    """Get incident counts by date for timeline chart (an error response for ambiguous city input)"""
+    csv_path = csv_path or data_path()
     try:
-        df = pd.read_csv(csv_path)
-        
-        # Filter by city if provided
-        if city_input:
-            city_data = find_matching_cities(city_input, df)
-            if city_data.empty:
-                return []
-            df = city_data
-        
-        # Parse dates and group by date
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df = df.dropna(subset=['date'])
-        
-        # Group by date and count incidents
-        timeline = df.groupby(df['date'].dt.date).size().reset_index(name='count')
-        timeline['date'] = timeline['date'].astype(str)
-        
-        return timeline.to_dict('records')
+        return timeline_from_dataset(city_input, load_dataset(csv_path))
     except:
         return []
 
-def get_risk_for_city(city_input, csv_path='protest_data_oversight.csv'):
+def match_locations(city_input, dataset):
+    """
+    (location codes in a Dataset matching user input, None), or (None, error
+    response) when they are different places: locations.ambiguous_error()
+    with the candidates, never a merge of them (see locations.py)
+    """
+    index = locations.for_dataset(dataset)
+    match = index.resolve(city_input)
+    codes = np.asarray(match.codes, dtype=np.int64)
+    if match.ambiguous:
+        return None, locations.ambiguous_error(city_input, index.candidates(codes, risk_matrix.for_dataset(dataset).totals))
+    return codes, None
+
+def timeline_from_rows(dataset, rows=None):
+    """Incident counts by date over the given rows (all rows if None)"""
+    codes, counts = dataset.value_counts('date', rows)
+    per_day = {}
+    for code, count in zip(codes, counts):
+        day = dataset.date_days[code]
+        if day is not None:
+            per_day[day] = per_day.get(day, 0) + int(count)
+    return [{'date': day, 'count': count} for day, count in sorted(per_day.items())]
+
+def timeline_from_dataset(city_input, dataset):
+    """Timeline for incidents matching city_input (all incidents if None; see match_locations)"""
+    rows = None
+    # Filter by city if provided
+    if city_input:
+        with stage('match'):
+            codes, error = match_locations(city_input, dataset)
+        if error:
+            return error
+        if len(codes) == 0:
+            return []
+        rows = dataset.rows_for_locations(codes)
+    
+    with stage('timeline'):
+        return timeline_from_rows(dataset, rows)
+
+def get_risk_for_city(city_input, csv_path=None):
     """
     Main function: load data, find city, calculate risk
     """
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        return {'error': 'Data file not found. Please run scraper first.'}
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
     
-    city_data = find_matching_cities(city_input, df)
+    risk_data = risk_from_dataset(city_input, dataset)
+    if 'error' not in risk_data:
+        risk_data['last_updated'] = get_last_updated(csv_path)
+    return risk_data
+
+def risk_from_dataset(city_input, dataset):
+    """
+    Find city in a loaded Dataset and calculate risk
+    (everything get_risk_for_city returns except last_updated)
+    """
+    with stage('match'):
+        codes, error = match_locations(city_input, dataset)
     
-    if city_data.empty:
-        # Get list of available cities for suggestions (column is 'location')
-        unique_cities = df['location'].str.strip().unique()[:20]
-        return {
-            'error': f'No data found for "{city_input}"',
-            'suggestions': sorted(unique_cities)
-        }
+    # Different cities: list them so the caller can pick one, never a merged score
+    if error:
+        return error
+    if len(codes) == 0:
+        return _no_match(city_input, dataset)
     
-    # Show which cities were matched (for transparency)
-    matched_cities = city_data['location'].str.strip().unique()
+    # Show which cities were matched (for transparency), in order of first incident
+    matched_cities = _matched_cities(dataset, codes)
+    rows = dataset.rows_for_locations(codes)
     
-    risk_data = calculate_risk_score(city_data)
-    risk_data['matched_cities'] = list(matched_cities)
+    with stage('score'):
+        label_counts = risk_matrix.for_dataset(dataset).label_totals(codes, profile_labels())
+        risk_data = score_counts(len(rows), *(label_counts.pop(label) for label in FACTOR_LABELS),
+                                 other_counts=label_counts)
+        risk_data['recent_incidents'] = dataset.records(dataset.recent_rows(codes, 5))
+    risk_data['matched_cities'] = matched_cities
     risk_data['search_term'] = city_input
-    risk_data['timeline'] = get_timeline_data(city_input, csv_path)
-    risk_data['last_updated'] = get_last_updated(csv_path)
+    risk_data['ambiguous'] = False
+    with stage('timeline'):
+        risk_data['timeline'] = timeline_from_rows(dataset, rows)
     
     return risk_data
+
+def get_incidents(city_input=None, category=None, cursor=None, limit=None, csv_path=None):
+    """
+    One page of incidents, newest first (see listing.py), for a city (all
+    incidents if None) and optionally a category label. Pass the returned
+    next_cursor to get the following page. Raises ValueError on a bad cursor
+    or limit.
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    return incidents_from_dataset(dataset, city_input, category, cursor, limit)
+
+def incidents_from_dataset(dataset, city_input=None, category=None, cursor=None, limit=None):
+    """get_incidents() for a loaded Dataset"""
+    limit = listing.parse_limit(limit)
+    codes = None
+    if city_input:
+        with stage('match'):
+            codes, error = match_locations(city_input, dataset)
+        if error:
+            return error
+        if len(codes) == 0:
+            return _no_match(city_input, dataset)
+    
+    with stage('page'):
+        rows, next_cursor = listing.for_dataset(dataset).page(codes, category, cursor, limit)
+        page = {'incidents': dataset.records(rows), 'next_cursor': next_cursor}
+    if city_input:
+        page['matched_cities'] = _matched_cities(dataset, codes)
+        page['search_term'] = city_input
+    return page
+
+def get_search(query, city_input=None, category=None, since=None, until=None, limit=None, csv_path=None):
+    """
+    Incidents whose title matches a text query, best BM25 match first (see
+    search.py), optionally only in a city, with a category label, or dated
+    between since and until ('YYYY-MM-DD', inclusive). Raises ValueError on an
+    empty query or a bad date or limit.
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    return search_from_dataset(dataset, query, city_input, category, since, until, limit)
+
+def search_from_dataset(dataset, query, city_input=None, category=None, since=None, until=None, limit=None):
+    """get_search() for a loaded Dataset"""
+    if not query or not query.strip():
+        raise ValueError('q (search text) is required')
+    limit = listing.parse_limit(limit)
+    since = decay.parse_day(since) if since else None
+    until = decay.parse_day(until) if until else None
+    codes = None
+    if city_input:
+        with stage('match'):
+            codes, error = match_locations(city_input, dataset)
+        if error:
+            return error
+        if len(codes) == 0:
+            return _no_match(city_input, dataset)
+    
+    with stage('search'):
+        rows, scores, total = search.for_dataset(dataset).search(query, codes, category, since, until, limit)
+        results = dataset.records(rows)
+        for result, score in zip(results, scores.tolist()):
+            result['score'] = round(score, 3)
+    found = {'query': query, 'total': total, 'results': results}
+    if city_input:
+        found['matched_cities'] = _matched_cities(dataset, codes)
+    return found
+
+def get_facets(states=(), categories=(), since=None, until=None, csv_path=None):
+    """
+    Incident counts per state, category label and month under a filter (see
+    facets.py): any of `states`, any of the `categories` labels, and months
+    from since to until ('YYYY-MM', inclusive). Values may also be given
+    comma-separated. Raises ValueError on a bad month.
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    return facets_from_dataset(dataset, states, categories, since, until)
+
+def _listed(values):
+    """Values given as a list and/or comma-separated, stripped, blanks dropped"""
+    return [part.strip() for value in values or () for part in value.split(',') if part.strip()]
+
+def facets_from_dataset(dataset, states=(), categories=(), since=None, until=None):
+    """get_facets() for a loaded Dataset"""
+    since = facets.parse_month(since) if since else None
+    until = facets.parse_month(until) if until else None
+    states = [state.upper() for state in _listed(states)]
+    categories = _listed(categories)
+    
+    with stage('facets'):
+        bitmaps = facets.for_dataset(dataset)
+        selected = {'state': states or None, 'category': categories or None}
+        if since or until:
+            selected['month'] = bitmaps.months_between(since, until)
+        total, counts = bitmaps.counts(selected)
+    return {
+        'total': total,
+        'filters': {'state': states, 'category': categories, 'since': since, 'until': until},
+        'facets': counts
+    }
+
+def get_risk_for_state(state, csv_path=None):
+    """
+    Risk components, busiest cities and timeline rolled up over every location
+    in a state (two-letter code, see rollups.py)
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    
+    risk_data = state_from_dataset(state, dataset, os.path.abspath(csv_path))
+    if 'error' not in risk_data:
+        risk_data['last_updated'] = get_last_updated(csv_path)
+    return risk_data
+
+def state_from_dataset(state, dataset, key=None):
+    """get_risk_for_state() without last_updated, for a loaded Dataset of the data file `key`"""
+    with stage('rollup'):
+        rolled_up = rollups.rollups_for(key or dataset.source_path, dataset)
+        risk_data = rolled_up.state(state)
+    if risk_data is None:
+        return {
+            'error': f'No data found for state "{state}"',
+            'suggestions': sorted(rolled_up.states)
+        }
+    return risk_data
+
+def get_summary(csv_path=None):
+    """National risk components and timeline, with every state's score by incident count"""
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    
+    summary = summary_from_dataset(dataset, os.path.abspath(csv_path))
+    summary['last_updated'] = get_last_updated(csv_path)
+    return summary
+
+def summary_from_dataset(dataset, key=None):
+    """get_summary() without last_updated, for a loaded Dataset of the data file `key`"""
+    with stage('rollup'):
+        return rollups.rollups_for(key or dataset.source_path, dataset).national()
+
+def get_ranking(top=20, as_of=None, city_input=None, csv_path=None):
+    """
+    Locations ranked by time-decayed, severity-weighted score (see decay.py).
+    as_of is 'YYYY-MM-DD' (default today); city_input limits the list to matches.
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    return ranking_from_dataset(dataset, os.path.abspath(csv_path), top, as_of, city_input)
+
+def ranking_from_dataset(dataset, key, top=20, as_of=None, city_input=None):
+    """get_ranking() for a loaded Dataset of the data file `key`"""
+    day = decay.parse_day(as_of) if as_of else decay.today()
+    with stage('score'):
+        engine = decay.scores_for(key, dataset)
+    
+    locations = None
+    if city_input:
+        with stage('match'):
+            codes, error = match_locations(city_input, dataset)
+        if error:
+            return error
+        locations = dataset.location_names[codes]
+    
+    with stage('rank'):
+        cities = engine.ranking(top, day, locations)
+    return {
+        'as_of': str(np.datetime64(int(day), 'D')),
+        'half_life_days': engine.half_life_days,
+        'cities': cities
+    }
+
+def get_whatif(overrides, top=None, base_profile=None, csv_path=None):
+    """
+    Every location rescored with alternative weights: overrides (per_incident,
+    volume_cap, max_score, weights, thresholds) applied over the named base
+    profile (default: the configured one). Raises ValueError/KeyError on a bad
+    profile.
+    """
+    csv_path, dataset, error = _dataset_or_error(csv_path)
+    if error:
+        return error
+    return whatif_from_dataset(dataset, overrides, top, base_profile)
+
+def whatif_from_dataset(dataset, overrides, top=None, base_profile=None):
+    """get_whatif() for a loaded Dataset"""
+    baseline = get_profile(base_profile)
+    profile = resolve_profile(overrides, baseline)
+    with stage('score'):
+        cities = risk_matrix.for_dataset(dataset).ranking(profile, top, baseline)
+    return {'profile': profile, 'baseline': baseline, 'cities': cities}
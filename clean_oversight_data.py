@@ -2,9 +2,17 @@
 """
 Clean protest_data_oversight.csv - fix misaligned rows
 """
+import numpy as np
 import pandas as pd
 import re
 from datetime import datetime
+from snapshots import write_snapshot, current_path, data_version
+from near_duplicates import SignatureIndex, dedupe_frame, signature_path
+from fingerprints import FingerprintIndex, fingerprint_path, fingerprints
+
+CLEAN_PATH = 'protest_data_clean.csv'
+# Columns near-duplicates are compared on in the clean schema
+NEAR_DUPLICATE_COLUMNS = {'title': 'description', 'location': ['city', 'state'], 'date': 'date'}
 
 def parse_date(date_str):
     """Convert MM/DD/YYYY to YYYY-MM-DD, handle 'Unknown'"""
@@ -70,13 +78,8 @@ def calculate_severity(category, title):
     
     return min(severity, 10)
 
-def clean_data():
-    print("🧹 Cleaning protest_data_oversight.csv...")
-    
-    # Read raw CSV
-    df = pd.read_csv('protest_data_oversight.csv')
-    print(f"  Loaded {len(df)} rows")
-    
+def clean_rows(df):
+    """(cleaned DataFrame, number of misaligned rows fixed) for raw oversight rows"""
     cleaned_incidents = []
     misaligned_count = 0
     
@@ -121,23 +124,78 @@ def clean_data():
             'severity': severity
         })
     
-    print(f"  Fixed {misaligned_count} misaligned rows")
+    columns = ['city', 'state', 'date', 'type', 'description', 'source', 'severity']
+    return pd.DataFrame(cleaned_incidents, columns=columns), misaligned_count
+
+def clean_data(full=False):
+    """
+    Clean the raw oversight data into protest_data_clean.csv. Only raw rows whose
+    fingerprint is not yet in the clean data's index are cleaned and appended;
+    full=True (or a missing/stale index) reprocesses everything.
+    """
+    print("🧹 Cleaning protest_data_oversight.csv...")
     
-    # Create clean DataFrame
-    df_clean = pd.DataFrame(cleaned_incidents)
+    # Read raw CSV (the current snapshot, so a concurrent scrape can't change it mid-read)
+    df = pd.read_csv(current_path('protest_data_oversight.csv'))
+    print(f"  Loaded {len(df)} rows")
     
+    # Fingerprints of the raw rows already cleaned, as of the current clean data
+    consumed = None
+    if not full:
+        try:
+            consumed = FingerprintIndex.load(fingerprint_path(CLEAN_PATH), data_version(CLEAN_PATH)[1])
+        except FileNotFoundError:
+            pass
+    if consumed is None:
+        consumed = FingerprintIndex()
+        existing = None
+    else:
+        existing = pd.read_csv(current_path(CLEAN_PATH))
+        # MinHash signatures of the clean rows, for near-duplicates across runs
+        known = SignatureIndex.load(signature_path(CLEAN_PATH), consumed.version)
+        if known is None:
+            known, _ = SignatureIndex.from_frame(existing, **NEAR_DUPLICATE_COLUMNS)
+    
+    raw_fingerprints = fingerprints(df)
+    new = consumed.unknown(raw_fingerprints)
+    if existing is not None:
+        print(f"  {int(new.sum())} new rows since last clean")
+    df_new, misaligned_count = clean_rows(df[new])
+    print(f"  Fixed {misaligned_count} misaligned rows")
+    
+    # Same event reported by several outlets with slightly different headlines,
+    # within the batch and against the rows cleaned in earlier runs
+    df_new, near = dedupe_frame(df_new, **NEAR_DUPLICATE_COLUMNS)
+    batch, rows = SignatureIndex.from_frame(df_new, **NEAR_DUPLICATE_COLUMNS)
+    if existing is not None:
+        hits = known.matches(batch)
+        seen = np.zeros(len(df_new), dtype=bool)
+        seen[rows[hits]] = True
+        df_new, batch = df_new[~seen], batch.take(~hits)
+        near += int(hits.sum())
+    else:
+        known = SignatureIndex()
+
+    # Create clean DataFrame: previously cleaned rows first, then the new ones
+    df_clean = pd.concat([existing, df_new], ignore_index=True) if existing is not None else df_new
+
     # Remove duplicates
     before = len(df_clean)
     df_clean = df_clean.drop_duplicates(subset=['city', 'date', 'description'])
     after = len(df_clean)
     print(f"  Removed {before - after} duplicates")
-    
+    print(f"  Removed {near} near-duplicates")
+
     # Sort by date (most recent first)
-    df_clean = df_clean.sort_values('date', ascending=False)
+    df_clean = df_clean.sort_values('date', ascending=False, kind='stable')
     
-    # Save cleaned data
-    df_clean.to_csv('protest_data_clean.csv', index=False)
-    print(f"✅ Saved {len(df_clean)} clean incidents to protest_data_clean.csv")
+    # Save cleaned data, then record the raw rows it now covers
+    snapshot = write_snapshot(df_clean, CLEAN_PATH)
+    print(f"✅ Saved {len(df_clean)} clean incidents to {CLEAN_PATH} (version {snapshot['version']})")
+    consumed.add(raw_fingerprints[new])
+    consumed.save(fingerprint_path(CLEAN_PATH), snapshot['sha256'])
+    known.add(batch)
+    known.save(signature_path(CLEAN_PATH), snapshot['sha256'])
     
     # Stats
     print(f"\n📊 Stats:")
@@ -151,4 +209,7 @@ def clean_data():
     return df_clean
 
 if __name__ == "__main__":
-    clean_data()
+    import argparse
+    parser = argparse.ArgumentParser(description='Clean the raw oversight data')
+    parser.add_argument('--full', action='store_true', help='Reprocess every raw row, not just new ones')
+    clean_data(full=parser.parse_args().full)
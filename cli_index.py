@@ -0,0 +1,160 @@
+"""
+Compact prebuilt index for the command-line checker
+
+The index holds, per location, the incident counts that feed the risk score
+and the most recent few incidents, which is everything protest_checker.py prints.
+Answering from it needs only the standard library: no pandas or NumPy import
+and no CSV parse, so a lookup finishes in a few milliseconds after startup.
+
+The index is written next to the data file (protest_data_oversight.index.json)
+at clean/refresh time. Its first line records the data version it was built
+from; when that no longer matches the data, the next lookup rebuilds it with
+the full engine.
+"""
+import heapq
+import itertools
+import json
+import os
+
+from locations import LocationIndex, ambiguous_error
+from scoring import FACTOR_LABELS, profile_labels, score_counts
+from snapshots import atomic_write, data_path, data_version
+
+INDEX_FORMAT = 3
+RECENT_PER_LOCATION = 5
+
+
+def index_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.index.json'
+
+
+def build_index(dataset, version):
+    """
+    Index dict for a dataset.Dataset (imports NumPy/pandas; build time only).
+    Counts cover the reported labels plus any the scoring profile weights.
+    """
+    import numpy as np
+    import risk_matrix
+
+    n_locations = len(dataset.location_names)
+    labels = profile_labels()
+    matrix = risk_matrix.for_dataset(dataset)
+
+    columns = dataset.columns + ['location_normalized']
+    recent = []
+    for code in range(n_locations):
+        # Newest first, keyed by recency rank so query() can merge locations
+        rows = dataset.recent_rows([code], RECENT_PER_LOCATION)
+        recent.append([[int(dataset.recency_rank[i]), [dataset.record(i)[c] for c in columns]] for i in rows])
+
+    return {
+        'format': INDEX_FORMAT,
+        'version': version,
+        'names': dataset.location_names.tolist(),
+        'normalized': dataset.location_frame['location_normalized'].tolist(),
+        'first_row': [int(dataset.first_row(code)) for code in range(n_locations)],
+        'labels': labels,
+        'counts': np.column_stack([matrix.totals, matrix.counts(labels)]).tolist() if n_locations else [],
+        'columns': columns,
+        'recent': recent,
+        'suggestions': sorted(list(dict.fromkeys(dataset.location_names))[:20]),
+    }
+
+
+def _dump(index, f):
+    header = {'format': index['format'], 'version': index['version'], 'labels': index['labels']}
+    f.write(json.dumps(header) + '\n')
+    json.dump(index, f, separators=(',', ':'))
+
+
+def write_index(csv_path=None, dataset=None):
+    """Build the index for the current data (or a loaded Dataset) and write it atomically"""
+    csv_path = csv_path or data_path()
+    if dataset is None:
+        from dataset import Dataset
+        source, version = data_version(csv_path)
+        dataset = Dataset.from_csv(source)
+    else:
+        version = dataset.signature
+    index = build_index(dataset, version)
+    atomic_write(os.path.abspath(index_path(csv_path)), lambda f: _dump(index, f))
+    return index
+
+
+def load_index(csv_path=None):
+    """
+    The index if it is current for the data and counts every label the scoring
+    profile weights, else None. Raises FileNotFoundError if the data itself is missing.
+    """
+    csv_path = csv_path or data_path()
+    _, version = data_version(csv_path)
+    try:
+        with open(index_path(csv_path)) as f:
+            header = json.loads(f.readline())
+            if header.get('format') != INDEX_FORMAT or header.get('version') != version:
+                return None
+            if not set(profile_labels()) <= set(header.get('labels', ())):
+                return None
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def get_index(csv_path=None):
+    """Current index, rebuilding (and saving, if possible) when missing or stale"""
+    csv_path = csv_path or data_path()
+    index = load_index(csv_path)
+    if index is not None:
+        return index
+    try:
+        return write_index(csv_path)
+    except PermissionError:
+        from dataset import Dataset
+        source, version = data_version(csv_path)
+        return build_index(Dataset.from_csv(source), version)
+
+
+def query(index, city_input):
+    """
+    Risk for a city from an index - the same fields as calculator.get_risk_for_city()
+    apart from timeline and last_updated
+    """
+    locations = LocationIndex(index['names'])
+    match = locations.resolve(city_input)
+    matches = list(match.codes)
+    if not matches:
+        return {
+            'error': f'No data found for "{city_input}"',
+            'suggestions': index['suggestions']
+        }
+
+    if match.ambiguous:
+        return ambiguous_error(city_input, locations.candidates(matches, [counts[0] for counts in index['counts']]))
+
+    first_row = index['first_row']
+    matches.sort(key=first_row.__getitem__)
+    names = index['names']
+    labels = index['labels']
+    totals = [sum(index['counts'][i][k] for i in matches) for k in range(1 + len(labels))]
+    label_counts = dict(zip(labels, totals[1:]))
+
+    risk_data = score_counts(totals[0], *(label_counts.pop(label) for label in FACTOR_LABELS),
+                             other_counts=label_counts)
+    columns = index['columns']
+    recent = heapq.merge(*(index['recent'][i] for i in matches), key=lambda entry: entry[0])
+    risk_data['recent_incidents'] = [dict(zip(columns, values))
+                                     for _, values in itertools.islice(recent, RECENT_PER_LOCATION)]
+    risk_data['matched_cities'] = list(dict.fromkeys(names[i] for i in matches))
+    risk_data['search_term'] = city_input
+    risk_data['ambiguous'] = False
+    return risk_data
+
+
+def check_city(city_input, csv_path=None):
+    """Fast-path get_risk_for_city() for the CLI"""
+    csv_path = csv_path or data_path()
+    try:
+        index = get_index(csv_path)
+    except FileNotFoundError:
+        return {'error': 'Data file not found. Please run scraper first.'}
+    return query(index, city_input)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local query daemon for the command-line checker
+
+Keeps the dataset loaded and indexed in one long-running process and answers
+protest_checker.py over a Unix socket, so a lookup from the shell is a socket
+round trip instead of an interpreter start plus data load. The CLI uses the
+daemon whenever its socket exists and falls back to answering in-process
+otherwise. Data files are re-checked in the background and reloaded when they
+change.
+
+    python3 daemon.py                # run in the foreground (Ctrl-C to stop)
+    python3 daemon.py --stop         # stop a running daemon
+    python3 daemon.py --status
+
+Protocol: one JSON object per line each way, e.g.
+    {"op": "check", "city": "Portland", "csv_path": "/abs/protest_data_oversight.csv"}
+
+Environment:
+    PROTEST_CHECKER_SOCKET   socket path (default $XDG_RUNTIME_DIR/protest_checker.sock,
+                             else /tmp/protest_checker-<uid>.sock)
+    PROTEST_CHECKER_DAEMON   set to 0 to make the CLI skip the daemon
+"""
+import json
+import os
+import sys
+
+from snapshots import data_path
+
+CONNECT_TIMEOUT = 0.5
+QUERY_TIMEOUT = 10
+
+
+def socket_path():
+    path = os.environ.get('PROTEST_CHECKER_SOCKET')
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'protest_checker.sock')
+    return f"/tmp/protest_checker-{os.getuid()}.sock"
+
+
+# --- client -------------------------------------------------------------
+
+def request(message, path=None, timeout=QUERY_TIMEOUT):
+    """
+    Send one request to the daemon and return its reply, or None if no daemon
+    is reachable (callers then do the work themselves).
+    """
+    path = path or socket_path()
+    if os.environ.get('PROTEST_CHECKER_DAEMON') == '0' or not os.path.exists(path):
+        return None
+
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(message).encode() + b'\n')
+            with sock.makefile('rb') as reply:
+                line = reply.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    response = json.loads(line)
+    if 'daemon_error' in response:
+        return None
+    return response
+
+
+def check_city(city_input, csv_path=None):
+    """cli_index.check_city() answered by the daemon; None if it isn't running"""
+    csv_path = csv_path or data_path()
+    return request({'op': 'check', 'city': city_input, 'csv_path': os.path.abspath(csv_path)})
+
+
+# --- server -------------------------------------------------------------
+
+class DatasetStore:
+    """
+    Datasets the daemon serves, by absolute path. Queries get the last fully
+    loaded version; refresh() reloads changed files and swaps them in, so a
+    query never waits on a reload.
+    """
+
+    def __init__(self):
+        self.datasets = {}
+
+    def get(self, csv_path):
+        dataset = self.datasets.get(csv_path)
+        if dataset is None:
+            import calculator
+            dataset = self.datasets[csv_path] = calculator.load_dataset(csv_path)
+        return dataset
+
+    def refresh(self):
+        import calculator
+        for csv_path in list(self.datasets):
+            try:
+                self.datasets[csv_path] = calculator.load_dataset(csv_path)
+            except Exception as e:
+                print(f"⚠️  Reload of {csv_path} failed, serving previous data: {e}", file=sys.stderr)
+
+    def check(self, city_input, csv_path):
+        """Same answer as cli_index.check_city(), from the full engine"""
+        import calculator
+        try:
+            dataset = self.get(csv_path)
+        except FileNotFoundError:
+            return {'error': 'Data file not found. Please run scraper first.'}
+        result = calculator.risk_from_dataset(city_input, dataset)
+        result.pop('timeline', None)
+        return result
+
+
+def handle_message(store, message):
+    op = message.get('op')
+    if op == 'check':
+        return store.check(message['city'], message['csv_path'])
+    if op == 'ping':
+        return {'ok': True, 'pid': os.getpid()}
+    return {'daemon_error': f"unknown op {op!r}"}
+
+
+def serve(path=None, preload=None, watch_interval=2.0):
+    import socketserver
+    import threading
+
+    path = path or socket_path()
+    preload = preload or [data_path()]
+    if request({'op': 'ping'}, path, timeout=1) is not None:
+        raise SystemExit(f"❌ Daemon already running on {path}")
+    if os.path.exists(path):
+        os.remove(path)  # stale socket from a daemon that didn't shut down cleanly
+
+    store = DatasetStore()
+    for csv_path in preload:
+        try:
+            store.get(os.path.abspath(csv_path))
+        except Exception as e:
+            print(f"⚠️  Could not preload {csv_path}: {e}", file=sys.stderr)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                    if message.get('op') == 'stop':
+                        reply = {'ok': True}
+                        threading.Thread(target=server.shutdown, daemon=True).start()
+                    else:
+                        reply = handle_message(store, message)
+                except Exception as e:
+                    reply = {'daemon_error': f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(reply, default=str).encode() + b'\n')
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o077)  # socket only usable by this user
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    stop = threading.Event()
+
+    def watch():
+        while not stop.wait(watch_interval):
+            store.refresh()
+
+    threading.Thread(target=watch, name='data-watch', daemon=True).start()
+
+    print(f"🟢 Query daemon listening on {path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        print("🛑 Query daemon stopped")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Local query daemon for protest_checker.py')
+    parser.add_argument('--socket', help='Unix socket path (default: %(default)s)', default=socket_path())
+    parser.add_argument('--data', action='append',
+                        help='Data file to preload (repeatable; default the unified dataset, else protest_data_oversight.csv)')
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                        help='Seconds between data file change checks')
+    parser.add_argument('--stop', action='store_true', help='Stop the running daemon')
+    parser.add_argument('--status', action='store_true', help='Report whether a daemon is running')
+    args = parser.parse_args()
+
+    if args.stop or args.status:
+        reply = request({'op': 'stop' if args.stop else 'ping'}, args.socket, timeout=2)
+        if reply is None:
+            print(f"⚪ No daemon running on {args.socket}")
+            sys.exit(1)
+        print(f"🛑 Stopping daemon on {args.socket}" if args.stop else f"🟢 Daemon running on {args.socket}")
+        return
+
+    serve(args.socket, args.data, args.watch_interval)
+
+
+if __name__ == "__main__":
+    main()
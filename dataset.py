@@ -0,0 +1,240 @@
+"""
+Columnar, fork-friendly incident dataset
+
+A Dataset holds the incident table as a handful of NumPy arrays instead of a
+DataFrame of per-row Python objects:
+
+  - repeated strings (location, date, category, ...) become int32 codes into a
+    small array of unique values
+  - free text (title, source_url, ...) is packed into one UTF-8 byte buffer
+    with int64 offsets
+  - numeric columns stay plain NumPy arrays
+
+Reading a row only touches arrays, never per-row object refcounts, so a dataset
+loaded in a gunicorn master before fork stays shared copy-on-write across
+workers. Rows are turned back into Python dicts only when they are returned.
+
+Rows are also ranked by recency (newest date first, Unknown dates last, file
+order on ties), and each location's rows are kept in that order, so its latest
+K incidents are a slice and the latest K across several locations a K-way heap
+merge of those slices - O(K) however many incidents a location has.
+"""
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Columns always stored as codes because lookups and aggregates key on them
+CODED_COLUMNS = ('location', 'date', 'category')
+
+# Recency key of Unknown / unparseable dates: older than any real day
+UNKNOWN_DAY = np.iinfo(np.int64).min + 1
+
+
+def _day_keys(parsed):
+    """int64 day number per parsed date, UNKNOWN_DAY where missing"""
+    days = parsed.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    return np.where(parsed.isna().to_numpy(), UNKNOWN_DAY, days)
+
+
+def recency_keys(dates):
+    """Sortable int64 key per date string (larger = newer), UNKNOWN_DAY for Unknown dates"""
+    codes, uniques = pd.factorize(pd.Series(dates, dtype=object), sort=False)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce')
+    return np.append(_day_keys(parsed), UNKNOWN_DAY)[codes]
+
+
+def most_recent(keys, k):
+    """Positions of the k largest recency keys, newest first, ties in input order"""
+    keys = np.asarray(keys)
+    if len(keys) > k:
+        # Only rows at least as new as the k-th newest need sorting
+        kth = np.partition(keys, len(keys) - k)[len(keys) - k]
+        candidates = np.flatnonzero(keys >= kth)
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.lexsort((candidates, -keys[candidates]))[:k]]
+
+
+def location_states(locations):
+    """Two-letter state of each "City, ST" location string (None where there is none)"""
+    parts = pd.Series(locations, dtype=object).str.split(',', n=1).str[1].str.strip().str[:2].str.upper()
+    return parts.where(parts.str.fullmatch(r'[A-Z]{2}', na=False), None).to_numpy(dtype=object)
+
+
+def normalize_locations(locations):
+    """Vectorized normalize_city_input() for a Series of CSV location strings"""
+    return locations.str.strip().str.lower().str.replace(r'[,\s]+', ' ', regex=True).str.strip()
+
+
+class CodedColumn:
+    """Low-cardinality column: int32 codes (-1 = missing) into unique values"""
+    __slots__ = ('codes', 'values')
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, sort=False)
+        self.codes = codes.astype(np.int32)
+        self.values = np.asarray(uniques, dtype=object)
+
+    def get(self, i):
+        code = self.codes[i]
+        return None if code < 0 else self.values[code]
+
+
+class TextColumn:
+    """High-cardinality text packed into one UTF-8 buffer with row offsets"""
+    __slots__ = ('buffer', 'offsets', 'null')
+
+    def __init__(self, series):
+        self.null = series.isna().to_numpy()
+        encoded = [b'' if missing else str(v).encode('utf-8')
+                   for v, missing in zip(series.tolist(), self.null)]
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)),
+                  out=self.offsets[1:])
+        self.buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    def get(self, i):
+        if self.null[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+class NumericColumn:
+    """Numeric or boolean column kept as a NumPy array"""
+    __slots__ = ('values',)
+
+    def __init__(self, series):
+        self.values = series.to_numpy()
+
+    def get(self, i):
+        value = self.values[i]
+        return None if pd.isna(value) else value.item()
+
+
+def _make_column(name, series):
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return NumericColumn(series)
+    if name in CODED_COLUMNS or series.nunique(dropna=True) <= len(series) // 2:
+        return CodedColumn(series)
+    return TextColumn(series)
+
+
+class Dataset:
+    """Immutable, indexed snapshot of an incidents table"""
+
+    def __init__(self, df, source_path=None, signature=None):
+        self.source_path = source_path
+        self.signature = signature
+        self.columns = list(df.columns)
+        self.n_rows = len(df)
+
+        self._columns = {name: _make_column(name, df[name]) for name in self.columns}
+        for name in CODED_COLUMNS:
+            if name not in self._columns:
+                self._columns[name] = CodedColumn(pd.Series([None] * self.n_rows, dtype=object))
+
+        # Locations: stripped display name and normalized form per code
+        location = self._columns['location']
+        names = pd.Series(location.values, dtype=object).astype(str).str.strip()
+        self.location_names = names.to_numpy(dtype=object)
+        self.location_frame = pd.DataFrame({
+            'location': self.location_names,
+            'location_normalized': normalize_locations(names).to_numpy(dtype=object),
+        })
+
+        # Row ids grouped by location code (CSR layout), file order within each group
+        codes = location.codes
+        self._location_order = np.argsort(codes, kind='stable').astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.location_names))
+        self._location_starts = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._location_starts[1:])
+        self._location_starts += np.count_nonzero(codes < 0)
+
+        # Dates: ISO day string per code (None for Unknown / unparseable)
+        date = self._columns['date']
+        parsed = pd.to_datetime(pd.Series(date.values, dtype=object), errors='coerce')
+        self.date_days = np.array([None if pd.isna(d) else d.date().isoformat() for d in parsed],
+                                  dtype=object)
+
+        # Recency rank per row (0 = newest, Unknown last, file order on ties) and
+        # row ids grouped by location as above but newest first within each group
+        self.row_days = np.append(_day_keys(parsed), UNKNOWN_DAY)[date.codes]
+        self._by_recency = np.lexsort((np.arange(self.n_rows), -self.row_days)).astype(np.int64)
+        self.recency_rank = np.empty(self.n_rows, dtype=np.int64)
+        self.recency_rank[self._by_recency] = np.arange(self.n_rows)
+        self._recent_order = np.lexsort((self.recency_rank, codes)).astype(np.int64)
+
+    def __len__(self):
+        return self.n_rows
+
+    def codes(self, column):
+        return self._columns[column].codes
+
+    def values(self, column):
+        return self._columns[column].values
+
+    def string_columns(self):
+        """Names of the original columns holding text (coded or packed), in order"""
+        return [name for name in self.columns if not isinstance(self._columns[name], NumericColumn)]
+
+    def strings(self, column):
+        """Object array of a text column's value per row, None where missing"""
+        column = self._columns[column]
+        if isinstance(column, CodedColumn):
+            return np.append(column.values, None)[column.codes]
+        data, offsets = column.buffer.tobytes(), column.offsets.tolist()
+        values = np.array([data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])],
+                          dtype=object)
+        values[column.null] = None
+        return values
+
+    def rows_for_locations(self, location_codes):
+        """Row ids (ascending file order) for the given location codes"""
+        starts, order = self._location_starts, self._location_order
+        parts = [order[starts[c]:starts[c + 1]] for c in location_codes]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def recent_rows(self, location_codes, k):
+        """Row ids of the k most recent incidents at the given locations, newest first"""
+        starts, order = self._location_starts, self._recent_order
+        parts = [order[starts[c]:min(starts[c] + k, starts[c + 1])] for c in location_codes]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        # Each part is already newest first: merge on recency rank, stop after k
+        ranks = heapq.merge(*(self.recency_rank[part].tolist() for part in parts))
+        return self._by_recency[np.fromiter(itertools.islice(ranks, k), dtype=np.int64)]
+
+    def first_row(self, location_code):
+        """Row id of the first incident at a location"""
+        return self._location_order[self._location_starts[location_code]]
+
+    def value_counts(self, column, rows=None):
+        """(codes, counts) of a coded column over rows (all rows if None), missing excluded"""
+        codes = self._columns[column].codes
+        if rows is not None:
+            codes = codes[rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self._columns[column].values))
+        present = np.flatnonzero(counts)
+        return present, counts[present]
+
+    def record(self, i):
+        """One row as a dict with the original columns, missing values as None"""
+        record = {name: self._columns[name].get(i) for name in self.columns}
+        code = self._columns['location'].codes[i]
+        record['location_normalized'] = None if code < 0 else self.location_frame['location_normalized'].iat[code]
+        return record
+
+    def records(self, rows):
+        return [self.record(i) for i in rows]
+
+    @classmethod
+    def from_csv(cls, csv_path, signature=None):
+        return cls(pd.read_csv(csv_path), source_path=csv_path, signature=signature)
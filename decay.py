@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Time-decayed, severity-weighted risk scores for every location
+
+Each incident contributes severity * 2^(-age / half_life) to its location's
+score, so a burst of serious incidents last week outweighs the same number
+months ago. All locations are scored in one vectorized pass.
+
+Decay is applied lazily: per location we keep
+    sum(severity * exp(rate * (day - reference_day)))
+which does not change as time passes. The score on any day is that sum times
+exp(-rate * (day - reference_day)), and appending incidents only adds their
+terms, so new rows never force a rescan of old ones. Undated incidents
+(Unknown dates) count as UNDATED_AGE_DAYS old at every query.
+
+Severity is the `severity` column where the data has one (protest_data.csv
+schema). For the oversight data it is derived from the category labels with
+the active scoring profile: per_incident plus the weight of each label present.
+
+    python3 decay.py                          # ranking for the served data
+    python3 decay.py --data protest_data_clean.csv --top 20 --as-of 2026-01-31
+"""
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from risk_matrix import category_flags
+from scoring import get_profile
+from snapshots import is_appended
+
+HALF_LIFE_DAYS = 30.0
+UNDATED_AGE_DAYS = 180.0
+# Fill for rows whose severity column is empty
+DEFAULT_SEVERITY = 5.0
+# Largest exp() argument kept before rebasing the reference day (exp(50) ~ 5e21)
+MAX_EXPONENT = 50.0
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def today():
+    """Current time in days since the epoch"""
+    return time.time() / 86400
+
+
+def to_days(dates):
+    """Days since the epoch for date strings/Timestamps; NaN where missing or unparseable"""
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format='mixed')
+    days = (parsed.to_numpy(dtype='datetime64[D]') - _EPOCH).astype(np.float64)
+    days[parsed.isna().to_numpy()] = np.nan
+    return days
+
+
+def category_severity(categories, profile=None):
+    """Severity for each category string (None/NaN = no labels) under a scoring profile"""
+    profile = profile or get_profile()
+    labels = list(profile['weights'])
+    weights = np.array([profile['weights'][label] for label in labels], dtype=np.float64)
+    return profile['per_incident'] + category_flags(categories, labels) @ weights
+
+
+class DecayedScores:
+    """
+    Decayed score accumulators per location. append() adds incidents in place;
+    scores(), score() and ranking() evaluate on any day without touching rows.
+    """
+
+    def __init__(self, half_life_days=HALF_LIFE_DAYS, undated_age_days=UNDATED_AGE_DAYS):
+        self.half_life_days = half_life_days
+        self.undated_age_days = undated_age_days
+        self.rate = math.log(2) / half_life_days
+        self.reference_day = None
+        self.names = []
+        self._ids = {}
+        self._dated = np.zeros(0)      # sum(severity * exp(rate * (day - reference_day)))
+        self._undated = np.zeros(0)    # sum(severity) of undated incidents
+        self._counts = np.zeros(0, dtype=np.int64)
+        # Rows of the source consumed so far (extend() appends the rest) and its version
+        self.rows_seen = 0
+        self.signature = None
+        # Scoring profile severities were derived with (category-labelled data)
+        self.profile = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def copy(self):
+        other = DecayedScores(self.half_life_days, self.undated_age_days)
+        other.reference_day = self.reference_day
+        other.names = list(self.names)
+        other._ids = dict(self._ids)
+        other._dated = self._dated.copy()
+        other._undated = self._undated.copy()
+        other._counts = self._counts.copy()
+        other.rows_seen, other.signature = self.rows_seen, self.signature
+        other.profile = self.profile
+        return other
+
+    def _location_ids(self, locations):
+        codes, uniques = pd.factorize(pd.Series(locations, dtype=object), sort=False)
+        new = [name for name in uniques if name not in self._ids]
+        for name in new:
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+        if new:
+            grow = len(new)
+            self._dated = np.concatenate([self._dated, np.zeros(grow)])
+            self._undated = np.concatenate([self._undated, np.zeros(grow)])
+            self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int64)])
+        # Trailing -1 so missing locations (code -1) index it
+        ids = np.array([self._ids[name] for name in uniques] + [-1], dtype=np.int64)
+        return ids[codes], codes >= 0
+
+    def _rebase(self, day):
+        """Move the reference day, rescaling the accumulated sums to match"""
+        if self.reference_day is not None:
+            self._dated *= math.exp(-self.rate * (day - self.reference_day))
+        self.reference_day = day
+
+    def append(self, locations, days, severities):
+        """
+        Add incidents: location names, days since the epoch (NaN = undated) and
+        severities, as equal-length sequences. Rows without a location are skipped.
+        """
+        days = np.asarray(days, dtype=np.float64)
+        severities = np.asarray(severities, dtype=np.float64)
+        ids, has_location = self._location_ids(locations)
+        ids, days, severities = ids[has_location], days[has_location], severities[has_location]
+        n = len(self.names)
+
+        dated = ~np.isnan(days)
+        if dated.any():
+            latest = days[dated].max()
+            if self.reference_day is None or self.rate * (latest - self.reference_day) > MAX_EXPONENT:
+                self._rebase(latest)
+            weights = severities[dated] * np.exp(self.rate * (days[dated] - self.reference_day))
+            self._dated += np.bincount(ids[dated], weights=weights, minlength=n)
+        self._undated += np.bincount(ids[~dated], weights=severities[~dated], minlength=n)
+        self._counts += np.bincount(ids, minlength=n)
+        return self
+
+    def scores(self, day=None):
+        """Decayed score of every location (aligned with .names) on a day (default now)"""
+        day = today() if day is None else day
+        undated = self._undated * math.exp(-self.rate * self.undated_age_days)
+        if self.reference_day is None:
+            return undated
+        return self._dated * math.exp(-self.rate * (day - self.reference_day)) + undated
+
+    def _entry(self, i, scores, rank):
+        return {'location': self.names[i], 'score': round(float(scores[i]), 3),
+                'incidents': int(self._counts[i]), 'rank': rank}
+
+    def score(self, location, day=None):
+        """Score, incident count and rank (1 = highest) for one location name, or None"""
+        i = self._ids.get(location)
+        if i is None:
+            return None
+        scores = self.scores(day)
+        # Same ordinal rank as ranking(): ties go to the location seen first
+        rank = np.count_nonzero(scores > scores[i]) + np.count_nonzero(scores[:i] == scores[i]) + 1
+        return self._entry(i, scores, int(rank))
+
+    def ranking(self, top=None, day=None, locations=None):
+        """
+        Locations by descending score (ties in first-seen order), optionally only
+        the given location names and/or the first `top`. Ranks are always overall.
+        Raises ValueError when top is below 1.
+        """
+        if top is not None and top < 1:
+            raise ValueError('top must be at least 1')
+        scores = self.scores(day)
+        order = np.argsort(-scores, kind='stable')
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(1, len(order) + 1)
+        if locations is not None:
+            wanted = np.zeros(len(order), dtype=bool)
+            wanted[[self._ids[name] for name in locations if name in self._ids]] = True
+            order = order[wanted[order]]
+        if top is not None:
+            order = order[:top]
+        return [self._entry(i, scores, int(ranks[i])) for i in order]
+
+    # --- loading from data -------------------------------------------------
+
+    @staticmethod
+    def _dataset_rows(dataset, start=0):
+        """(locations, days, severities) arrays for dataset rows from start on"""
+        location_codes = dataset.codes('location')[start:]
+        locations = np.where(location_codes >= 0, dataset.location_names[location_codes], None)
+
+        date_days = to_days(dataset.date_days)
+        date_codes = dataset.codes('date')[start:]
+        days = np.where(date_codes >= 0, date_days[date_codes], np.nan)
+
+        if 'severity' in dataset.columns:
+            severities = pd.to_numeric(pd.Series(dataset.values('severity')[start:]), errors='coerce')
+            severities = severities.fillna(DEFAULT_SEVERITY).to_numpy(dtype=np.float64)
+        else:
+            per_code = category_severity(dataset.values('category'))
+            category_codes = dataset.codes('category')[start:]
+            severities = np.where(category_codes >= 0, per_code[category_codes],
+                                  get_profile()['per_incident'])
+        return locations, days, severities
+
+    @classmethod
+    def from_dataset(cls, dataset, **kwargs):
+        """Scores for a dataset.Dataset with location, date and severity or category columns"""
+        engine = cls(**kwargs)
+        engine.profile = get_profile()
+        engine.append(*cls._dataset_rows(dataset))
+        engine._mark_seen(dataset)
+        return engine
+
+    def _mark_seen(self, dataset):
+        self.rows_seen = len(dataset)
+        self.signature = dataset.signature
+
+    def extend(self, dataset):
+        """
+        Append the rows of dataset past those already consumed. The caller
+        vouches that dataset is the consumed data with rows appended
+        (scores_for() checks the snapshot lineage).
+        """
+        self.append(*self._dataset_rows(dataset, self.rows_seen))
+        self._mark_seen(dataset)
+        return self
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        """
+        Scores for a DataFrame in either schema: oversight (location, date,
+        category) or clean/seed (city, state, date, severity)
+        """
+        if 'location' in df.columns:
+            locations = df['location'].astype(object).where(df['location'].notna(), None)
+            locations = locations.map(lambda v: v.strip() if isinstance(v, str) else v)
+        else:
+            locations = (df['city'].astype(str).str.strip() + ', ' + df['state'].astype(str).str.strip())
+        if 'severity' in df.columns:
+            severities = pd.to_numeric(df['severity'], errors='coerce').fillna(DEFAULT_SEVERITY)
+        else:
+            severities = category_severity(df['category'])
+        return cls(**kwargs).append(locations.to_numpy(dtype=object), to_days(df['date']),
+                                    np.asarray(severities, dtype=np.float64))
+
+
+# Latest scores per published data file, advanced incrementally as it is reloaded
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def scores_for(key, dataset):
+    """
+    DecayedScores for a loaded Dataset of the data file `key`. When the file's
+    current snapshot was made by appending rows to the one of the last call
+    (snapshots.is_appended), the previous scores are copied and extended with
+    the new rows instead of being rebuilt. A change of scoring profile rebuilds them.
+    """
+    profile = get_profile()
+    engine = _engines.get(key)
+    if engine is not None and engine.signature == dataset.signature and engine.profile is profile:
+        return engine
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None and engine.profile is not profile:
+            engine = None
+        if engine is not None and engine.signature == dataset.signature:
+            return engine
+        if engine is not None and is_appended(key, engine.signature, dataset.signature):
+            engine = _engines[key] = engine.copy().extend(dataset)
+            return engine
+        engine = _engines[key] = DecayedScores.from_dataset(dataset)
+        return engine
+
+
+def parse_day(value):
+    """'YYYY-MM-DD' -> days since the epoch (ValueError if invalid); None -> None"""
+    if value is None:
+        return None
+    return float((np.datetime64(value, 'D') - _EPOCH).astype(np.int64))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Rank locations by time-decayed, severity-weighted risk')
+    parser.add_argument('--data', help='Incidents CSV (either schema; default the served dataset)')
+    parser.add_argument('--top', type=int, default=20, help='Number of locations to show')
+    parser.add_argument('--as-of', help='Score as of this date (YYYY-MM-DD, default today)')
+    parser.add_argument('--half-life', type=float, default=HALF_LIFE_DAYS, help='Decay half-life in days')
+    args = parser.parse_args()
+
+    from snapshots import current_path, data_path
+    engine = DecayedScores.from_frame(pd.read_csv(current_path(args.data or data_path())), half_life_days=args.half_life)
+    print(f"{'#':>4}  {'Score':>9}  {'Incidents':>9}  Location")
+    for entry in engine.ranking(args.top, parse_day(args.as_of)):
+        print(f"{entry['rank']:>4}  {entry['score']:>9.2f}  {entry['incidents']:>9}  {entry['location']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Faceted counts over incidents with precomputed bitmaps
+
+For every facet value - each state, each category label (a row has a label
+when its category contains it, as in risk_matrix.py, so a row can have
+several) and each month - the rows having it are kept as a bitmap: one bit
+per row, packed into uint64 words. Filtering is then bitwise AND/OR of
+bitmaps and counting is a popcount, with no pass over the rows themselves:
+
+  - values selected within a facet are OR'd, facets are AND'd
+  - each facet's counts are taken under the other facets' filters only, so
+    the values not selected still show how many incidents they would add
+
+Bitmaps are built on first use for each Dataset and kept as long as it is.
+Labels asked for that the scoring profile doesn't weight are added on demand.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import risk_matrix
+from dataset import UNKNOWN_DAY, location_states
+from scoring import profile_labels
+
+FACETS = ('state', 'category', 'month')
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:  # NumPy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _pack(flags):
+    """Bitmap of a bool array: bits packed into uint64 words (zero-padded)"""
+    packed = np.packbits(flags, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def _bitmaps(value_codes, n_values):
+    """One bitmap per value code (-1 = no value)"""
+    return [_pack(value_codes == code) for code in range(n_values)]
+
+
+def parse_month(value):
+    """'YYYY-MM' (or a 'YYYY-MM-DD' date) -> 'YYYY-MM'; ValueError if invalid"""
+    return str(np.datetime64(str(value)[:7], 'M'))
+
+
+class FacetBitmaps:
+    """Per-value bitmaps of one Dataset's state, category label and month"""
+
+    def __init__(self, dataset):
+        # Only arrays, not the dataset itself, which for_dataset() keys on weakly
+        self.n_rows = len(dataset)
+        self._all = _pack(np.ones(self.n_rows, dtype=bool))
+
+        # State: two letters after the comma of "City, ST", per location code
+        states = location_states(dataset.location_names)
+        state_codes, state_values = pd.factorize(states, sort=True)
+        row_states = np.append(state_codes, -1)[dataset.codes('location')]
+        self.values = {'state': list(state_values)}
+        self._maps = {'state': dict(zip(state_values, _bitmaps(row_states, len(state_values))))}
+
+        # Month: 'YYYY-MM' of each dated row
+        days = dataset.row_days
+        dated = days != UNKNOWN_DAY
+        months = np.full(self.n_rows, -1, dtype=np.int64)
+        months[dated] = days[dated].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        month_values = np.unique(months[dated])
+        row_months = np.searchsorted(month_values, months)
+        row_months[~dated] = -1
+        month_names = [str(m) for m in month_values.astype('datetime64[M]')]
+        self.values['month'] = month_names
+        self._maps['month'] = dict(zip(month_names, _bitmaps(row_months, len(month_names))))
+
+        # Category labels: added on demand, starting with the profile's
+        self._category_codes = dataset.codes('category')
+        self._categories = dataset.values('category')
+        self.values['category'] = []
+        self._maps['category'] = {}
+        self._lock = threading.Lock()
+        self.add_labels(profile_labels())
+
+    def add_labels(self, labels):
+        """Build bitmaps for labels not seen yet (safe to call from several threads)"""
+        with self._lock:
+            new = [label for label in dict.fromkeys(labels) if label not in self._maps['category']]
+            if not new:
+                return
+            per_code = risk_matrix.category_flags(self._categories, new)
+            per_code = np.vstack([per_code, np.zeros((1, len(new)), dtype=bool)])
+            flags = per_code[self._category_codes]
+            maps = dict(self._maps['category'])
+            maps.update((label, _pack(flags[:, j])) for j, label in enumerate(new))
+            # Publish bitmaps before values so readers never see a value without one
+            self._maps = {**self._maps, 'category': maps}
+            self.values = {**self.values, 'category': self.values['category'] + new}
+
+    def months_between(self, since=None, until=None):
+        """Months of the data from since to until ('YYYY-MM', inclusive; None = open)"""
+        return [month for month in self.values['month']
+                if (since is None or month >= since) and (until is None or month <= until)]
+
+    def _selection(self, facet, selected):
+        """Bitmap of rows having any of the selected values of a facet (None = no filter)"""
+        if selected is None:
+            return None
+        bitmap = np.zeros_like(self._all)
+        for value in selected:
+            if value in self._maps[facet]:
+                bitmap |= self._maps[facet][value]
+        return bitmap
+
+    def counts(self, selected):
+        """
+        (number of rows matching every filter, {facet: [{'value', 'count'}]}) for
+        selected = {facet: [values]} (a facet missing or None is not filtered on).
+        Each facet lists its values with a non-zero count plus any selected ones;
+        states and labels by count, months in order.
+        """
+        if selected.get('category'):
+            self.add_labels(selected['category'])
+        selections = {facet: self._selection(facet, selected.get(facet)) for facet in FACETS}
+
+        def combined(skip=None):
+            result = self._all
+            for facet, bitmap in selections.items():
+                if facet != skip and bitmap is not None:
+                    result = result & bitmap
+            return result
+
+        total = _popcount(combined())
+        facets = {}
+        for facet in FACETS:
+            base = combined(skip=facet)
+            wanted = set(selected.get(facet) or ())
+            entries = []
+            for value in self.values[facet]:
+                count = _popcount(self._maps[facet][value] & base)
+                if count or value in wanted:
+                    entries.append({'value': value, 'count': count})
+            entries += [{'value': value, 'count': 0} for value in selected.get(facet) or ()
+                        if value not in self._maps[facet]]
+            if facet != 'month':
+                entries.sort(key=lambda entry: -entry['count'])
+            facets[facet] = entries
+        return total, facets
+
+
+_bitmap_sets = weakref.WeakKeyDictionary()
+_bitmap_sets_lock = threading.Lock()
+
+
+def for_dataset(dataset):
+    """The FacetBitmaps of a Dataset, built on first use and kept as long as the dataset"""
+    bitmaps = _bitmap_sets.get(dataset)
+    if bitmaps is None:
+        with _bitmap_sets_lock:
+            bitmaps = _bitmap_sets.get(dataset)
+            if bitmaps is None:
+                bitmaps = _bitmap_sets[dataset] = FacetBitmaps(dataset)
+    return bitmaps
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Canonical source URLs and a persistent fingerprint index of known incidents
+
+Scraped source URLs carry tracking junk (`?teaserSource=trending`, `?oom`,
+`utm_*`, `#:~:text=` fragments), so the same article shows up under several
+URLs. canonical_url() strips tracking parameters and fragments and normalizes
+scheme, host and trailing slashes.
+
+An incident's fingerprint is a 64-bit hash of its canonical URL, location and
+date (the normalized title stands in for a missing URL); one article can cite
+incidents in several places, so the URL alone is not enough. The set of known
+fingerprints is kept next to the data file (protest_data_oversight.fingerprints)
+as a JSON header line - format and the data version it covers - followed by the
+fingerprints as sorted little-endian uint64. It is loaded into a hash set, so
+checking a new batch costs O(1) per row however long the history is. When the
+header no longer matches the data, the index is rebuilt from the data.
+
+    python3 fingerprints.py protest_data_oversight.csv     # rebuild and report
+"""
+import hashlib
+import json
+import os
+from urllib.parse import parse_qsl, urlencode
+
+import numpy as np
+import pandas as pd
+
+from near_duplicates import normalize_titles
+from snapshots import atomic_write, data_version, write_appended
+
+FINGERPRINT_FORMAT = 1
+
+# Query parameters that only say where a click came from (compared lowercased)
+TRACKING_PARAMS = frozenset({
+    'cid', 'cmpid', 'dclid', 'fbclid', 'gclid', 'igshid', 'intcid', 'link_source',
+    'mc_cid', 'mc_eid', 'msclkid', 'ocid', 'oom', 'redirectedfrom', 'ref', 'ref_src',
+    'referringsource', 'searchresultposition', 'smid', 'taid', 'teasersource',
+    'unlocked_article_code',
+})
+TRACKING_PREFIXES = ('utm_', 'gca-', 'gnt-')
+
+
+# scheme, host[:port], path, query; the fragment is dropped
+_URL = r'^(?:([A-Za-z][A-Za-z0-9+.-]*):)?//([^/?#]*)([^?#]*)(?:\?([^#]*))?'
+# Canonical URL that is only scheme and host
+_SITE_ONLY = r'[a-z][a-z0-9+.-]*://[^/?]*'
+
+
+def _clean_query(query):
+    """Query string without tracking parameters, remaining ones sorted"""
+    pairs = [(key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)]
+    return urlencode(sorted(pairs))
+
+
+def canonical_urls(urls):
+    """
+    Canonical form of each URL: no tracking parameters or fragment, https,
+    lowercase host without www. or default port, no trailing slash. '' for
+    missing URLs; strings that are not URLs are only stripped.
+    """
+    urls = pd.Series(urls, dtype=object)
+    text = urls.where(urls.map(lambda u: isinstance(u, str)), '').astype(str).str.strip()
+    parts = text.str.extract(_URL)
+    is_url = parts[1].notna().to_numpy()
+
+    scheme = parts[0].fillna('https').str.lower().replace('http', 'https')
+    host = parts[1].fillna('').str.lower()
+    host = host.str.replace(r'^www\.', '', regex=True).str.replace(r':(?:80|443)$', '', regex=True)
+    path = parts[2].fillna('').str.rstrip('/')
+    query = parts[3].fillna('')
+    # Only URLs with a query string need parsing, each distinct query once
+    has_query = (query != '').to_numpy()
+    codes, uniques = pd.factorize(query[has_query], sort=False)
+    query[has_query] = np.array([_clean_query(q) for q in uniques], dtype=object)[codes]
+    query = np.where(query.to_numpy(dtype=object) != '', '?' + query.to_numpy(dtype=object), '')
+
+    canonical = (scheme + '://' + host + path).to_numpy(dtype=object) + query
+    return np.where(is_url, canonical, text.to_numpy(dtype=object))
+
+
+def canonical_url(url):
+    """canonical_urls() for a single URL"""
+    return canonical_urls([url])[0]
+
+
+def _clean(values):
+    """Lowercased, whitespace-collapsed strings; '' for missing values"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=False)
+    cleaned = [' '.join(str(v).lower().split()) for v in uniques] + ['']
+    return np.array(cleaned, dtype=object)[codes]
+
+
+def incident_keys(df, url='source_url', location=('location',), date='date', title='title'):
+    """
+    Fingerprint key string per row: canonical URL (or normalized title), location
+    and date (left out when date is None). A URL without a path names a site, not
+    an article, so it counts as missing.
+    """
+    location = [location] if isinstance(location, str) else list(location)
+    sources = canonical_urls(df[url].to_numpy(dtype=object) if url in df else [None] * len(df))
+    missing = (sources == '') | pd.Series(sources, dtype=object).str.fullmatch(_SITE_ONLY).to_numpy(dtype=bool)
+    if missing.any():
+        titles = normalize_titles(df[title].to_numpy(dtype=object)[missing]).to_numpy(dtype=object)
+        sources[missing] = 'title:' + titles
+    keys = pd.Series(sources, dtype=object)
+    for column in location + ([date] if date is not None else []):
+        keys = keys + '\x1f' + _clean(df[column].to_numpy(dtype=object))
+    return keys.tolist()
+
+
+def fingerprints(df, **columns):
+    """uint64 fingerprint per row of df (column names as for incident_keys)"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+         for key in incident_keys(df, **columns)),
+        dtype=np.uint64, count=len(df))
+
+
+def fingerprint_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.fingerprints'
+
+
+class FingerprintIndex:
+    """Set of known incident fingerprints, tied to the data version it covers"""
+
+    def __init__(self, known=(), version=None):
+        self._known = {int(f) for f in known}
+        self.version = version
+
+    def __len__(self):
+        return len(self._known)
+
+    def __contains__(self, fingerprint):
+        return int(fingerprint) in self._known
+
+    def unknown(self, fps):
+        """Bool mask: fingerprint not known and not repeated earlier in fps"""
+        known, batch = self._known, set()
+        mask = np.zeros(len(fps), dtype=bool)
+        for i, f in enumerate(fps.tolist()):
+            if f not in known and f not in batch:
+                batch.add(f)
+                mask[i] = True
+        return mask
+
+    def add(self, fps):
+        self._known.update(int(f) for f in fps)
+
+    def save(self, path, version):
+        """Write the index atomically as covering data version `version`"""
+        self.version = version
+        header = {'format': FINGERPRINT_FORMAT, 'version': version, 'count': len(self._known)}
+        body = np.array(sorted(self._known), dtype='<u8').tobytes()
+        atomic_write(os.path.abspath(path), lambda f: f.write(json.dumps(header).encode() + b'\n' + body),
+                     binary=True)
+
+    @classmethod
+    def load(cls, path, version):
+        """The index saved at path if it covers data version `version`, else None"""
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('format') != FINGERPRINT_FORMAT or header.get('version') != version:
+                    return None
+                known = np.frombuffer(f.read(), dtype='<u8')
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(known) != header.get('count'):
+            return None
+        return cls(known.tolist(), version)
+
+
+def index_for(csv_path='protest_data_oversight.csv', **columns):
+    """
+    Fingerprint index of the current data in csv_path (empty if there is none),
+    rebuilt from the data and saved when missing or stale
+    """
+    try:
+        source, version = data_version(csv_path)
+    except FileNotFoundError:
+        return FingerprintIndex()
+    index = FingerprintIndex.load(fingerprint_path(csv_path), version)
+    if index is None:
+        index = FingerprintIndex(fingerprints(pd.read_csv(source), **columns))
+        try:
+            index.save(fingerprint_path(csv_path), version)
+        except PermissionError:
+            index.version = version
+    return index
+
+
+def append_snapshot(batch, csv_path='protest_data_oversight.csv', **columns):
+    """
+    Append the rows of batch that are not already known to csv_path's current
+    data and write the result as a new snapshot. Returns (manifest entry,
+    number of rows added). Existing rows are never parsed: dedup consults only
+    the fingerprint index, and the new rows are written after a byte copy of
+    the current file (snapshots.write_appended).
+    """
+    index = index_for(csv_path, **columns)
+    fps = fingerprints(batch, **columns)
+    new = index.unknown(fps)
+    entry = write_appended(batch[new], csv_path)
+    index.add(fps[new])
+    index.save(fingerprint_path(csv_path), entry['sha256'])
+    return entry, int(new.sum())
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Rebuild the fingerprint index of a data file')
+    parser.add_argument('path', nargs='?', default='protest_data_oversight.csv', help='Published data file')
+    args = parser.parse_args()
+
+    source, version = data_version(args.path)
+    df = pd.read_csv(source)
+    index = FingerprintIndex(fingerprints(df))
+    index.save(fingerprint_path(args.path), version)
+    print(f"{len(df)} rows, {len(index)} distinct incidents → {fingerprint_path(args.path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Generate large synthetic incident datasets for load testing and benchmarks.
+
+Produces either the raw oversight schema (date,location,category,title,source_url)
+written by the scraper, or the clean schema
+(city,state,date,type,description,source,severity) written by the cleaner.
+
+    python3 generate_synthetic_data.py --rows 1000000 --output synthetic_oversight.csv
+    python3 generate_synthetic_data.py --rows 1000000 --schema clean --output synthetic_clean.csv
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from clean_oversight_data import map_category_to_type, calculate_severity
+
+OVERSIGHT_COLUMNS = ['date', 'location', 'category', 'title', 'source_url']
+CLEAN_COLUMNS = ['city', 'state', 'date', 'type', 'description', 'source', 'severity']
+
+# Most-affected locations first so the Zipf head matches the real dashboard
+BASE_CITIES = [
+    'Chicago, IL', 'Minneapolis, MN', 'Washington, DC', 'Los Angeles, CA',
+    'Portland, OR', 'San Diego, CA', 'New York City, NY', 'St. Paul, MN',
+    'Charlotte, NC', 'Phoenix, AZ', 'Houston, TX', 'San Antonio, TX',
+    'Denver, CO', 'Atlanta, GA', 'Baltimore, MD', 'Boston, MA',
+    'Seattle, WA', 'Miami, FL', 'New Orleans, LA', 'Philadelphia, PA',
+    'Newark, NJ', 'San Francisco, CA', 'Dallas, TX', 'Nashville, TN',
+    'Portland, ME', 'Raleigh, NC', 'Salt Lake City, UT', 'Detroit, MI',
+    'Cincinnati, OH', 'Springfield, IL', 'Springfield, MA', 'Springfield, MO',
+]
+
+TOWN_STEMS = [
+    'Oak', 'Maple', 'River', 'Lake', 'Fair', 'Green', 'Spring', 'Cedar',
+    'Pine', 'Clear', 'Rock', 'Elm', 'Ash', 'Bay', 'Brook', 'Glen',
+]
+TOWN_SUFFIXES = ['dale', 'ville', 'field', 'wood', 'port', 'view', 'ton', ' Heights']
+STATES = [
+    'AL', 'AZ', 'CA', 'CO', 'FL', 'GA', 'IL', 'IN', 'MA', 'MD', 'MI', 'MN',
+    'MO', 'NC', 'NJ', 'NY', 'OH', 'OR', 'PA', 'TN', 'TX', 'UT', 'VA', 'WA',
+]
+
+LABELS = [
+    'Concerning Arrest/Detention',
+    'Concerning Use of Force',
+    'U.S. Citizen',
+    'Enforcement Action at a Sensitive Location',
+    'Concerning Deportation',
+]
+# Relative label frequencies from the real oversight data
+LABEL_WEIGHTS = np.array([333, 201, 140, 63, 17], dtype=float)
+
+TITLE_TEMPLATES = [
+    'ICE agents detain father outside elementary school in {city}',
+    'Federal agents use pepper spray on protesters in {city}',
+    'U.S. citizen held for hours after immigration sweep in {city}',
+    'Family separated after ICE arrest at hospital in {city}',
+    'Man shot by federal agents during raid in {city}',
+    'Asylum seeker detained at courthouse in {city}',
+    'Tear gas fired at crowd outside ICE facility in {city}',
+    'Teen deported days after arrest at work site in {city}',
+]
+OUTLETS = [
+    'CBS News', 'The New York Times(opens in a new tab)', 'Associated Press',
+    'Los Angeles Times(opens in a new tab)', 'NBC News', 'The Guardian',
+]
+
+
+def build_city_pool(n_cities):
+    """Return n_cities 'City, ST' strings, real cities first then synthetic towns"""
+    cities = list(BASE_CITIES[:n_cities])
+    i = 0
+    while len(cities) < n_cities:
+        stem = TOWN_STEMS[i % len(TOWN_STEMS)]
+        suffix = TOWN_SUFFIXES[(i // len(TOWN_STEMS)) % len(TOWN_SUFFIXES)]
+        state = STATES[i % len(STATES)]
+        block = i // (len(TOWN_STEMS) * len(TOWN_SUFFIXES))
+        name = f"{stem}{suffix}" + (f" {block + 1}" if block else '')
+        cities.append(f"{name}, {state}")
+        i += 1
+    return cities
+
+
+def zipf_weights(n, s):
+    """Normalized Zipf-like probabilities for ranks 1..n"""
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def build_category_pool():
+    """All single and two-label category strings with their sampling weights"""
+    p = LABEL_WEIGHTS / LABEL_WEIGHTS.sum()
+    singles = list(LABELS)
+    pairs, pair_weights = [], []
+    for i in range(len(LABELS)):
+        for j in range(i + 1, len(LABELS)):
+            pairs.append(f"{LABELS[i]}, {LABELS[j]}")
+            pair_weights.append(p[i] * p[j])
+    pair_weights = np.array(pair_weights)
+    # About 30% of real incidents carry two labels
+    weights = np.concatenate([p * 0.7, pair_weights / pair_weights.sum() * 0.3])
+    return singles + pairs, weights
+
+
+def generate_chunks(rows, schema='oversight', chunk_size=100_000, seed=0,
+                    cities=500, zipf_s=1.1, start='2025-06-01', end='2026-01-31',
+                    unknown_rate=0.05, misaligned_rate=0.02, duplicate_rate=0.03):
+    """
+    Yield DataFrame chunks of synthetic incidents totalling `rows` rows.
+
+    Work is vectorized per chunk: only the final string assembly touches
+    individual rows, so millions of rows stream out in seconds.
+    """
+    if schema not in ('oversight', 'clean'):
+        raise ValueError(f"Unknown schema: {schema}")
+
+    rng = np.random.default_rng(seed)
+    city_pool = np.array(build_city_pool(cities), dtype=object)
+    city_p = zipf_weights(len(city_pool), zipf_s)
+    city_names = np.array([c.split(',')[0].strip() for c in city_pool], dtype=object)
+    city_states = np.array([c.split(',')[1].strip() for c in city_pool], dtype=object)
+
+    categories, category_p = build_category_pool()
+    categories = np.array(categories, dtype=object)
+
+    # Type and severity depend only on (category, template) so compute them once
+    # with the cleaner's own rules instead of per row
+    n_templates = len(TITLE_TEMPLATES)
+    types = np.array([map_category_to_type(c) for c in categories], dtype=object)
+    severity = np.array([
+        [calculate_severity(c, t) for t in TITLE_TEMPLATES] for c in categories
+    ], dtype=np.int8)
+
+    # Format each calendar day and each template/city headline once, then index
+    date_fmt = '%m/%d/%Y' if schema == 'oversight' else '%Y-%m-%d'
+    day_strings = np.array(pd.date_range(start, end, freq='D').strftime(date_fmt), dtype=object)
+    if len(day_strings) == 0:
+        raise ValueError(f"Empty date range: {start} to {end}")
+    headlines = np.array([
+        [t.format(city=name) for name in city_names] for t in TITLE_TEMPLATES
+    ], dtype=object)
+
+    written = 0
+    while written < rows:
+        n = min(chunk_size, rows - written)
+        ids = np.arange(written, written + n)
+
+        city_idx = rng.choice(len(city_pool), size=n, p=city_p)
+        cat_idx = rng.choice(len(categories), size=n, p=category_p)
+        tmpl_idx = rng.integers(0, n_templates, size=n)
+        outlet_idx = rng.integers(0, len(OUTLETS), size=n)
+
+        dates = day_strings[rng.integers(0, len(day_strings), size=n)]
+        dates[rng.random(n) < unknown_rate] = 'Unknown'
+
+        # Near duplicates: same story as an earlier row in the chunk, different outlet
+        dup = rng.random(n) < duplicate_rate
+        dup[0] = False
+        dup_src = np.where(dup, rng.integers(0, np.maximum(np.arange(n), 1)), np.arange(n))
+        story = ids[dup_src]
+        city_idx = city_idx[dup_src]
+        cat_idx = cat_idx[dup_src]
+        tmpl_idx = tmpl_idx[dup_src]
+        dates = dates[dup_src]
+
+        story = story.tolist()
+        outlet_idx = outlet_idx.tolist()
+        titles = [
+            f"{h} ({s}) - {OUTLETS[o]}"
+            for h, s, o in zip(headlines[tmpl_idx, city_idx].tolist(), story, outlet_idx)
+        ]
+        # Odd outlets append tracking junk, as in the real scraped URLs
+        urls = [f"https://news.example.com/story/{s}?teaserSource=trending" if o % 2 else
+                f"https://news.example.com/story/{s}"
+                for s, o in zip(story, outlet_idx)]
+
+        if schema == 'oversight':
+            chunk = pd.DataFrame({
+                'date': dates,
+                'location': city_pool[city_idx],
+                'category': categories[cat_idx],
+                'title': titles,
+                'source_url': urls,
+            }, columns=OVERSIGHT_COLUMNS)
+
+            # Misaligned rows as the dashboard emits them: category in the date
+            # column, 'Unknown' in location, location in the category column
+            bad = rng.random(n) < misaligned_rate
+            if bad.any():
+                chunk.loc[bad, 'date'] = categories[cat_idx[bad]]
+                chunk.loc[bad, 'category'] = city_pool[city_idx[bad]]
+                chunk.loc[bad, 'location'] = 'Unknown'
+        else:
+            chunk = pd.DataFrame({
+                'city': city_names[city_idx],
+                'state': city_states[city_idx],
+                'date': dates,
+                'type': types[cat_idx],
+                'description': titles,
+                'source': urls,
+                'severity': severity[cat_idx, tmpl_idx],
+            }, columns=CLEAN_COLUMNS)
+
+        written += n
+        yield chunk
+
+
+def generate_incidents(rows, **kwargs):
+    """Generate `rows` synthetic incidents as a single DataFrame"""
+    chunks = list(generate_chunks(rows, **kwargs))
+    if not chunks:
+        schema = kwargs.get('schema', 'oversight')
+        return pd.DataFrame(columns=OVERSIGHT_COLUMNS if schema == 'oversight' else CLEAN_COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_incidents(path, rows, **kwargs):
+    """Stream synthetic incidents to a CSV file chunk by chunk; returns rows written"""
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(generate_chunks(rows, **kwargs)):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic incident data for load testing')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of incidents to generate')
+    parser.add_argument('--schema', choices=['oversight', 'clean'], default='oversight')
+    parser.add_argument('--output', default='protest_data_synthetic.csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cities', type=int, default=500, help='Number of distinct locations')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for city popularity')
+    parser.add_argument('--start', default='2025-06-01', help='First incident date (YYYY-MM-DD)')
+    parser.add_argument('--end', default='2026-01-31', help='Last incident date (YYYY-MM-DD)')
+    parser.add_argument('--unknown-rate', type=float, default=0.05, help='Fraction of Unknown dates')
+    parser.add_argument('--misaligned-rate', type=float, default=0.02,
+                        help='Fraction of misaligned rows (oversight schema only)')
+    parser.add_argument('--duplicate-rate', type=float, default=0.03,
+                        help='Fraction of near-duplicate stories')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"🧪 Generating {args.rows:,} synthetic incidents ({args.schema} schema)...")
+    started = time.perf_counter()
+    written = write_incidents(
+        args.output, args.rows,
+        schema=args.schema, chunk_size=args.chunk_size, seed=args.seed,
+        cities=args.cities, zipf_s=args.zipf, start=args.start, end=args.end,
+        unknown_rate=args.unknown_rate, misaligned_rate=args.misaligned_rate,
+        duplicate_rate=args.duplicate_rate,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {written:,} incidents to {args.output} "
+          f"in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
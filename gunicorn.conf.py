@@ -0,0 +1,65 @@
+"""
+gunicorn settings: preload the dataset once in the master, then fork workers
+
+The master imports the app via app:create_app(), which loads, indexes and
+warms (warmup.py) the incidents file before any worker exists. Workers inherit it through fork and
+share its pages copy-on-write instead of each parsing the CSV. gc.freeze()
+moves everything loaded so far out of the collector's reach, so worker garbage
+collections don't write to (and un-share) those pages.
+
+When the served data changes the master reloads it and gracefully replaces
+the workers (a SIGHUP reload), so every worker switches to the new data
+together. Old workers keep serving the previous data until the new ones are up.
+
+The master itself stays single-threaded, since it forks workers (a thread
+holding a lock at fork time would leave it held forever in the child). Watching
+the data (data_path() re-resolved, snapshots.data_version compared) and, with
+REFRESH_INTERVAL set, the scrape -> clean -> ingest pipeline run in a separate
+`refresh.py --reload-pid` process, which sends the master SIGHUP on a change.
+
+    gunicorn                      # picks up this file from the working directory
+    kill -HUP <master pid>        # force a data reload + worker rollover
+
+Environment:
+    WEB_CONCURRENCY      worker processes (default 2)
+    DATA_WATCH_INTERVAL  seconds between data file checks (default 30, 0 = never)
+    REFRESH_INTERVAL     seconds between scrape/clean runs (default 0 = never)
+"""
+import gc
+import os
+import subprocess
+import sys
+
+wsgi_app = 'app:create_app()'
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+DATA_WATCH_INTERVAL = float(os.environ.get('DATA_WATCH_INTERVAL', '30'))
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', '0'))
+REFRESH_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'refresh.py')
+
+
+def when_ready(server):
+    gc.freeze()
+    # Kept on the arbiter: gunicorn re-executes this file (new globals) on reload
+    if DATA_WATCH_INTERVAL > 0 or REFRESH_INTERVAL > 0:
+        server.refresh_process = subprocess.Popen([
+            sys.executable, REFRESH_SCRIPT, '--reload-pid', str(server.pid),
+            '--watch', str(DATA_WATCH_INTERVAL), '--interval', str(REFRESH_INTERVAL),
+        ])
+
+
+def on_reload(server):
+    # Runs in the master before new workers are spawned; they fork from this data
+    import warmup
+    try:
+        warmup.warm_up()
+    except Exception as e:
+        server.log.error(f"Data reload failed, keeping previous dataset: {e}")
+    gc.freeze()
+
+
+def on_exit(server):
+    process = getattr(server, 'refresh_process', None)
+    if process is not None:
+        process.terminate()
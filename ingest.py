@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+One unified incident dataset from every data source
+
+Incidents live in three files with two schemas:
+
+  protest_data_oversight.csv   scraper      date (MM/DD/YYYY), location, category, title, source_url
+  protest_data_clean.csv       cleaner      city, state, date (ISO), type, description, source, severity
+  protest_data.csv             seed_data    same as the cleaner's
+
+ingest() maps every source to one canonical schema (COLUMNS, ISO dates),
+sorts each by date (newest first, Unknown last) and merges the sorted sources
+with a streaming k-way merge (heapq.merge) into protest_data_unified.csv. Every
+entry point reads that file once it exists (snapshots.data_path). Each row
+names the source it came from in `provenance`. The file is generated, not
+checked in.
+
+The same incident is usually in several sources. A row is dropped when its
+fingerprint (fingerprints.py: canonical URL, location, date) is already known,
+or when it is undated and its URL and location are already known with a date.
+On ties the source listed first in SOURCES wins. Outlets also report one event
+under slightly different headlines and URLs, so the remaining new rows then go
+through near_duplicates.py: the earliest report of each cluster is kept, and
+rows close to an already unified row are dropped.
+
+The unified file's fingerprints and MinHash signatures are kept beside it, and
+the version of each source it covers in protest_data_unified.sources.json. A
+run maps only the sources that changed and appends their new rows (newest
+first among themselves) with snapshots.write_appended: existing rows are
+copied through, never re-mapped or re-deduplicated, so adding a source costs
+the size of that source, and the new version records the one it extends, so
+readers (decay.py, rollups.py) process just the added rows. A full build
+writes every row in date order.
+
+    python3 ingest.py           # ingest sources that changed
+    python3 ingest.py --full    # rebuild from every source
+"""
+import heapq
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from clean_oversight_data import calculate_severity, map_category_to_type, parse_location
+from fingerprints import FingerprintIndex, fingerprint_path, fingerprints
+from near_duplicates import SignatureIndex, dedupe_frame, signature_path
+from snapshots import (UNIFIED_PATH, atomic_write, current_snapshot, data_version, write_appended,
+                       write_snapshot_rows)
+
+COLUMNS = ['date', 'location', 'category', 'title', 'source_url',
+           'city', 'state', 'type', 'severity', 'provenance']
+UNKNOWN_DATE = 'Unknown'
+
+# Category labels for the incident types of the cleaner/seed schema
+TYPE_CATEGORIES = {
+    'POLICE_VIOLENCE': 'Concerning Use of Force',
+    'CONSTITUTIONAL_VIOLATION': 'U.S. Citizen',
+    'ICE_OPERATION': 'Concerning Arrest/Detention',
+    'ICE_RAID': 'Concerning Arrest/Detention',
+    'PRESS_FREEDOM': 'Press Freedom',
+}
+
+# Columns near-duplicates are compared on (near_duplicates.py)
+NEAR_DUPLICATE_COLUMNS = {'title': 'title', 'location': 'location', 'date': 'date'}
+
+# Scraped rows whose date cell holds the category (see clean_oversight_data.py)
+_MISALIGNED = r'Concerning|Enforcement Action|U\.S\. Citizen'
+
+
+def _iso_dates(dates, format='mixed'):
+    parsed = pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce', format=format)
+    return parsed.dt.strftime('%Y-%m-%d').fillna(UNKNOWN_DATE).to_numpy(dtype=object)
+
+
+def _strings(values):
+    """Stripped strings, None where missing or blank"""
+    values = pd.Series(values, dtype=object)
+    stripped = values.where(values.notna(), '').astype(str).str.strip()
+    return stripped.where(stripped != '', None)
+
+
+def _locations(city, state):
+    """'City, ST' (or just the city without a state); None without a real city"""
+    city, state = _strings(city), _strings(state)
+    known = city.notna() & (city != 'Unknown') & ~city.fillna('').str.contains(_MISALIGNED, regex=True)
+    state = state.where(state != 'XX', None)
+    location = (city + ', ' + state).where(state.notna(), city)
+    return location.where(known, None).to_numpy(dtype=object), city.where(known, None).to_numpy(dtype=object)
+
+
+def from_oversight(df):
+    """Canonical rows for the scraper's schema, fixing misaligned rows as the cleaner does"""
+    raw_date = _strings(df['date']).fillna('')
+    misaligned = raw_date.str.contains(_MISALIGNED, regex=True).to_numpy()
+    category = _strings(df['category']).where(~misaligned, raw_date)
+    location = _strings(df['location']).where(~misaligned, _strings(df['category']))
+    title = _strings(df['title']).fillna('')
+
+    # Row-wise helpers from the cleaner, once per distinct value where possible
+    places = {value: parse_location(value) for value in pd.unique(location.fillna('Unknown'))}
+    city_state = [places[value] for value in location.fillna('Unknown')]
+    state = [state for _, state in city_state]
+    location, city = _locations([city for city, _ in city_state], state)
+    types = {value: map_category_to_type(value) for value in pd.unique(category.fillna(''))}
+    return pd.DataFrame({
+        'date': _iso_dates(raw_date.where(~misaligned, UNKNOWN_DATE), '%m/%d/%Y'),
+        'location': location,
+        'category': category.to_numpy(dtype=object),
+        'title': title.to_numpy(dtype=object),
+        'source_url': _strings(df['source_url']).to_numpy(dtype=object) if 'source_url' in df else None,
+        'city': city,
+        'state': _strings(state).to_numpy(dtype=object),
+        'type': [types[value] for value in category.fillna('')],
+        'severity': [calculate_severity(c, t) for c, t in zip(category.fillna(''), title)],
+    })
+
+
+def from_table(df):
+    """Canonical rows for the cleaner's/seed schema (city, state, type, description, severity)"""
+    location, city = _locations(df['city'], df['state'])
+    state = _strings(df['state'])
+    incident_type = _strings(df['type'])
+    return pd.DataFrame({
+        'date': _iso_dates(df['date']),
+        'location': location,
+        'category': incident_type.map(lambda t: TYPE_CATEGORIES.get(t, t)).to_numpy(dtype=object),
+        'title': _strings(df['description']).fillna('').to_numpy(dtype=object),
+        'source_url': _strings(df['source']).to_numpy(dtype=object) if 'source' in df else None,
+        'city': city,
+        'state': state.to_numpy(dtype=object),
+        'type': incident_type.to_numpy(dtype=object),
+        'severity': pd.to_numeric(df['severity'], errors='coerce').astype('Int64').to_numpy(dtype=object),
+    })
+
+
+Source = namedtuple('Source', 'name path mapper')
+
+# In priority order: the first source's copy of an incident is the one kept
+SOURCES = (
+    Source('oversight', 'protest_data_oversight.csv', from_oversight),
+    Source('clean', 'protest_data_clean.csv', from_table),
+    Source('seed', 'protest_data.csv', from_table),
+)
+
+
+def _merge_key(row):
+    """Sort key: ISO date, Unknown ('') after every date when merging in reverse"""
+    return row['date'] if row['date'] != UNKNOWN_DATE else ''
+
+
+def source_rows(name, frame):
+    """
+    Row dicts of a canonical frame sorted newest first, tagged with provenance
+    and carrying their fingerprints for the merge (not written out)
+    """
+    frame = frame.assign(provenance=name)
+    frame = frame.astype(object).where(frame.notna(), None)
+    frame['_fingerprint'] = fingerprints(frame)
+    frame['_undated'] = fingerprints(frame, date=None)
+    keys = frame['date'].where(frame['date'] != UNKNOWN_DATE, '').reset_index(drop=True)
+    frame = frame.iloc[keys.sort_values(ascending=False, kind='stable').index]
+    yield from frame.to_dict('records')
+
+
+def _dedupe(rows, index):
+    """Drop source rows already in index, adding the others' fingerprints to it"""
+    for row in rows:
+        fingerprint = row['_fingerprint']
+        if fingerprint in index or (row['date'] == UNKNOWN_DATE and row['_undated'] in index):
+            continue
+        index.add((fingerprint, row['_undated']))
+        yield row
+
+
+def _near_dedupe(rows, known):
+    """
+    (rows that are not near-duplicates, their SignatureIndex): the first of
+    each cluster among rows (the earliest dated report) is kept, and rows
+    matching one of the known (already unified) rows are dropped. Order is kept.
+    """
+    frame = pd.DataFrame({column: [row[column] for row in rows] for column in NEAR_DUPLICATE_COLUMNS.values()})
+    frame, _ = dedupe_frame(frame, **NEAR_DUPLICATE_COLUMNS)
+    batch, positions = SignatureIndex.from_frame(frame, **NEAR_DUPLICATE_COLUMNS)
+    seen = np.zeros(len(frame), dtype=bool)
+    hits = known.matches(batch)
+    seen[positions[hits]] = True
+    return [rows[i] for i in frame.index[~seen]], batch.take(~hits)
+
+
+def unified_fingerprints(df):
+    """Dated and undated fingerprints of every row of a canonical frame"""
+    return list(fingerprints(df)) + list(fingerprints(df, date=None))
+
+
+def sources_path(unified_path):
+    return os.path.splitext(unified_path)[0] + '.sources.json'
+
+
+def _covered_sources(unified_path, version):
+    """{source name: version} the unified file at `version` was built from ({} if unknown)"""
+    try:
+        with open(sources_path(unified_path)) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return state.get('sources', {}) if state.get('version') == version else {}
+
+
+def ingest(full=False, sources=SOURCES, unified_path=UNIFIED_PATH):
+    """
+    Bring unified_path up to date with the sources. Returns (snapshot manifest
+    entry, {source name: rows added}); the entry is None when no source changed.
+    """
+    try:
+        unified_source, unified_version = data_version(unified_path)
+    except FileNotFoundError:
+        unified_source = unified_version = None
+    rebuild = full or unified_version is None
+    covered = {} if rebuild else _covered_sources(unified_path, unified_version)
+
+    versions, changed = {}, []
+    for source in sources:
+        try:
+            path, version = data_version(source.path)
+        except FileNotFoundError:
+            continue
+        versions[source.name] = version
+        if covered.get(source.name) != version:
+            changed.append((source, path))
+    if not changed and not rebuild:
+        return None, {}
+
+    if rebuild:
+        index, known = FingerprintIndex(), SignatureIndex()
+    else:
+        index = FingerprintIndex.load(fingerprint_path(unified_path), unified_version)
+        known = SignatureIndex.load(signature_path(unified_path), unified_version)
+        if index is None or known is None:
+            unified = pd.read_csv(unified_source)
+            if index is None:
+                index = FingerprintIndex(unified_fingerprints(unified))
+            if known is None:
+                known, _ = SignatureIndex.from_frame(unified, **NEAR_DUPLICATE_COLUMNS)
+    streams = [source_rows(source.name, source.mapper(pd.read_csv(path))) for source, path in changed]
+
+    # New rows: exact duplicates dropped as they stream past, then near-duplicates
+    # within them and of the unified rows
+    new_rows = list(_dedupe(heapq.merge(*streams, key=_merge_key, reverse=True), index))
+    new_rows, batch = _near_dedupe(new_rows, known)
+    added = {}
+    for row in new_rows:
+        added[row['provenance']] = added.get(row['provenance'], 0) + 1
+
+    if rebuild:
+        entry = write_snapshot_rows(new_rows, COLUMNS, unified_path)
+    elif new_rows or current_snapshot(unified_path) is None:
+        entry = write_appended(pd.DataFrame(new_rows, columns=COLUMNS, dtype=object), unified_path)
+    else:
+        # Nothing new: the current version stays, only the covered sources change
+        entry = current_snapshot(unified_path)
+    index.save(fingerprint_path(unified_path), entry['sha256'])
+    known.add(batch)
+    known.save(signature_path(unified_path), entry['sha256'])
+    state = {'version': entry['sha256'], 'sources': versions}
+    atomic_write(os.path.abspath(sources_path(unified_path)), lambda f: json.dump(state, f, indent=2))
+    return entry, added
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Merge every incident source into the unified dataset')
+    parser.add_argument('--full', action='store_true', help='Rebuild from every source')
+    args = parser.parse_args()
+
+    entry, added = ingest(full=args.full)
+    if entry is None:
+        print(f"✅ {UNIFIED_PATH} is up to date")
+        return
+    summary = ', '.join(f"{name} +{n}" for name, n in added.items()) or 'no new rows'
+    print(f"✅ Saved {entry['rows']} incidents to {UNIFIED_PATH} ({summary}; version {entry['version']})")
+
+    # Prebuilt lookup index for protest_checker.py
+    from cli_index import write_index
+    write_index(UNIFIED_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Keyset-paginated incident listing
+
+Incidents are listed newest first (Unknown dates last). Ties on a day are
+broken by a 64-bit id hashed from the row's text, so every incident has a
+position in the order that does not depend on where it sits in the file. A
+page cursor is that position - (day, id) of the last incident returned - and
+the next page starts right after it:
+
+  - rows are grouped by location, each group in listing order, so seeking to
+    a cursor is a binary search within the group, and a page costs the same
+    however deep the client has paged
+  - several matched locations are K-way merged (heapq) on (day, id)
+  - the cursor names an incident, not a row number, so it keeps working after
+    the data is reloaded with rows added or reordered
+
+The per-dataset order is built on first use and kept as long as the dataset.
+"""
+import base64
+import heapq
+import itertools
+import struct
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import risk_matrix
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+CURSOR_FORMAT = 1
+_CURSOR = struct.Struct('>BqQ')  # format, day, id
+
+
+def encode_cursor(day, incident_id):
+    """Opaque URL-safe cursor for a listing position"""
+    raw = _CURSOR.pack(CURSOR_FORMAT, int(day), int(incident_id))
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    """(day, id) of a cursor from encode_cursor(); ValueError if it is not one"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, day, incident_id = _CURSOR.unpack(raw)
+    except (ValueError, TypeError, struct.error):
+        raise ValueError('Invalid cursor') from None
+    if version != CURSOR_FORMAT:
+        raise ValueError('Invalid cursor')
+    return day, incident_id
+
+
+def incident_ids(dataset):
+    """
+    Stable uint64 id per row: a hash of its text columns; identical rows are
+    told apart by their occurrence number
+    """
+    columns = dataset.string_columns()
+    if not columns or not len(dataset):
+        return np.zeros(len(dataset), dtype=np.uint64)
+    frame = pd.DataFrame({name: dataset.strings(name) for name in columns})
+    ids = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    repeat = pd.Series(ids).groupby(ids).cumcount().to_numpy()
+    if repeat.any():
+        rehashed = pd.util.hash_pandas_object(pd.DataFrame({'id': ids, 'n': repeat}), index=False).to_numpy()
+        ids = np.where(repeat > 0, rehashed, ids)
+    return ids
+
+
+class _Order:
+    """Rows in listing order (-day, id), optionally grouped by location code"""
+
+    def __init__(self, neg_days, ids, groups=None, n_groups=0):
+        keys = (ids, neg_days) if groups is None else (ids, neg_days, groups)
+        self.rows = np.lexsort(keys).astype(np.int64)
+        self.neg_days = neg_days[self.rows]
+        self.ids = ids[self.rows]
+        if groups is None:
+            self.starts = np.array([0, len(self.rows)], dtype=np.int64)
+        else:
+            self.starts = np.searchsorted(groups[self.rows], np.arange(n_groups + 1)).astype(np.int64)
+
+    def seek(self, group, after):
+        """Position in the group's rows just past `after` ((-day, id) or None)"""
+        start, end = self.starts[group], self.starts[group + 1]
+        if after is None:
+            return start, end
+        neg_day, incident_id = after
+        lo = start + np.searchsorted(self.neg_days[start:end], neg_day, 'left')
+        hi = start + np.searchsorted(self.neg_days[start:end], neg_day, 'right')
+        return lo + np.searchsorted(self.ids[lo:hi], incident_id, 'right'), end
+
+
+class IncidentListing:
+    """Listing order of one Dataset's incidents, overall and per location"""
+
+    def __init__(self, dataset):
+        # Only arrays, not the dataset itself, which for_dataset() keys on weakly
+        self.ids = incident_ids(dataset)
+        self.neg_days = -dataset.row_days
+        self.category_codes = dataset.codes('category')
+        self.categories = dataset.values('category')
+        self._all = _Order(self.neg_days, self.ids)
+        location_codes = dataset.codes('location')
+        self._by_location = _Order(self.neg_days, self.ids, location_codes, len(dataset.location_names))
+
+    def _matching(self, category):
+        """Bool per row: category contains the label (risk_matrix rule); None = every row"""
+        if not category:
+            return None
+        per_code = risk_matrix.category_flags(self.categories, [category])[:, 0]
+        return np.append(per_code, False)[self.category_codes]
+
+    @staticmethod
+    def _scan(order, group, after, keep, chunk):
+        """Rows of one group past the cursor, in order, filtered by keep, read chunk by chunk"""
+        position, end = order.seek(group, after)
+        while position < end:
+            rows = order.rows[position:min(position + chunk, end)]
+            yield from (rows if keep is None else rows[keep[rows]]).tolist()
+            position += chunk
+
+    def page(self, location_codes=None, category=None, cursor=None, limit=DEFAULT_LIMIT):
+        """
+        (row ids of the next page, cursor for the page after it or None) for the
+        given locations (every incident if None), optionally limited to categories
+        containing `category`
+        """
+        after = None
+        if cursor:
+            day, incident_id = decode_cursor(cursor)
+            after = (-day, np.uint64(incident_id))
+        keep = self._matching(category)
+        chunk = max(4 * limit, 64)
+        if location_codes is None:
+            streams = [self._scan(self._all, 0, after, keep, chunk)]
+        else:
+            streams = [self._scan(self._by_location, code, after, keep, chunk) for code in location_codes]
+
+        neg_days, ids = self.neg_days, self.ids
+        merged = heapq.merge(*streams, key=lambda row: (neg_days[row], ids[row]))
+        rows = list(itertools.islice(merged, limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        last = rows[limit - 1]
+        return rows[:limit], encode_cursor(-neg_days[last], ids[last])
+
+
+_listings = weakref.WeakKeyDictionary()
+_listings_lock = threading.Lock()
+
+
+def for_dataset(dataset):
+    """The IncidentListing of a Dataset, built on first use and kept as long as the dataset"""
+    listing = _listings.get(dataset)
+    if listing is None:
+        with _listings_lock:
+            listing = _listings.get(dataset)
+            if listing is None:
+                listing = _listings[dataset] = IncidentListing(dataset)
+    return listing
+
+
+def parse_limit(limit):
+    """Page size from a query parameter: DEFAULT_LIMIT if missing, ValueError outside 1..MAX_LIMIT"""
+    if limit is None or limit == '':
+        return DEFAULT_LIMIT
+    limit = int(limit)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_LIMIT}')
+    return limit
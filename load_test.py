@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the web app.
+
+Starts gunicorn locally with gunicorn.conf.py (same command as render.yaml), drives it with
+concurrent asyncio clients using a weighted mix of API requests, and reports
+throughput, latency percentiles and error rates. Runs fully offline.
+
+    python3 load_test.py --duration 30 --concurrency 50 --workers 4
+    python3 load_test.py --data protest_data_synthetic.csv --mix check=5,check_get=3,cities=1,timeline=1
+    python3 load_test.py --url http://127.0.0.1:8000 --requests 5000   # existing server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote, urlsplit
+
+import pandas as pd
+
+import snapshots
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MIX = 'check=4,check_get=4,cities=1,timeline=1'
+FALLBACK_CITIES = ['Chicago', 'Minneapolis', 'Washington', 'Los Angeles', 'Portland']
+
+
+def parse_mix(mix):
+    """Parse 'check=4,cities=1' into {'check': 4.0, 'cities': 1.0}"""
+    weights = {}
+    for part in mix.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    if not weights:
+        raise ValueError("Request mix is empty")
+    return weights
+
+
+def load_city_popularity(csv_path):
+    """
+    City names weighted by incident count, so busy cities are queried most -
+    the same skew real users show. Falls back to a fixed city list, with a
+    warning, when the file is missing, unreadable or has no locations.
+    """
+    try:
+        df = pd.read_csv(csv_path)
+        counts = df['location'].dropna().str.strip().value_counts()
+    except (FileNotFoundError, KeyError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        reason = f"{type(e).__name__}: {e}"
+    else:
+        counts = counts[counts.index != 'Unknown']
+        if not counts.empty:
+            return list(counts.index), list(counts.values.astype(float))
+        reason = 'no known locations'
+    print(f"⚠️  Using fallback cities, could not read popularity from {csv_path} ({reason})",
+          file=sys.stderr)
+    return FALLBACK_CITIES, [1.0] * len(FALLBACK_CITIES)
+
+
+def build_request(endpoint, city):
+    """Return (method, path, body) for one request of the given endpoint type"""
+    if endpoint == 'check':
+        return 'POST', '/api/check', json.dumps({'city': city}).encode()
+    if endpoint == 'check_get':
+        return 'GET', f"/api/check/{quote(city, safe='')}", None
+    if endpoint == 'cities':
+        return 'GET', '/api/cities', None
+    if endpoint == 'timeline':
+        # Mostly city-filtered, sometimes the national timeline
+        if random.random() < 0.2:
+            return 'GET', '/api/timeline', None
+        return 'GET', f"/api/timeline?city={quote(city)}", None
+    raise ValueError(endpoint)
+
+
+ENDPOINTS = ('check', 'check_get', 'cities', 'timeline')
+
+
+class Connection:
+    """Minimal HTTP/1.1 client connection with keep-alive when the server allows it"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   "Connection: keep-alive"]
+        if body is not None:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + (body or b''))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed connection")
+        status = int(status_line.split()[1])
+
+        length, close = None, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value == 'close':
+                close = True
+
+        if length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            close = True
+
+        if close:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+
+async def client_loop(host, port, stop_at, budget, mix, cities, city_weights, results):
+    conn = Connection(host, port)
+    endpoints, weights = list(mix), list(mix.values())
+    try:
+        while time.perf_counter() < stop_at and budget.get('remaining', 1) > 0:
+            if 'remaining' in budget:
+                budget['remaining'] -= 1
+            endpoint = random.choices(endpoints, weights)[0]
+            city = random.choices(cities, city_weights)[0]
+            method, path, body = build_request(endpoint, city)
+
+            started = time.perf_counter()
+            try:
+                status = await conn.request(method, path, body)
+                error = None if 200 <= status < 400 else f"HTTP {status}"
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                await conn.close()
+                error = type(e).__name__
+            results.append((endpoint, time.perf_counter() - started, error))
+    finally:
+        await conn.close()
+
+
+async def run_load(host, port, concurrency, duration, total_requests, mix, cities, city_weights):
+    results = []
+    budget = {'remaining': total_requests} if total_requests else {}
+    stop_at = time.perf_counter() + (duration if duration else float('inf'))
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client_loop(host, port, stop_at, budget, mix, cities, city_weights, results)
+        for _ in range(concurrency)
+    ))
+    return results, time.perf_counter() - started
+
+
+def percentile_summary(latencies):
+    """p50/p95/p99 (milliseconds) of a list of latencies in seconds"""
+    if not latencies:
+        return {'p50': None, 'p95': None, 'p99': None}
+    if len(latencies) == 1:
+        ms = latencies[0] * 1000
+        return {'p50': ms, 'p95': ms, 'p99': ms}
+    q = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50': q[49] * 1000, 'p95': q[94] * 1000, 'p99': q[98] * 1000}
+
+
+def summarize(results, elapsed):
+    """Aggregate raw (endpoint, latency, error) samples into a report dict"""
+    by_endpoint = defaultdict(list)
+    errors = Counter()
+    for endpoint, latency, error in results:
+        by_endpoint[endpoint].append((latency, error))
+        if error:
+            errors[error] += 1
+
+    def block(samples):
+        latencies = [lat for lat, _ in samples]
+        failed = sum(1 for _, err in samples if err)
+        return {
+            'requests': len(samples),
+            'throughput_rps': len(samples) / elapsed if elapsed else 0,
+            'error_rate': failed / len(samples) if samples else 0,
+            **percentile_summary(latencies),
+        }
+
+    report = block([(lat, err) for _, lat, err in results])
+    report['duration_s'] = elapsed
+    report['errors'] = dict(errors)
+    report['endpoints'] = {name: block(samples) for name, samples in sorted(by_endpoint.items())}
+    return report
+
+
+def print_report(report):
+    def fmt(ms):
+        return f"{ms:8.1f}" if ms is not None else "       -"
+
+    print(f"\n{'='*70}")
+    print("LOAD TEST RESULTS")
+    print('='*70)
+    print(f"  Requests:   {report['requests']:,} in {report['duration_s']:.1f}s")
+    print(f"  Throughput: {report['throughput_rps']:,.1f} req/s")
+    print(f"  Errors:     {report['error_rate'] * 100:.2f}%"
+          + (f"  {report['errors']}" if report['errors'] else ''))
+    print(f"\n  {'endpoint':<12}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>9}")
+    rows = list(report['endpoints'].items()) + [('ALL', report)]
+    for name, r in rows:
+        print(f"  {name:<12}{r['requests']:>10,}{r['throughput_rps']:>10.1f}"
+              f"{fmt(r['p50'])} {fmt(r['p95'])} {fmt(r['p99'])}{r['error_rate'] * 100:>8.2f}%")
+    print(f"{'='*70}\n")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(host, port, proc, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start listening on {host}:{port} within {timeout}s")
+
+
+def start_server(port, workers, threads, data_path=None):
+    """
+    Start gunicorn (preloaded app from gunicorn.conf.py) on 127.0.0.1:port. With data_path, the server runs in
+    a scratch directory where that file is the default protest_data_oversight.csv.
+    """
+    cwd = REPO_DIR
+    if data_path:
+        cwd = tempfile.mkdtemp(prefix='loadtest_')
+        os.symlink(os.path.abspath(data_path), os.path.join(cwd, 'protest_data_oversight.csv'))
+
+    cmd = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_DIR, 'gunicorn.conf.py'),
+           '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+           '--threads', str(threads), '--pythonpath', REPO_DIR,
+           '--log-level', 'warning']
+    return subprocess.Popen(cmd, cwd=cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Protest Safety Checker web app')
+    parser.add_argument('--url', help='Target an already running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--data', help='CSV to serve (default: the file the app serves, see snapshots.data_path())')
+    parser.add_argument('--concurrency', type=int, default=20, help='Concurrent client connections')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run (0 = until --requests)')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests')
+    parser.add_argument('--warmup', type=float, default=1, help='Seconds of unmeasured warm-up traffic')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f'Weighted request mix over {", ".join(ENDPOINTS)} (default: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible request order')
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error('Set --duration or --requests')
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    mix = parse_mix(args.mix)
+    # City popularity from the file a server started in REPO_DIR serves (the unified dataset once built)
+    data_path = args.data or snapshots.data_path(directory=REPO_DIR)
+    cities, city_weights = load_city_popularity(data_path)
+
+    proc = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        print(f"🚀 Starting gunicorn on {host}:{port} ({args.workers} workers)...")
+        proc = start_server(port, args.workers, args.threads, args.data)
+
+    try:
+        if proc is not None:
+            wait_for_port(host, port, proc)
+
+        if args.warmup:
+            print(f"🔥 Warming up for {args.warmup:.0f}s...")
+            asyncio.run(run_load(host, port, args.concurrency, args.warmup, 0, mix, cities, city_weights))
+
+        print(f"📈 Running {args.concurrency} clients "
+              f"({f'{args.duration:.0f}s' if args.duration else f'{args.requests} requests'})...")
+        results, elapsed = asyncio.run(run_load(
+            host, port, args.concurrency, args.duration, args.requests, mix, cities, city_weights
+        ))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    report = summarize(results, elapsed)
+    print_report(report)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Location lookup: a query planner over a (city, state) composite index
+
+Locations are "City, ST" strings. We index the normalized full name, the
+normalized city part and the (city, state) pair, each mapping to location
+codes, so a lookup is a few dict probes:
+
+  1. the whole input is a location name                      -> 'exact'
+     or an alias from location_aliases.json ("NYC", "Twin
+     Cities"), mapped to its canonical locations             -> 'alias'
+  2. it ends in a state code or name ("Portland OR",
+     "Portland, Oregon"): the city part through the
+     (city, state) index, else the token rules below over
+     only that state's locations                             -> 'city_state'
+  3. no state: the input is a city name ("Portland")         -> 'city'
+  4. else the token rules of calculator.find_matching_cities
+     over every location: all input words contained, else
+     names starting with the first word                      -> 'tokens'
+
+City names are compared in a variant form: "St"/"St." and "Saint", "Ft" and
+"Fort", "Mt" and "Mount" spell the same word, and a "County"/"Parish" suffix
+is dropped, so "Saint Paul" finds both "St. Paul, MN" and "St Paul, MN".
+
+A state that matches nothing falls through to 3 and 4 with the whole input,
+so city names ending in a state name ("Fort Washington") still resolve. A
+match spanning more than one (city, state) is reported as ambiguous rather
+than silently merged: callers answer it with ambiguous_error(), the candidates
+and their incident counts, and no score.
+
+Standard library only, so cli_index.py can plan from its index file too.
+"""
+import json
+import os
+import threading
+import weakref
+from collections import namedtuple
+
+from scoring import normalize_city_input
+
+US_STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'PR': 'Puerto Rico', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
+    'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+}
+
+# Normalized state code or name -> code
+_STATE_WORDS = {code.lower(): code for code in US_STATES}
+_STATE_WORDS.update((normalize_city_input(name), code) for code, name in US_STATES.items())
+_MAX_STATE_WORDS = max(len(words.split()) for words in _STATE_WORDS)
+
+# City name words with more than one spelling -> the one compared
+VARIANTS = {'st': 'saint', 'ste': 'sainte', 'ft': 'fort', 'mt': 'mount'}
+# Trailing words dropped from city names ("Kenton County" ~ "Kenton")
+COUNTY_WORDS = ('county', 'parish', 'borough')
+
+ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'location_aliases.json')
+
+_aliases_cache = {}
+
+LocationMatch = namedtuple('LocationMatch', ['codes', 'strategy', 'state', 'ambiguous'])
+
+NO_MATCH = LocationMatch([], None, None, False)
+
+
+def split_state(normalized_input):
+    """
+    (city part, state code) of normalized input ending in a state code or name,
+    longest name first ("portland oregon" -> ('portland', 'OR')); (input, None)
+    when it doesn't end in one or nothing would be left of the city
+    """
+    words = normalized_input.split()
+    for n in range(min(_MAX_STATE_WORDS, len(words) - 1), 0, -1):
+        state = _STATE_WORDS.get(' '.join(words[-n:]))
+        if state is not None:
+            return ' '.join(words[:-n]), state
+    return normalized_input, None
+
+
+def variant_key(normalized_city):
+    """Normalized city name in its compared form ("st. paul" -> "saint paul", "kenton county" -> "kenton")"""
+    words = [VARIANTS.get(word.rstrip('.'), word) for word in normalized_city.split()]
+    while len(words) > 1 and words[-1] in COUNTY_WORDS:
+        words.pop()
+    return ' '.join(words)
+
+
+def load_aliases(path=None):
+    """
+    {alias: [canonical "City, ST" names]} from a JSON file of {alias: name or
+    [names]} ($LOCATION_ALIASES, else location_aliases.json; empty if missing).
+    Re-read only when the file changes.
+    """
+    path = path or os.environ.get('LOCATION_ALIASES') or ALIASES_PATH
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _aliases_cache:
+        with open(path) as f:
+            raw = json.load(f)
+        aliases = {alias: [targets] if isinstance(targets, str) else list(targets)
+                   for alias, targets in raw.items()}
+        _aliases_cache.clear()
+        _aliases_cache[key] = aliases
+    return _aliases_cache[key]
+
+
+def location_state(name):
+    """Two-letter state of a "City, ST" location (dataset.location_states() for one name)"""
+    _, comma, rest = name.partition(',')
+    state = rest.strip()[:2].upper()
+    return state if comma and len(state) == 2 and state.isascii() and state.isalpha() else None
+
+
+def token_matches(normalized_input, normalized_names, positions):
+    """
+    The positions whose normalized name matches input by the token rules: every
+    input word contained in the name, else names starting with the first word
+    """
+    parts = normalized_input.split()
+    if not parts:
+        return []
+    contained = [i for i in positions if all(part in normalized_names[i] for part in parts)]
+    if contained:
+        return contained
+    return [i for i in positions if normalized_names[i].startswith(parts[0])]
+
+
+class LocationIndex:
+    """
+    Location codes (positions in a list of location names) by name, alias,
+    city and (city, state). aliases defaults to load_aliases().
+    """
+
+    def __init__(self, names, aliases=None):
+        self.names = list(names)
+        self.normalized = [normalize_city_input(name) for name in self.names]
+        self.cities = [variant_key(normalize_city_input(name.partition(',')[0])) for name in self.names]
+        self.states = [location_state(name) for name in self.names]
+        # Compared form of each whole name, for the token rules
+        self.keys = [f"{city} {normalize_city_input(name.partition(',')[2])}".strip()
+                     for city, name in zip(self.cities, self.names)]
+        self._by_name, self._by_city, self._by_state, self._by_city_state = {}, {}, {}, {}
+        for code, (normalized, city, state) in enumerate(zip(self.normalized, self.cities, self.states)):
+            self._by_name.setdefault(normalized, []).append(code)
+            self._by_city.setdefault(city, []).append(code)
+            if state is not None:
+                self._by_state.setdefault(state, []).append(code)
+                self._by_city_state.setdefault((city, state), []).append(code)
+
+        # Aliases compiled to codes; ones naming no location in the data are left out
+        self.aliases = load_aliases() if aliases is None else aliases
+        self._by_alias = {}
+        for alias, targets in self.aliases.items():
+            codes = sorted({code for target in targets for code in self._canonical(target)})
+            if codes:
+                self._by_alias[variant_key(normalize_city_input(alias))] = codes
+
+    def _canonical(self, name):
+        """Codes of the locations a canonical "City, ST" (or bare city) name denotes"""
+        city = variant_key(normalize_city_input(name.partition(',')[0]))
+        state = location_state(name)
+        if state is None:
+            return self._by_city.get(city, [])
+        return self._by_city_state.get((city, state), [])
+
+    def _match(self, codes, strategy, state=None):
+        places = {(self.cities[code], self.states[code]) for code in codes}
+        return LocationMatch(codes, strategy, state, len(places) > 1)
+
+    def resolve(self, user_input):
+        """LocationMatch of the location codes user input refers to (see module docstring)"""
+        normalized = normalize_city_input(user_input)
+        if not normalized:
+            return NO_MATCH
+        if normalized in self._by_name:
+            # With the other spellings of the same place ("St Paul, MN" ~ "St. Paul, MN")
+            codes = sorted({same for code in self._by_name[normalized]
+                            for same in self._by_city_state.get((self.cities[code], self.states[code]), [code])})
+            return self._match(codes, 'exact')
+        key = variant_key(normalized)
+        if key in self._by_alias:
+            # An alias names its places on purpose: not ambiguous
+            return LocationMatch(self._by_alias[key], 'alias', None, False)
+
+        city, state = split_state(normalized)
+        if state in self._by_state:
+            city = variant_key(city)
+            codes = self._by_city_state.get((city, state)) or \
+                token_matches(city, self.keys, self._by_state[state])
+            if codes:
+                return self._match(codes, 'city_state', state)
+
+        if key in self._by_city:
+            return self._match(self._by_city[key], 'city')
+        codes = token_matches(key, self.keys, range(len(self.names)))
+        return self._match(codes, 'tokens') if codes else NO_MATCH
+
+    def candidates(self, codes, totals):
+        """Distinct location names among codes with their incident totals, most incidents first"""
+        per_name = {}
+        for code in codes:
+            per_name[self.names[code]] = per_name.get(self.names[code], 0) + int(totals[code])
+        return [{'location': name, 'total_incidents': count}
+                for name, count in sorted(per_name.items(), key=lambda item: -item[1])]
+
+
+def ambiguous_error(city_input, candidates):
+    """
+    Error response for input naming several places: the candidates() to pick
+    from (also as suggestions), in place of a score merging them
+    """
+    return {
+        'error': f'"{city_input}" matches several places - add the state to pick one',
+        'ambiguous': True,
+        'search_term': city_input,
+        'candidates': candidates,
+        'suggestions': [candidate['location'] for candidate in candidates],
+    }
+
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def for_dataset(dataset):
+    """
+    The LocationIndex of a Dataset, built on first use and kept as long as the
+    dataset; rebuilt when the alias file changes
+    """
+    aliases = load_aliases()
+    index = _indexes.get(dataset)
+    if index is None or index.aliases is not aliases:
+        with _indexes_lock:
+            index = _indexes.get(dataset)
+            if index is None or index.aliases is not aliases:
+                index = _indexes[dataset] = LocationIndex(dataset.location_names.tolist(), aliases)
+    return index
@@ -0,0 +1,215 @@
+"""
+Request timing and Prometheus-format metrics
+
+Stages are timed with `stage('name')`. Each timing is recorded in a histogram,
+and while a request is being collected (`begin_request` / `end_request`) it is
+also added to that request's per-stage totals for the Server-Timing header.
+
+Metrics live in process memory, so under gunicorn each worker reports its own
+numbers; Prometheus should scrape every worker or sum them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PREFIX = 'protest_checker'
+
+# Seconds; finer at the low end because most stages are sub-millisecond once cached
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_timings = ContextVar('request_timings', default=None)
+_registry = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, either set directly or read from a callback"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        super().__init__(name, help_text, labelnames)
+        self._values = {}
+        self._callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        if self._callback is not None:
+            return [f"{self.name} {_format_value(self._callback())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (seconds)"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series['count'] if series else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, dict(v, counts=list(v['counts']))) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series['counts']):
+                cumulative += n
+                le = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+STAGE_SECONDS = Histogram('stage_duration_seconds', 'Time spent in each stage of request handling', ['stage'])
+REQUEST_SECONDS = Histogram('request_duration_seconds', 'Total request handling time', ['endpoint'])
+REQUESTS = Counter('requests_total', 'Requests handled', ['endpoint', 'status'])
+DATASET_ROWS = Gauge('dataset_rows', 'Rows in the most recently loaded dataset')
+DATASET_CACHE_HITS = Counter('dataset_cache_hits_total', 'Dataset loads served from the in-memory cache')
+DATASET_CACHE_MISSES = Counter('dataset_cache_misses_total', 'Dataset loads that had to read the CSV')
+DATASET_RELOADS = Counter('dataset_reloads_total', 'Times a cached dataset was replaced because its file changed')
+REFRESH_RUNS = Counter('refresh_runs_total', 'Background scrape/clean/index pipeline runs', ['result'])
+REFRESH_LAST_SUCCESS = Gauge('refresh_last_success_timestamp_seconds', 'Unix time of the last successful refresh run')
+WARMUP_SECONDS = Gauge('warmup_duration_seconds', 'Time each startup warm-up step took', ['step'])
+
+
+@contextmanager
+def stage(name):
+    """Time a block as a named stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def begin_request():
+    """Start collecting stage timings for the current request"""
+    _request_timings.set({})
+
+
+def end_request():
+    """Stop collecting and return {stage: seconds} for the current request"""
+    timings = _request_timings.get() or {}
+    _request_timings.set(None)
+    return timings
+
+
+def observe_request(endpoint, status, seconds):
+    """Record a finished request"""
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, status=str(status))
+
+
+def server_timing_header(timings, total=None):
+    """
+    Format stage timings as a Server-Timing header value
+    {'load': 0.0012, 'match': 0.0003} -> 'load;dur=1.2, match;dur=0.3'
+    """
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+
+def render():
+    """All registered metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
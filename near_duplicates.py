@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate incident detection with MinHash and LSH
+
+The same event is often listed several times: one row per outlet ("... - CBS
+News", "... - The New York Times(opens in a new tab)") with slightly different
+headlines. Exact-match dedup misses these and they inflate incident counts.
+
+  1. Titles are normalized (outlet suffix and link text removed, lowercased,
+     punctuation dropped) and cut into overlapping character 5-grams.
+  2. Each distinct normalized title gets a MinHash signature: for every one of
+     NUM_PERM hash functions, the minimum hash over its shingles. Two titles
+     agree on a signature position with probability equal to the Jaccard
+     similarity of their shingle sets.
+  3. LSH banding: signatures are split into BANDS bands; rows sharing a band
+     (and the same location) land in the same bucket and become candidates.
+  4. Candidates are kept when their estimated similarity reaches THRESHOLD,
+     they mention the same numbers and their dates are at most MAX_DAYS apart
+     (or unknown), then joined into clusters. Each cluster keeps one canonical row: the earliest dated report.
+
+Every step is a NumPy pass over rows, shingles or buckets - no pairwise
+comparison of all rows - so the cost grows near-linearly with the data.
+
+A SignatureIndex keeps the signatures of rows already processed (saved
+beside the data file, like the fingerprint index), so a later batch is checked
+against them by probing the same buckets, without re-reading those rows.
+
+    python3 near_duplicates.py protest_data_oversight.csv           # report only
+    python3 near_duplicates.py protest_data_clean.csv --title description --location city state
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16              # 16 bands x 4 rows: pairs above ~0.5 similarity usually collide
+THRESHOLD = 0.6         # minimum estimated Jaccard similarity of title shingles
+MAX_DAYS = 7            # dated reports further apart than this are separate events
+CHUNK_TITLES = 20000    # titles hashed per batch, bounding memory
+SIGNATURE_FORMAT = 1
+
+_OUTLET_SUFFIX = r'\s*\(opens in a new tab\)\s*$'
+_SOURCE_SUFFIX = r'\s+[-–—|]\s+[^-–—|]{1,60}$'
+_NUMBER = re.compile(r'\d+')
+
+
+def normalize_titles(titles):
+    """Titles without outlet attribution, lowercased, alphanumerics and single spaces"""
+    titles = pd.Series(titles, dtype=object).fillna('').astype(str)
+    titles = titles.str.replace(_OUTLET_SUFFIX, '', regex=True, case=False)
+    titles = titles.str.replace(_SOURCE_SUFFIX, '', regex=True)
+    titles = titles.str.lower().str.replace(r'[^0-9a-z]+', ' ', regex=True).str.strip()
+    return titles
+
+
+def _hash_functions(num_perm, seed=1):
+    """(a, b) of num_perm multiply-shift hashes h(x) = (a*x + b) >> 32 on 64-bit words, a odd"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingles(titles, k):
+    """(shingles, starts): every byte k-gram packed into an integer, grouped by title"""
+    encoded = [t.encode('utf-8').ljust(k) for t in titles]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    offsets = np.zeros(len(encoded), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    grams = lengths - k + 1
+    starts = np.zeros(len(grams), dtype=np.int64)
+    np.cumsum(grams[:-1], out=starts[1:])
+    positions = np.repeat(offsets - starts, grams) + np.arange(grams.sum())
+
+    # k <= 8 bytes pack exactly into one uint64, so distinct shingles never collide
+    shingles = np.zeros(len(positions), dtype=np.uint64)
+    for j in range(k):
+        shingles |= buffer[positions + j] << np.uint64(8 * j)
+    return shingles, starts
+
+
+def minhash_signatures(titles, num_perm=NUM_PERM, k=SHINGLE_SIZE, seed=1):
+    """(len(titles) x num_perm) uint32 MinHash signatures of normalized titles (k <= 8)"""
+    a, b = _hash_functions(num_perm, seed)
+    signatures = np.empty((len(titles), num_perm), dtype=np.uint32)
+    for chunk in range(0, len(titles), CHUNK_TITLES):
+        part = titles[chunk:chunk + CHUNK_TITLES]
+        if not len(part):
+            continue
+        shingles, starts = _shingles(part, k)
+        for p in range(num_perm):
+            hashed = (shingles * a[p] + b[p]) >> np.uint64(32)
+            signatures[chunk:chunk + len(part), p] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def _band_keys(signatures, bands):
+    """(n x bands) uint64 key per band, combining that band's signature rows"""
+    rows = signatures.shape[1] // bands
+    keys = np.empty((len(signatures), bands), dtype=np.uint64)
+    for band in range(bands):
+        key = np.full(len(signatures), 14695981039346656037, dtype=np.uint64)
+        for value in signatures[:, band * rows:(band + 1) * rows].T:
+            key = (key ^ value.astype(np.uint64)) * np.uint64(1099511628211)
+        keys[:, band] = key
+    return keys
+
+
+def _components(n, pairs):
+    """Connected component label (smallest member index) for each of n items"""
+    labels = np.arange(n, dtype=np.int64)
+    if not len(pairs):
+        return labels
+    left, right = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        # Pointer jumping: follow labels to their own labels until stable
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _number_keys(titles):
+    """Sorted distinct numbers mentioned in each normalized title"""
+    return [' '.join(sorted(set(_NUMBER.findall(title)))) for title in titles]
+
+
+def find_clusters(titles, locations, days, threshold=THRESHOLD, max_days=MAX_DAYS,
+                  num_perm=NUM_PERM, bands=BANDS):
+    """
+    Cluster label per row: the index of the row kept for its cluster (itself
+    when it has no duplicates). titles are raw titles; locations are integer
+    codes, -1 for rows never clustered; days are days since the epoch, NaN = unknown.
+    """
+    n = len(titles)
+    raw_codes, raw_titles = pd.factorize(pd.Series(titles, dtype=object), sort=False)
+    normalized_codes, unique_titles = pd.factorize(normalize_titles(raw_titles), sort=False)
+    # Rows with no title get their own code, never matching anything
+    title_codes = np.where(raw_codes >= 0, np.append(normalized_codes, -1)[raw_codes], -1)
+    location_codes = np.asarray(locations, dtype=np.int64)
+    days = np.asarray(days, dtype=np.float64)
+
+    blank = np.append(np.asarray(unique_titles, dtype=object) == '', True)
+    eligible = (location_codes >= 0) & ~blank[title_codes]
+    signatures = minhash_signatures(list(unique_titles), num_perm)
+    band_keys = _band_keys(signatures, bands)
+    numbers, _ = pd.factorize(pd.Series(_number_keys(unique_titles), dtype=object))
+
+    rows = np.flatnonzero(eligible)
+    # Unknown dates sort after every known one
+    row_days = np.where(np.isnan(days), np.inf, days)[rows]
+    pairs = []
+    for band in range(bands):
+        keys = band_keys[title_codes[rows], band]
+        order = np.lexsort((rows, row_days, keys, location_codes[rows]))
+        sorted_rows = rows[order]
+        sorted_keys, sorted_locations = keys[order], location_codes[sorted_rows]
+        new_bucket = np.ones(len(sorted_rows), dtype=bool)
+        new_bucket[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_locations[1:] != sorted_locations[:-1])
+        # Each member is compared with the previous row of its bucket by date (a
+        # chain, not all pairs), so rows close in time are always compared
+        members = np.flatnonzero(~new_bucket)
+        pairs.append(sorted_rows[members - 1] * n + sorted_rows[members])
+
+    pairs = np.unique(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.int64)
+    pairs = np.column_stack([pairs // n, pairs % n])
+    if len(pairs):
+        first, second = title_codes[pairs[:, 0]], title_codes[pairs[:, 1]]
+        similarity = np.where(first == second, 1.0,
+                              (signatures[first] == signatures[second]).mean(axis=1))
+        # Titles citing different numbers (counts, ages, dates) are different events
+        same_numbers = numbers[first] == numbers[second]
+        gap = np.abs(days[pairs[:, 0]] - days[pairs[:, 1]])
+        close = np.isnan(gap) | (gap <= max_days)
+        pairs = pairs[(similarity >= threshold) & same_numbers & close]
+
+    components = _components(n, pairs)
+    # Canonical row per component: earliest known date, then file order
+    order = np.lexsort((np.arange(n), np.where(np.isnan(days), np.inf, days), components))
+    sorted_components = components[order]
+    first_in_component = np.ones(n, dtype=bool)
+    first_in_component[1:] = sorted_components[1:] != sorted_components[:-1]
+    canonical = np.empty(n, dtype=np.int64)
+    canonical[components[order[first_in_component]]] = order[first_in_component]
+    return canonical[components]
+
+
+def location_codes(df, columns):
+    """Integer code per row for the combination of location columns (case and
+    whitespace ignored); -1 where any is missing or 'Unknown'"""
+    codes = np.zeros(len(df), dtype=np.int64)
+    missing = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        values = df[column].astype(object).where(df[column].notna(), None)
+        values = pd.Series(values, dtype=object).str.strip().str.lower()
+        missing |= (values.isna() | (values == 'unknown')).to_numpy()
+        column_codes, uniques = pd.factorize(values, sort=False)
+        codes = codes * (len(uniques) + 1) + (column_codes + 1)
+    codes, _ = pd.factorize(codes, sort=False)
+    return np.where(missing, -1, codes)
+
+
+def date_days(dates):
+    """Days since the epoch per date value, NaN for Unknown/unparseable (parses each distinct value once)"""
+    codes, uniques = pd.factorize(pd.Series(dates, dtype=object), sort=False)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce', format='mixed')
+    unique_days = (parsed - pd.Timestamp('1970-01-01')).dt.days.to_numpy(dtype=np.float64)
+    return np.where(codes >= 0, np.append(unique_days, np.nan)[codes], np.nan)
+
+
+def cluster_frame(df, title='title', location=('location',), date='date', **options):
+    """find_clusters() for a DataFrame's title, location column(s) and date columns"""
+    location = [location] if isinstance(location, str) else list(location)
+    return find_clusters(df[title].to_numpy(dtype=object), location_codes(df, location),
+                         date_days(df[date]), **options)
+
+
+def dedupe_frame(df, title='title', location=('location',), date='date', **options):
+    """
+    (df with one canonical row per near-duplicate cluster, number of rows removed).
+    location names the column(s) that must match; rows missing any of them, or
+    whose location is 'Unknown', are never merged. Row order is preserved.
+    """
+    if not len(df):
+        return df, 0
+    canonical = cluster_frame(df, title, location, date, **options)
+    keep = canonical == np.arange(len(df))
+    return df[keep], int(len(df) - keep.sum())
+
+
+def _stable_hashes(values):
+    """uint64 hash per string that is the same in every process (unlike hash())"""
+    import hashlib
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=False)
+    hashed = np.array([int.from_bytes(hashlib.blake2b(str(v).encode('utf-8'), digest_size=8).digest(), 'little')
+                       for v in uniques], dtype=np.uint64)
+    return hashed[codes]
+
+
+def signature_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.signatures'
+
+
+class SignatureIndex:
+    """
+    MinHash signatures of known rows with the location, numbers and day each
+    was compared on, saved beside a data file (protest_data_clean.signatures)
+    so a new batch can be checked for near-duplicates of rows seen in earlier
+    runs without re-reading them: a new row is only compared with the known
+    rows sharing one of its LSH buckets. Only rows that can be clustered
+    (a title and a known location) are kept.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, version=None):
+        self.locations = np.zeros(0, dtype=np.uint64)   # hash of the normalized location column(s)
+        self.numbers = np.zeros(0, dtype=np.uint64)     # hash of the numbers the title mentions
+        self.days = np.zeros(0, dtype=np.float64)       # days since the epoch, NaN = unknown
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self.version = version
+
+    def __len__(self):
+        return len(self.locations)
+
+    @classmethod
+    def from_frame(cls, df, title='title', location=('location',), date='date', num_perm=NUM_PERM):
+        """(index of df's clusterable rows, their positions in df)"""
+        location = [location] if isinstance(location, str) else list(location)
+        titles = normalize_titles(df[title].to_numpy(dtype=object)).to_numpy(dtype=object)
+        missing = titles == ''
+        keys = np.full(len(df), '', dtype=object)
+        for column in location:
+            values = pd.Series(df[column].to_numpy(dtype=object), dtype=object)
+            values = values.where(values.notna(), None).str.strip().str.lower()
+            missing |= (values.isna() | (values == 'unknown')).to_numpy()
+            keys = keys + '\x1f' + values.fillna('').to_numpy(dtype=object)
+        rows = np.flatnonzero(~missing)
+
+        index = cls(num_perm)
+        codes, unique_titles = pd.factorize(pd.Series(titles[rows], dtype=object), sort=False)
+        index.signatures = minhash_signatures(list(unique_titles), num_perm)[codes]
+        index.numbers = _stable_hashes(np.array(_number_keys(unique_titles), dtype=object)[codes])
+        index.locations = _stable_hashes(keys[rows])
+        index.days = date_days(df[date].to_numpy(dtype=object)[rows])
+        return index, rows
+
+    def add(self, other):
+        """Add another index's rows"""
+        self.locations = np.concatenate([self.locations, other.locations])
+        self.numbers = np.concatenate([self.numbers, other.numbers])
+        self.days = np.concatenate([self.days, other.days])
+        self.signatures = np.vstack([self.signatures, other.signatures])
+
+    def take(self, rows):
+        """Index of only the given rows (positions or bool mask)"""
+        index = SignatureIndex(self.signatures.shape[1], self.version)
+        index.locations, index.numbers = self.locations[rows], self.numbers[rows]
+        index.days, index.signatures = self.days[rows], self.signatures[rows]
+        return index
+
+    def _bucket_keys(self, bands):
+        """
+        (rows x bands) band keys combined with the location and numbers, which
+        must match anyway: equal keys share a bucket
+        """
+        keys = (_band_keys(self.signatures, bands) ^ self.locations[:, None]) * np.uint64(1099511628211)
+        return (keys ^ self.numbers[:, None]) * np.uint64(1099511628211)
+
+    def matches(self, other, threshold=THRESHOLD, max_days=MAX_DAYS, bands=BANDS):
+        """Bool mask over other's rows: near-duplicate of a row of this index (same rules as find_clusters)"""
+        found = np.zeros(len(other), dtype=bool)
+        if not len(self) or not len(other):
+            return found
+        known_keys, new_keys = self._bucket_keys(bands), other._bucket_keys(bands)
+        pairs = []
+        for band in range(bands):
+            order = np.argsort(known_keys[:, band], kind='stable')
+            sorted_keys = known_keys[order, band]
+            low = np.searchsorted(sorted_keys, new_keys[:, band], 'left')
+            counts = np.searchsorted(sorted_keys, new_keys[:, band], 'right') - low
+            # Every known row in each new row's bucket
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            known = order[np.repeat(low, counts) + offsets]
+            pairs.append(known * len(other) + np.repeat(np.arange(len(other)), counts))
+        pairs = np.unique(np.concatenate(pairs))
+        known, new = pairs // len(other), pairs % len(other)
+
+        similarity = (self.signatures[known] == other.signatures[new]).mean(axis=1)
+        gap = np.abs(self.days[known] - other.days[new])
+        close = np.isnan(gap) | (gap <= max_days)
+        hit = (similarity >= threshold) & (self.numbers[known] == other.numbers[new]) & close
+        found[new[hit]] = True
+        return found
+
+    def save(self, path, version):
+        """Write the index atomically as covering data version `version`"""
+        from snapshots import atomic_write
+        self.version = version
+        header = {'format': SIGNATURE_FORMAT, 'version': version, 'count': len(self),
+                  'num_perm': self.signatures.shape[1]}
+        body = b''.join([self.locations.astype('<u8').tobytes(), self.numbers.astype('<u8').tobytes(),
+                         self.days.astype('<f8').tobytes(), self.signatures.astype('<u4').tobytes()])
+        atomic_write(os.path.abspath(path), lambda f: f.write(json.dumps(header).encode() + b'\n' + body),
+                     binary=True)
+
+    @classmethod
+    def load(cls, path, version):
+        """The index saved at path if it covers data version `version`, else None"""
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('format') != SIGNATURE_FORMAT or header.get('version') != version:
+                    return None
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        n, num_perm = header.get('count', -1), header.get('num_perm', 0)
+        if n < 0 or len(body) != n * (24 + 4 * num_perm):
+            return None
+        index = cls(num_perm, version)
+        index.locations = np.frombuffer(body, '<u8', n, 0).astype(np.uint64)
+        index.numbers = np.frombuffer(body, '<u8', n, 8 * n).astype(np.uint64)
+        index.days = np.frombuffer(body, '<f8', n, 16 * n).astype(np.float64)
+        index.signatures = np.frombuffer(body, '<u4', n * num_perm, 24 * n).astype(np.uint32).reshape(n, num_perm)
+        return index
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Report near-duplicate incidents in a CSV')
+    parser.add_argument('path', help='Incidents CSV')
+    parser.add_argument('--title', default='title', help='Title column (default: title)')
+    parser.add_argument('--location', nargs='+', default=['location'], help='Location column(s)')
+    parser.add_argument('--date', default='date', help='Date column (default: date)')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='Minimum title similarity')
+    parser.add_argument('--examples', type=int, default=5, help='Clusters to print')
+    args = parser.parse_args()
+
+    from snapshots import current_path
+    df = pd.read_csv(current_path(args.path))
+    deduped, removed = dedupe_frame(df, args.title, args.location, args.date, threshold=args.threshold)
+    print(f"{len(df)} rows, {removed} near-duplicates, {len(deduped)} after dedup")
+
+    if args.examples:
+        canonical = cluster_frame(df, args.title, args.location, args.date, threshold=args.threshold)
+        shown = 0
+        for label in pd.unique(canonical[canonical != np.arange(len(df))]):
+            print(f"\n  {df[args.title].iat[label]}")
+            for i in np.flatnonzero(canonical == label):
+                if i != label:
+                    print(f"    = {df[args.title].iat[i]}")
+            shown += 1
+            if shown >= args.examples:
+                break
+
+
+if __name__ == "__main__":
+    main()
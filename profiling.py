@@ -0,0 +1,160 @@
+"""
+On-demand profiling for web requests and CLI runs
+
+Each profiled run writes two files to PROFILE_DIR:
+  <name>.pstats     - cProfile output (python -m pstats, snakeviz, ...)
+  <name>.collapsed  - sampled stacks in collapsed format (flamegraph.pl, speedscope)
+
+Enable with environment variables:
+  PROFILE=1              profile every request / CLI run
+  PROFILE_TOKEN=secret   profile single requests sent with ?profile=secret
+  PROFILE_DIR=profiles   where profile files are written
+  PROFILE_INTERVAL=0.001 stack sampling interval in seconds
+
+With neither PROFILE nor PROFILE_TOKEN set, requests skip profiling after a
+single boolean check.
+"""
+import cProfile
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from collections import Counter
+from urllib.parse import parse_qs
+
+PROFILE_ALL = os.environ.get('PROFILE', '').lower() in ('1', 'true', 'yes')
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN') or None
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', '0.001'))
+
+ENABLED = PROFILE_ALL or PROFILE_TOKEN is not None
+
+_sequence = itertools.count()
+
+
+class StackSampler:
+    """Samples one thread's Python stack on an interval, counting collapsed stacks"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self):
+        """Stacks in 'root;child;leaf count' lines"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_name(label):
+    """Unique, filesystem-safe base name for a profile"""
+    label = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_') or 'run'
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return f"{stamp}-{os.getpid()}-{next(_sequence)}-{label[:80]}"
+
+
+@contextmanager
+def profile(label, profile_dir=None):
+    """
+    Profile the enclosed block, writing <name>.pstats and <name>.collapsed.
+    Yields the base path (without extension).
+    """
+    profile_dir = profile_dir or PROFILE_DIR
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, profile_name(label))
+
+    sampler = StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield base
+    finally:
+        profiler.disable()
+        sampler.stop()
+        profiler.dump_stats(base + '.pstats')
+        with open(base + '.collapsed', 'w') as f:
+            f.write(sampler.collapsed())
+
+
+@contextmanager
+def profile_if_enabled(label):
+    """Profile the block when PROFILE=1, otherwise do nothing (for CLI entry points)"""
+    if not PROFILE_ALL:
+        yield None
+        return
+    with profile(label) as base:
+        yield base
+    print(f"⏱️  Profile written to {base}.pstats / .collapsed", file=sys.stderr)
+
+
+def request_wants_profile(environ):
+    """True if this WSGI request should be profiled"""
+    if PROFILE_ALL:
+        return True
+    query = environ.get('QUERY_STRING', '')
+    if 'profile=' not in query:
+        return False
+    supplied = parse_qs(query).get('profile', [''])[0]
+    return hmac.compare_digest(supplied.encode(), PROFILE_TOKEN.encode())
+
+
+class ProfilerMiddleware:
+    """
+    WSGI middleware that profiles whole requests (routing, view, serialization)
+    and reports the profile path in an X-Profile response header.
+    """
+
+    def __init__(self, wsgi_app, profile_dir=None):
+        self.wsgi_app = wsgi_app
+        self.profile_dir = profile_dir
+
+    def __call__(self, environ, start_response):
+        if not ENABLED or not request_wants_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        label = f"{environ.get('REQUEST_METHOD', 'GET')}{environ.get('PATH_INFO', '/')}"
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['args'] = (status, headers, exc_info)
+            return lambda data: captured.setdefault('written', []).append(data)
+
+        with profile(label, self.profile_dir) as base:
+            result = self.wsgi_app(environ, capture_start_response)
+            try:
+                body = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        status, headers, exc_info = captured['args']
+        headers = [h for h in headers if h[0].lower() != 'content-length']
+        body = b''.join(captured.get('written', [])) + body
+        headers += [('Content-Length', str(len(body))), ('X-Profile', os.path.basename(base))]
+        start_response(status, headers, exc_info)
+        return [body]
@@ -1,43 +1,73 @@
 #!/usr/bin/env python3
+# Answers from the prebuilt index (cli_index.py) so startup stays fast: keep
+# pandas/NumPy and other heavy imports out of this module. A running query
+# daemon (daemon.py) answers first when there is one.
+import os
 import sys
-from calculator import load_data, calculate_city_risk
+import daemon
+from cli_index import check_city, get_index, query
+
+# Columns for --format csv
+CSV_FIELDS = ['search_term', 'matched_cities', 'risk_level', 'risk_score', 'total_incidents',
+              'use_of_force', 'use_of_force_pct', 'us_citizens', 'us_citizens_pct',
+              'sensitive_locations', 'sensitive_locations_pct', 'error']
+
+def print_header():
+    print(f"\n{'='*70}")
+    print(f"PROTEST SAFETY CHECKER - ICE Activity Risk Assessment")
+    print(f"Data: House Oversight Democrats Immigration Dashboard (Nov 2025-Jan 2026)")
+    print('='*70)
 
 def main():
     if len(sys.argv) < 2:
         print("Usage: python3 protest_checker.py <city_name>")
+        print("       python3 protest_checker.py --batch cities.txt [--format jsonl|csv] [--workers N]")
         print("\nExample: python3 protest_checker.py Portland")
         sys.exit(1)
     
-    city = ' '.join(sys.argv[1:])
+    if sys.argv[1].startswith('-'):
+        return batch_main(sys.argv[1:])
     
-    print(f"\n{'='*70}")
-    print(f"PROTEST SAFETY CHECKER - ICE Activity Risk Assessment")
-    print(f"Data: House Oversight Democrats Immigration Dashboard (Nov 2025-Jan 2026)")
-    print('='*70)
-    
-    df = load_data()
-    result = calculate_city_risk(city, df)
+    city = ' '.join(sys.argv[1:])
+    print_header()
+    result = daemon.check_city(city)
+    if result is None:
+        result = check_city(city)
+    print_result(result)
     
-    if result['total_incidents'] == 0:
-        print(f"\n❌ {result['message']}")
-        print(f"\nTry: Chicago, Minneapolis, Portland, Los Angeles, Washington DC")
+    if 'error' in result:
         sys.exit(0)
+
+def print_result(result):
+    """Human-readable report for one check_city() result"""
+    if result.get('ambiguous'):
+        print(f"\n⚠️  {result['error']}:")
+        for candidate in result['candidates']:
+            print(f"   • {candidate['location']} ({candidate['total_incidents']} incidents)")
+        print(f"\nTry: python3 protest_checker.py \"{result['candidates'][0]['location']}\"")
+        return
+    if 'error' in result:
+        print(f"\n❌ {result['error']}")
+        suggestions = result.get('suggestions') or ['Chicago', 'Minneapolis', 'Portland', 'Los Angeles', 'Washington DC']
+        print(f"\nTry: {', '.join(suggestions[:5])}")
+        return
     
     # Risk level with emoji
     emoji = {'High': '🔴', 'Medium': '🟡', 'Low': '🟢', 'Unknown': '⚪'}
     
     print(f"\n{emoji[result['risk_level']]} RISK LEVEL: {result['risk_level']}")
-    print(f"   Risk Score: {result['score']}/100")
+    print(f"   Risk Score: {result['risk_score']}/100")
+    print(f"   Matched: {'; '.join(result['matched_cities'])}")
     
     print(f"\n📊 INCIDENT STATISTICS:")
     print(f"   Total incidents: {result['total_incidents']}")
-    print(f"   Use of Force: {result['force_incidents']} ({result['force_pct']}%)")
-    print(f"   U.S. Citizens targeted: {result['citizen_incidents']} ({result['citizen_pct']}%)")
-    print(f"   Sensitive Locations: {result['sensitive_location']} ({result['sensitive_pct']}%)")
+    print(f"   Use of Force: {result['use_of_force']} ({result['use_of_force_pct']}%)")
+    print(f"   U.S. Citizens targeted: {result['us_citizens']} ({result['us_citizens_pct']}%)")
+    print(f"   Sensitive Locations: {result['sensitive_locations']} ({result['sensitive_locations_pct']}%)")
     
     print(f"\n📰 RECENT INCIDENTS:")
     for i, inc in enumerate(result['recent_incidents'][:5], 1):
-        print(f"   {i}. [{inc['date']}] {inc['title'][:65]}...")
+        print(f"   {i}. [{inc.get('date')}] {(inc.get('title') or '')[:65]}...")
     
     print(f"\n💡 SAFETY RECOMMENDATIONS:")
     if result['risk_level'] == 'High':
@@ -58,5 +88,39 @@ def main():
     
     print(f"\n{'='*70}\n")
 
+def batch_score(city, index):
+    """One batch result; module-level so worker processes can run it"""
+    result = query(index, city)
+    result.setdefault('search_term', city)
+    return result
+
+def batch_main(argv):
+    """Score many cities from a file or stdin, loading the index once"""
+    # argparse and the batch helpers are only imported for batch runs
+    import argparse
+    from batch import add_batch_arguments, read_cities, score_cities, write_results
+    
+    parser = argparse.ArgumentParser(description='Check ICE activity risk for many cities')
+    add_batch_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.batch:
+        parser.error('--batch is required when using options')
+    
+    try:
+        get_index()
+    except FileNotFoundError:
+        print("❌ Data file not found. Please run scraper first.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.format == 'human':
+        print_header()
+    results = score_cities(read_cities(args.batch), get_index, batch_score, workers=args.workers)
+    write_results(results, args.format, CSV_FIELDS, human=print_result)
+
 if __name__ == "__main__":
-    main()
+    if os.environ.get('PROFILE'):
+        from profiling import profile_if_enabled
+        with profile_if_enabled('protest_checker'):
+            main()
+    else:
+        main()
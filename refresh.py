@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Background data refresh: scrape -> clean -> ingest -> index, on an interval
+
+The new dataset is built completely off to the side while requests keep being
+served from the current one (stale-while-revalidate). Only when every step has
+succeeded is the served reference swapped, in a single assignment, for the new
+version; a failed run leaves the current data in place and is retried at the
+next interval.
+
+    REFRESH_INTERVAL=3600 gunicorn -c gunicorn.conf.py   # sidecar started by the gunicorn master
+    REFRESH_INTERVAL=3600 uvicorn asgi_app:app            # in the ASGI app
+    python3 refresh.py --interval 3600                    # sidecar next to either
+    python3 refresh.py --once                             # one run, then exit
+
+The gunicorn master forks workers, so it never runs threads of its own: it
+starts this module as a separate process with --reload-pid, which runs scrape,
+clean and ingest and watches the served data (DataWatcher), sending the master
+SIGHUP when it changes. The master then loads and indexes the new data before
+forking fresh workers, while the old workers keep answering until they are
+retired. The ASGI app and a plain sidecar leave indexing to the server's own
+data file watcher, which also swaps only once loading is done.
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+import traceback
+
+import calculator
+from cli_index import write_index
+from metrics import stage, REFRESH_RUNS, REFRESH_LAST_SUCCESS
+from snapshots import data_path, data_version
+
+DEFAULT_STEPS = ('scrape', 'clean', 'ingest', 'index')
+# For servers that build the index themselves when the data file changes
+FILE_STEPS = ('scrape', 'clean', 'ingest')
+
+
+class RefreshError(Exception):
+    """A pipeline step produced nothing usable; the current dataset is kept"""
+
+
+def scrape_step(csv_path):
+    # Imported lazily: selenium is only needed where the scraper actually runs
+    from scrape_oversight_selenium import scrape_oversight_dashboard_selenium
+    if scrape_oversight_dashboard_selenium() is None:
+        raise RefreshError("Scrape returned no incidents")
+
+
+def clean_step(csv_path):
+    from clean_oversight_data import clean_data
+    clean_data()
+
+
+def ingest_step(csv_path):
+    from ingest import ingest
+    ingest()
+
+
+def index_step(csv_path):
+    # Serving processes warm what they serve (warmup.py); this only writes the CLI index
+    dataset = calculator.preload_dataset(csv_path)
+    write_index(csv_path, dataset)
+    return dataset
+
+
+STEP_FUNCTIONS = {
+    'scrape': scrape_step,
+    'clean': clean_step,
+    'ingest': ingest_step,
+    'index': index_step,
+}
+
+
+def served_version():
+    """
+    (path, version) of the data file readers would load now: data_path() is
+    re-resolved, so the switch to the unified file once ingest first writes it
+    counts as a change; version as snapshots.data_version (None while missing)
+    """
+    path = data_path()
+    try:
+        return path, data_version(path)[1]
+    except FileNotFoundError:
+        return path, None
+
+
+class DataWatcher:
+    """
+    Sends a process (the gunicorn master) a signal, SIGHUP by default, when
+    check() finds the served data changed since the last check
+    """
+
+    def __init__(self, pid, sig=signal.SIGHUP):
+        self.pid = pid
+        self.sig = sig
+        self.version = served_version()
+
+    def alive(self):
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def check(self):
+        """Signal the process if the served data changed; returns whether it did"""
+        version = served_version()
+        if version[1] is None or version == self.version:
+            return False
+        self.version = version
+        os.kill(self.pid, self.sig)
+        return True
+
+
+class RefreshScheduler:
+    """
+    Runs the refresh pipeline in a daemon thread every `interval` seconds.
+
+    steps       names from STEP_FUNCTIONS, run in order; any failure aborts the run
+    csv_path    data file passed to each step (default: data_path() at each run)
+    on_success  called with no arguments after a successful run (e.g. to signal
+                a gunicorn reload when indexing happens elsewhere)
+    """
+
+    def __init__(self, interval, steps=DEFAULT_STEPS, csv_path=None,
+                 on_success=None, step_functions=None):
+        self.interval = interval
+        self.steps = tuple(steps)
+        self.csv_path = csv_path
+        self.on_success = on_success
+        self.step_functions = step_functions or STEP_FUNCTIONS
+        self.last_success = None
+        self.last_error = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._run_lock.locked()
+
+    def run_once(self):
+        """Run the pipeline now; returns True on success. Skips if a run is in progress."""
+        if not self._run_lock.acquire(blocking=False):
+            return False
+        try:
+            csv_path = self.csv_path or data_path()
+            with stage('refresh'):
+                for name in self.steps:
+                    self.step_functions[name](csv_path)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            REFRESH_RUNS.inc(result='error')
+            print(f"⚠️  Refresh failed, keeping current data: {self.last_error}")
+            traceback.print_exc()
+            return False
+        finally:
+            self._run_lock.release()
+
+        self.last_success = time.time()
+        self.last_error = None
+        REFRESH_RUNS.inc(result='success')
+        REFRESH_LAST_SUCCESS.set(self.last_success)
+        if self.on_success is not None:
+            self.on_success()
+        return True
+
+    def start(self):
+        """Start the background thread (first run after one interval)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='data-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh protest data: scrape, clean, ingest and index')
+    parser.add_argument('--interval', type=float, default=3600, help='Seconds between runs (0 = never)')
+    parser.add_argument('--once', action='store_true', help='Run the pipeline once and exit')
+    parser.add_argument('--steps', default=','.join(FILE_STEPS),
+                        help=f'Comma-separated steps from {", ".join(STEP_FUNCTIONS)} '
+                             f'(default: {",".join(FILE_STEPS)}; the server indexes the new file)')
+    parser.add_argument('--reload-pid', type=int,
+                        help='Send this process (a gunicorn master) SIGHUP when the served data changes; '
+                             'exit when it does')
+    parser.add_argument('--watch', type=float, default=30,
+                        help='Seconds between data checks with --reload-pid (0 = only after a refresh)')
+    args = parser.parse_args()
+
+    steps = [s.strip() for s in args.steps.split(',') if s.strip()]
+    unknown = [s for s in steps if s not in STEP_FUNCTIONS]
+    if unknown:
+        parser.error(f"Unknown steps: {', '.join(unknown)}")
+
+    watcher = DataWatcher(args.reload_pid) if args.reload_pid else None
+    scheduler = RefreshScheduler(args.interval, steps, on_success=watcher and watcher.check)
+    if args.once:
+        raise SystemExit(0 if scheduler.run_once() else 1)
+
+    if args.interval > 0:
+        print(f"🔄 Refreshing every {args.interval:.0f}s ({' → '.join(steps)})")
+        if watcher is None:
+            scheduler.run_once()  # beside a server that just loaded its data, wait an interval
+        scheduler.start()
+    try:
+        while watcher is None or watcher.alive():
+            time.sleep(args.watch if watcher is not None and args.watch > 0 else 60)
+            if watcher is not None and args.watch > 0:
+                watcher.check()
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
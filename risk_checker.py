@@ -1,75 +1,165 @@
 # risk_checker.py - V0.1 protest safety checker
+import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from profiling import profile_if_enabled
+from snapshots import data_path
+from dataset import recency_keys
+
+# Columns for --format csv
+CSV_FIELDS = ['city', 'risk_level', 'score', 'recent_count', 'total_count', 'avg_severity', 'error']
+
+def load_data(csv_path=None):
+    """
+    Load incidents once and group them by lowercase city name
+    Returns {city_lower: DataFrame of that city's incidents, newest first}
+    """
+    csv_path = csv_path or data_path('protest_data.csv')
+    df = pd.read_csv(csv_path)
+    if 'description' not in df.columns:
+        df['description'] = df['title']  # unified schema
+    # Sorted once here so each city's most recent incidents are its first rows
+    df = df.iloc[np.lexsort((np.arange(len(df)), -recency_keys(df['date'])))]
+    return {city: group for city, group in df.groupby(df['city'].str.lower())}
+
+def assess_city(city, data):
+    """
+    Risk assessment for one city ("Portland" or "Portland, OR") from load_data() output
+    Returns a dict; 'error' is set when there is nothing to score, or to
+    'ambiguous' with the candidates when a bare city name is in several states
+    """
+    name, _, state = city.partition(',')
+    city_data = data.get(name.strip().lower())
+    if city_data is not None and state.strip():
+        city_data = city_data[city_data['state'].str.upper() == state.strip().upper()]
+
+    if city_data is None or len(city_data) == 0:
+        return {'city': city, 'risk_level': 'UNKNOWN', 'error': 'no data'}
+
+    # Never merge same-named cities of different states into one score
+    per_state = city_data['state'].value_counts()
+    if len(per_state) > 1:
+        return {'city': city, 'risk_level': 'UNKNOWN', 'error': 'ambiguous',
+                'candidates': [{'location': f"{city_data['city'].iloc[0]}, {st}", 'total_incidents': int(count)}
+                               for st, count in per_state.items()]}
 
-def calculate_risk(city):
-    """Calculate risk score for a city based on recent incidents"""
-    
-    # Load data
-    try:
-        df = pd.read_csv('protest_data.csv')
-    except FileNotFoundError:
-        print("❌ No data found. Run seed_data.py first.")
-        return
-    
-    # Filter by city (case-insensitive)
-    city_data = df[df['city'].str.lower() == city.lower()].copy()
-    
-    if len(city_data) == 0:
-        print(f"⚠️  No incidents found for {city}")
-        print(f"\n🚨 RISK LEVEL: UNKNOWN (no data)")
-        return
-    
     # Convert dates (skip Unknown dates)
     city_data = city_data[city_data['date'] != 'Unknown'].copy()
-    
+
     if len(city_data) == 0:
-        print(f"⚠️  No dated incidents found for {city}")
-        print(f"\n🚨 RISK LEVEL: UNKNOWN (no date data)")
-        return
-    
+        return {'city': city, 'risk_level': 'UNKNOWN', 'error': 'no date data'}
+
     city_data['date'] = pd.to_datetime(city_data['date'], errors='coerce')
     city_data = city_data.dropna(subset=['date'])
-    
+
     # Recent incidents (last 30 days)
     cutoff_30 = datetime.now() - timedelta(days=30)
     recent = city_data[city_data['date'] >= cutoff_30]
-    
+
     # Risk scoring
     recent_count = len(recent)
     total_count = len(city_data)
     avg_severity = city_data['severity'].mean()
-    
+
     # Weighted score
     score = (recent_count * 3) + (total_count * 1) + (avg_severity * 2)
-    
+
     # Risk levels
     if score >= 30:
-        risk = "🔴 HIGH"
+        risk = "HIGH"
     elif score >= 15:
-        risk = "🟡 MEDIUM"
+        risk = "MEDIUM"
     else:
-        risk = "🟢 LOW"
-    
+        risk = "LOW"
+
+    recent_sorted = city_data.head(5)  # groups are newest first (load_data)
+    return {
+        'city': city,
+        'risk_level': risk,
+        'score': round(float(score), 1),
+        'recent_count': recent_count,
+        'total_count': total_count,
+        'avg_severity': round(float(avg_severity), 1),
+        'recent_incidents': [
+            {'date': row['date'].strftime('%Y-%m-%d'), 'type': row['type'], 'description': row['description']}
+            for _, row in recent_sorted.iterrows()
+        ]
+    }
+
+def print_assessment(result):
+    """Human-readable report for one assess_city() result"""
+    city = result['city']
+    if result.get('error') == 'no data':
+        print(f"⚠️  No incidents found for {city}")
+        print(f"\n🚨 RISK LEVEL: UNKNOWN (no data)")
+        return
+    if result.get('error') == 'ambiguous':
+        print(f"⚠️  {city} is in several states - add the state to pick one:")
+        for candidate in result['candidates']:
+            print(f"  • {candidate['location']} ({candidate['total_incidents']} incidents)")
+        print(f"\n🚨 RISK LEVEL: UNKNOWN (ambiguous)")
+        return
+    if result.get('error') == 'no date data':
+        print(f"⚠️  No dated incidents found for {city}")
+        print(f"\n🚨 RISK LEVEL: UNKNOWN (no date data)")
+        return
+
+    emoji = {'HIGH': '🔴', 'MEDIUM': '🟡', 'LOW': '🟢'}
+
     # Output
     print(f"\n{'='*50}")
     print(f"PROTEST SAFETY ASSESSMENT: {city.upper()}")
     print(f"{'='*50}")
-    print(f"\n🚨 RISK LEVEL: {risk}")
-    print(f"📊 Risk Score: {score:.1f}")
+    print(f"\n🚨 RISK LEVEL: {emoji[result['risk_level']]} {result['risk_level']}")
+    print(f"📊 Risk Score: {result['score']:.1f}")
     print(f"\n📈 Statistics:")
-    print(f"  • Last 30 days: {recent_count} incidents")
-    print(f"  • Last 6 months: {total_count} incidents")
-    print(f"  • Avg severity: {avg_severity:.1f}/10")
-    
+    print(f"  • Last 30 days: {result['recent_count']} incidents")
+    print(f"  • Last 6 months: {result['total_count']} incidents")
+    print(f"  • Avg severity: {result['avg_severity']:.1f}/10")
+
     print(f"\n📋 Recent Incidents:")
-    recent_sorted = city_data.sort_values('date', ascending=False).head(5)
-    for _, row in recent_sorted.iterrows():
-        print(f"  • {row['date'].strftime('%Y-%m-%d')} | {row['type']}")
-        print(f"    {row['description'][:80]}")
-    
+    for incident in result['recent_incidents']:
+        print(f"  • {incident['date']} | {incident['type']}")
+        print(f"    {incident['description'][:80]}")
+
     print(f"\n{'='*50}\n")
 
+def calculate_risk(city):
+    """Calculate risk score for a city based on recent incidents"""
+
+    # Load data
+    try:
+        data = load_data()
+    except FileNotFoundError:
+        print("❌ No data found. Run seed_data.py first.")
+        return
+
+    print_assessment(assess_city(city, data))
+
+def batch_main(argv):
+    """Assess many cities from a file or stdin, loading the data once"""
+    import argparse
+    from batch import add_batch_arguments, read_cities, score_cities, write_results
+
+    parser = argparse.ArgumentParser(description='Protest safety assessment for many cities')
+    add_batch_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.batch:
+        parser.error('--batch is required when using options')
+
+    try:
+        results = score_cities(read_cities(args.batch), load_data, assess_city, workers=args.workers)
+        write_results(results, args.format, CSV_FIELDS, human=print_assessment)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
 if __name__ == "__main__":
-    city = input("Enter city name: ")
-    calculate_risk(city)
+    if len(sys.argv) > 1:
+        with profile_if_enabled('risk_checker-batch'):
+            batch_main(sys.argv[1:])
+    else:
+        city = input("Enter city name: ")
+        with profile_if_enabled(f"risk_checker-{city}"):
+            calculate_risk(city)
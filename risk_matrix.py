@@ -0,0 +1,149 @@
+"""
+Risk scores for every location as one matrix product
+
+For a Dataset we keep a (locations x labels) matrix of incident counts, one
+column per category label, plus the incident total per location. A scoring
+profile (scoring.py) is a weight vector over those labels, so the risk score of
+every location is
+
+    min(totals * per_incident, volume_cap) + counts @ weights
+
+capped at max_score. Label columns are counted once per dataset (bincount over
+the location codes) and reused, so rescoring all locations with different
+weights - what-if analysis - is a single matrix-vector product.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from scoring import FACTOR_LABELS, RISK_LEVELS, get_profile, profile_labels
+
+
+def category_flags(categories, labels):
+    """(len(categories) x len(labels)) bool matrix: category string contains label"""
+    categories = pd.Series(categories, dtype=object)
+    flags = np.zeros((len(categories), len(labels)), dtype=bool)
+    for j, label in enumerate(labels):
+        flags[:, j] = categories.str.contains(label, na=False, regex=False).to_numpy()
+    return flags
+
+
+class FactorMatrix:
+    """Per-location incident totals and label counts for one Dataset"""
+
+    def __init__(self, dataset):
+        # Only arrays, not the dataset itself, which for_dataset() keys on weakly
+        self.names = dataset.location_names
+        self._categories = dataset.values('category')
+        self.n_locations = len(dataset.location_names)
+        location_codes = dataset.codes('location')
+        has_location = location_codes >= 0
+        self._location_codes = location_codes[has_location]
+        self._category_codes = dataset.codes('category')[has_location]
+        self.totals = np.bincount(self._location_codes, minlength=self.n_locations)
+        # Row of each location's first incident, for breaking ties in file order
+        _, first = np.unique(location_codes, return_index=True)
+        self.first_rows = first[-self.n_locations:] if self.n_locations else first[:0]
+        self.labels = []
+        self._counts = np.zeros((self.n_locations, 0), dtype=np.int64)
+        self._lock = threading.Lock()
+        self.add_labels(FACTOR_LABELS)
+
+    def add_labels(self, labels):
+        """Count any labels not counted yet (safe to call from several threads)"""
+        with self._lock:
+            new = [label for label in dict.fromkeys(labels) if label not in self.labels]
+            if not new:
+                return
+            per_code = category_flags(self._categories, new)
+            has_category = self._category_codes >= 0
+            columns = np.zeros((self.n_locations, len(new)), dtype=np.int64)
+            for j in range(len(new)):
+                row_flags = np.zeros(len(self._category_codes), dtype=bool)
+                row_flags[has_category] = per_code[self._category_codes[has_category], j]
+                columns[:, j] = np.bincount(self._location_codes, weights=row_flags,
+                                            minlength=self.n_locations)
+            # Publish counts before labels so readers never see a label without its column
+            self._counts = np.hstack([self._counts, columns])
+            self.labels = self.labels + new
+
+    def counts(self, labels):
+        """(locations x labels) count matrix for the given labels, in that order"""
+        self.add_labels(labels)
+        index = {label: j for j, label in enumerate(self.labels)}
+        return self._counts[:, [index[label] for label in labels]]
+
+    def label_totals(self, location_codes, labels):
+        """{label: count} summed over some locations"""
+        sums = self.counts(labels)[np.asarray(location_codes, dtype=np.int64)].sum(axis=0)
+        return {label: int(n) for label, n in zip(labels, sums)}
+
+    def scores(self, profile=None):
+        """Integer risk score of every location under a profile (scoring.weighted_score, vectorized)"""
+        profile = profile or get_profile()
+        labels = list(profile['weights'])
+        weights = np.array([profile['weights'][label] for label in labels], dtype=np.float64)
+        volume = np.minimum(self.totals * profile['per_incident'], profile['volume_cap'])
+        raw = volume + self.counts(labels) @ weights
+        return np.minimum(np.round(raw, 6).astype(np.int64), profile['max_score'])
+
+    def levels(self, scores, profile=None):
+        thresholds = (profile or get_profile())['thresholds']
+        levels = np.full(len(scores), 'Low', dtype=object)
+        for level in reversed(RISK_LEVELS):
+            if level in thresholds:
+                levels[scores >= thresholds[level]] = level
+        return levels
+
+    def ranking(self, profile=None, top=None, baseline=None):
+        """
+        Locations by descending score under profile (ties in order of first
+        incident). With a baseline profile each entry also carries its baseline
+        score and rank for comparison. Raises ValueError when top is below 1.
+        """
+        if top is not None and top < 1:
+            raise ValueError('top must be at least 1')
+        profile = profile or get_profile()
+        scores = self.scores(profile)
+        order, ranks = _rank(scores, self.first_rows)
+        levels = self.levels(scores, profile)
+        if baseline is not None:
+            base_scores = self.scores(baseline)
+            _, base_ranks = _rank(base_scores, self.first_rows)
+
+        names = self.names
+        entries = []
+        for i in order[:top] if top is not None else order:
+            entry = {'location': names[i], 'risk_score': int(scores[i]), 'risk_level': levels[i],
+                     'total_incidents': int(self.totals[i]), 'rank': int(ranks[i])}
+            if baseline is not None:
+                entry['baseline_score'] = int(base_scores[i])
+                entry['baseline_rank'] = int(base_ranks[i])
+            entries.append(entry)
+        return entries
+
+
+def _rank(scores, first_rows):
+    """(order, ranks): descending score, ties by first incident row"""
+    order = np.lexsort((first_rows, -scores))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return order, ranks
+
+
+_matrices = weakref.WeakKeyDictionary()
+_matrices_lock = threading.Lock()
+
+
+def for_dataset(dataset):
+    """The FactorMatrix of a Dataset, built on first use and kept as long as the dataset"""
+    matrix = _matrices.get(dataset)
+    if matrix is None:
+        with _matrices_lock:
+            matrix = _matrices.get(dataset)
+            if matrix is None:
+                matrix = _matrices[dataset] = FactorMatrix(dataset)
+                matrix.add_labels(profile_labels())
+    return matrix
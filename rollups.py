@@ -0,0 +1,236 @@
+"""
+City -> state -> national rollups of incident counts and timelines
+
+Per location we keep the incident total and the count of each category label
+the scoring profile uses (the inputs of scoring.score_counts), and the same
+counts summed per state ("City, ST") and over the whole country, plus incidents
+per day for each state and nationally. State and national risk scores are then
+score_counts() over these totals - no pass over the rows.
+
+append() adds incidents in place: new rows only add to the totals of their
+location, state and the nation. For a published data file the rollups are
+extended with just the new rows when its current snapshot was made by
+appending to the one they were built from (snapshots.is_appended), and rebuilt
+when it was rewritten in any other way or the scoring profile changed.
+"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from dataset import location_states
+from risk_matrix import category_flags
+from scoring import FACTOR_LABELS, get_profile, profile_labels, score_counts
+from snapshots import is_appended
+
+# Cities listed with a state's rollup, by incident count
+TOP_CITIES = 10
+
+
+class Rollups:
+    """
+    Incident totals and label counts per location, state and nation, and daily
+    counts per state and nation. append() adds incidents in place.
+    """
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.names = []
+        self._ids = {}
+        self.states = []
+        self._state_ids = {}
+        self._location_state = np.zeros(0, dtype=np.int64)  # state id per location (-1 = none)
+        self._counts = np.zeros((0, 1 + len(self.labels)), dtype=np.int64)  # total, then labels
+        self._state_counts = np.zeros((0, self._counts.shape[1]), dtype=np.int64)  # same, per state
+        self._unlocated = np.zeros(1 + len(self.labels), dtype=np.int64)    # same, rows without a location
+        self._state_days = []   # {day: count} per state
+        self._national_days = {}
+        # Rows of the source consumed so far (extend() appends the rest) and its version
+        self.rows_seen = 0
+        self.signature = None
+        self.profile = None
+
+    def copy(self):
+        other = Rollups(self.labels)
+        other.names, other._ids = list(self.names), dict(self._ids)
+        other.states, other._state_ids = list(self.states), dict(self._state_ids)
+        other._location_state = self._location_state.copy()
+        other._counts = self._counts.copy()
+        other._state_counts = self._state_counts.copy()
+        other._unlocated = self._unlocated.copy()
+        other._state_days = [dict(days) for days in self._state_days]
+        other._national_days = dict(self._national_days)
+        other.rows_seen, other.signature = self.rows_seen, self.signature
+        other.profile = self.profile
+        return other
+
+    def _location_ids(self, locations):
+        codes, uniques = pd.factorize(pd.Series(locations, dtype=object), sort=False)
+        new = [name for name in uniques if name not in self._ids]
+        for name in new:
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+        if new:
+            state_ids = []
+            for state in location_states(new):
+                if state is not None and state not in self._state_ids:
+                    self._state_ids[state] = len(self.states)
+                    self.states.append(state)
+                    self._state_days.append({})
+                state_ids.append(self._state_ids.get(state, -1))
+            grown = len(self.states) - len(self._state_counts)
+            if grown:
+                self._state_counts = np.vstack([self._state_counts,
+                                                np.zeros((grown, self._counts.shape[1]), dtype=np.int64)])
+            self._location_state = np.concatenate([self._location_state, np.array(state_ids, dtype=np.int64)])
+            self._counts = np.vstack([self._counts, np.zeros((len(new), self._counts.shape[1]), dtype=np.int64)])
+        # Trailing -1 so missing locations (code -1) index it
+        ids = np.array([self._ids[name] for name in uniques] + [-1], dtype=np.int64)
+        return ids[codes]
+
+    def append(self, locations, days, label_flags):
+        """
+        Add incidents: location names, ISO days (None = undated) and a (rows x
+        labels) bool matrix of the labels each has. Rows without a location only
+        count nationally.
+        """
+        ids = self._location_ids(locations)
+        has_location = ids >= 0
+        counts = np.column_stack([np.ones(len(ids), dtype=np.int64), np.asarray(label_flags, dtype=np.int64)])
+        n = len(self.names)
+        row_states = np.where(has_location, self._location_state[ids], -1)
+        in_state = row_states >= 0
+        for j in range(counts.shape[1]):
+            self._counts[:, j] += np.bincount(ids[has_location], weights=counts[has_location, j],
+                                              minlength=n).astype(np.int64)
+            self._state_counts[:, j] += np.bincount(row_states[in_state], weights=counts[in_state, j],
+                                                    minlength=len(self.states)).astype(np.int64)
+        self._unlocated += counts[~has_location].sum(axis=0)
+
+        # Daily counts: one update per distinct (state, day) in the batch
+        day_codes, day_values = pd.factorize(pd.Series(days, dtype=object), sort=False)
+        dated = day_codes >= 0
+        states = row_states[dated]
+        day_codes = day_codes[dated]
+        for code, count in zip(*np.unique(day_codes, return_counts=True)):
+            day = day_values[code]
+            self._national_days[day] = self._national_days.get(day, 0) + int(count)
+        in_state = states >= 0
+        pairs, pair_counts = np.unique(states[in_state] * len(day_values) + day_codes[in_state], return_counts=True)
+        for pair, count in zip(pairs.tolist(), pair_counts.tolist()):
+            state_days = self._state_days[pair // len(day_values)]
+            day = day_values[pair % len(day_values)]
+            state_days[day] = state_days.get(day, 0) + count
+        return self
+
+    # --- reading ------------------------------------------------------------
+
+    def _risk(self, counts):
+        label_counts = dict(zip(self.labels, (int(n) for n in counts[1:])))
+        return score_counts(int(counts[0]), *(label_counts.pop(label) for label in FACTOR_LABELS),
+                            other_counts=label_counts, profile=self.profile)
+
+    @staticmethod
+    def _timeline(days):
+        return [{'date': day, 'count': count} for day, count in sorted(days.items())]
+
+    def state(self, state):
+        """Risk components, top cities and timeline for a two-letter state, or None"""
+        i = self._state_ids.get(state.strip().upper())
+        if i is None:
+            return None
+        risk_data = self._risk(self._state_counts[i])
+        cities = np.flatnonzero(self._location_state == i)
+        cities = cities[np.argsort(-self._counts[cities, 0], kind='stable')][:TOP_CITIES]
+        risk_data['state'] = self.states[i]
+        risk_data['cities'] = [{'location': self.names[c], 'total_incidents': int(self._counts[c, 0])}
+                               for c in cities]
+        risk_data['timeline'] = self._timeline(self._state_days[i])
+        return risk_data
+
+    def national(self):
+        """Risk components and timeline over every incident, with each state's rollup"""
+        risk_data = self._risk(self._counts.sum(axis=0) + self._unlocated)
+        states = []
+        for state, counts in zip(self.states, self._state_counts):
+            entry = self._risk(counts)
+            states.append({'state': state, 'total_incidents': entry['total_incidents'],
+                           'risk_score': entry['risk_score'], 'risk_level': entry['risk_level']})
+        states.sort(key=lambda entry: -entry['total_incidents'])
+        risk_data['states'] = states
+        risk_data['timeline'] = self._timeline(self._national_days)
+        return risk_data
+
+    # --- loading from data -------------------------------------------------
+
+    def _dataset_rows(self, dataset, start=0):
+        """(locations, days, label flags) arrays for dataset rows from start on"""
+        location_codes = dataset.codes('location')[start:]
+        locations = np.where(location_codes >= 0, dataset.location_names[location_codes], None)
+        date_codes = dataset.codes('date')[start:]
+        days = np.append(dataset.date_days, None)[date_codes]
+        per_code = category_flags(dataset.values('category'), self.labels)
+        per_code = np.vstack([per_code, np.zeros((1, len(self.labels)), dtype=bool)])
+        return locations, days, per_code[dataset.codes('category')[start:]]
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Rollups of a dataset.Dataset under the current scoring profile's labels"""
+        rollups = cls(profile_labels())
+        rollups.profile = get_profile()
+        rollups.append(*rollups._dataset_rows(dataset))
+        rollups._mark_seen(dataset)
+        return rollups
+
+    def _mark_seen(self, dataset):
+        self.rows_seen = len(dataset)
+        self.signature = dataset.signature
+
+    def extend(self, dataset):
+        """
+        Append the rows of dataset past those already consumed. The caller
+        vouches that dataset is the consumed data with rows appended
+        (rollups_for() checks the snapshot lineage).
+        """
+        self.append(*self._dataset_rows(dataset, self.rows_seen))
+        self._mark_seen(dataset)
+        return self
+
+
+# Latest rollups per published data file, advanced incrementally as it is reloaded
+_rollups = {}
+_rollups_lock = threading.Lock()
+# Rollups of datasets not read from a file, kept as long as the dataset
+_unkeyed = weakref.WeakKeyDictionary()
+
+
+def rollups_for(key, dataset):
+    """
+    Rollups for a loaded Dataset of the data file `key`. When the file's
+    current snapshot was made by appending rows to the one of the last call,
+    the previous rollups are copied and extended with the new rows instead of
+    being rebuilt. A change of scoring profile rebuilds them. With no key they
+    are built once per Dataset.
+    """
+    profile = get_profile()
+    if key is None:
+        with _rollups_lock:
+            rollups = _unkeyed.get(dataset)
+            if rollups is None or rollups.profile is not profile:
+                rollups = _unkeyed[dataset] = Rollups.from_dataset(dataset)
+            return rollups
+    rollups = _rollups.get(key)
+    if rollups is not None and rollups.signature == dataset.signature and rollups.profile is profile:
+        return rollups
+    with _rollups_lock:
+        rollups = _rollups.get(key)
+        if rollups is not None and rollups.profile is not profile:
+            rollups = None
+        if rollups is not None and rollups.signature == dataset.signature:
+            return rollups
+        if rollups is not None and is_appended(key, rollups.signature, dataset.signature):
+            rollups = _rollups[key] = rollups.copy().extend(dataset)
+            return rollups
+        rollups = _rollups[key] = Rollups.from_dataset(dataset)
+        return rollups
@@ -39,6 +39,10 @@ case "$1" in
         echo "📝 Running tests with maximum verbosity..."
         pytest tests/ -vv -s
         ;;
+    "bench")
+        echo "⏱️  Running benchmarks (${BENCH_SCALES:-1k,100k})..."
+        pytest benchmarks/ --scales "${BENCH_SCALES:-1k,100k}" --benchmark-autosave --benchmark-compare
+        ;;
     "clean")
         echo "🧹 Running tests without real data..."
         if [ -f protest_data_oversight.csv ]; then
@@ -60,6 +64,7 @@ case "$1" in
         echo "  failed      - Re-run only previously failed tests"
         echo "  verbose     - Run tests with maximum verbosity"
         echo "  clean       - Run tests without real data file"
+        echo "  bench       - Run benchmarks, save results and compare to last run"
         echo ""
         echo "Default (no option): Run all tests with standard output"
         pytest tests/ -v
@@ -0,0 +1,150 @@
+"""
+Pure-Python scoring rules shared by the web engine and the fast CLI path
+
+Nothing here imports pandas or NumPy, so code that only needs to match a city
+name or turn incident counts into a score can start in milliseconds.
+"""
+import json
+import math
+import os
+import re
+
+
+def normalize_city_input(city_input):
+    """
+    Normalize user input: strip, lowercase, remove extra spaces/punctuation
+    'Portland, OR' -> 'portland or'
+    'Phoenix  ' -> 'phoenix'
+    """
+    city_input = city_input.strip().lower()
+    # Remove commas, extra spaces
+    city_input = re.sub(r'[,\s]+', ' ', city_input).strip()
+    return city_input
+
+
+# Category labels reported in every result, in score_counts() argument order
+FACTOR_LABELS = ('Use of Force', 'U.S. Citizen', 'Sensitive Location')
+
+# Built-in weights; scoring_profiles.json (or $SCORING_PROFILES) can override
+# them and add named profiles, selected with $SCORING_PROFILE
+DEFAULT_PROFILE = {
+    'per_incident': 2,        # points per incident...
+    'volume_cap': 40,         # ...capped here
+    'weights': {              # points per incident carrying each category label
+        'Use of Force': 1.5,
+        'U.S. Citizen': 1.2,
+        'Sensitive Location': 2,
+    },
+    'max_score': 100,
+    'thresholds': {'High': 70, 'Medium': 40},  # minimum score per level, else Low
+}
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_profiles.json')
+RISK_LEVELS = ('High', 'Medium')
+
+_profiles_cache = {}
+
+
+def resolve_profile(overrides=None, base=None):
+    """
+    Complete, validated profile: overrides merged over base (DEFAULT_PROFILE if
+    None), with weights and thresholds merged per key. A weight of 0 drops a
+    label from the score. Raises ValueError on unknown keys or non-numbers.
+    """
+    base = base or DEFAULT_PROFILE
+    overrides = overrides or {}
+    unknown = set(overrides) - set(DEFAULT_PROFILE)
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}")
+    
+    profile = dict(base, **{k: v for k, v in overrides.items() if k not in ('weights', 'thresholds')})
+    profile['weights'] = dict(base['weights'], **overrides.get('weights', {}))
+    profile['thresholds'] = dict(base['thresholds'], **overrides.get('thresholds', {}))
+    
+    if set(profile['thresholds']) - set(RISK_LEVELS):
+        raise ValueError(f"Thresholds can only be set for {', '.join(RISK_LEVELS)}")
+    numbers = [profile['per_incident'], profile['volume_cap'], profile['max_score']]
+    numbers += list(profile['weights'].values()) + list(profile['thresholds'].values())
+    if not all(isinstance(n, (int, float)) and not isinstance(n, bool) and math.isfinite(n) for n in numbers):
+        raise ValueError('Profile weights, caps and thresholds must be numbers')
+    return profile
+
+
+def load_profiles(path=None):
+    """
+    Named profiles from a JSON file of {name: overrides}, each resolved over
+    the file's "default" entry (itself over DEFAULT_PROFILE). Always includes
+    "default". Re-read only when the file changes.
+    """
+    path = path or os.environ.get('SCORING_PROFILES') or PROFILES_PATH
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {'default': DEFAULT_PROFILE}
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _profiles_cache:
+        with open(path) as f:
+            raw = json.load(f)
+        default = resolve_profile(raw.get('default'))
+        profiles = {name: resolve_profile(overrides, default) for name, overrides in raw.items()}
+        profiles['default'] = default
+        _profiles_cache.clear()
+        _profiles_cache[key] = profiles
+    return _profiles_cache[key]
+
+
+def get_profile(name=None):
+    """Profile by name (default: $SCORING_PROFILE, else "default"). KeyError if unknown."""
+    name = name or os.environ.get('SCORING_PROFILE') or 'default'
+    profiles = load_profiles()
+    if name not in profiles:
+        raise KeyError(f"Unknown scoring profile {name!r} (available: {', '.join(sorted(profiles))})")
+    return profiles[name]
+
+
+def profile_labels(profile=None):
+    """Category labels to count for a profile: the reported ones plus any it weights"""
+    profile = profile or get_profile()
+    return list(dict.fromkeys(FACTOR_LABELS + tuple(profile['weights'])))
+
+
+def risk_level(risk_score, profile=None):
+    thresholds = (profile or get_profile())['thresholds']
+    for level in RISK_LEVELS:
+        if level in thresholds and risk_score >= thresholds[level]:
+            return level
+    return 'Low'
+
+
+def weighted_score(total_incidents, label_counts, profile=None):
+    """Capped volume points plus weight x count for each label, as an int capped at max_score"""
+    profile = profile or get_profile()
+    score = min(total_incidents * profile['per_incident'], profile['volume_cap'])
+    for label, weight in profile['weights'].items():
+        score += label_counts.get(label, 0) * weight
+    # Rounded first so float noise (69.99999...) can't drop a point
+    return min(int(round(score, 6)), profile['max_score'])
+
+
+def score_counts(total_incidents, use_of_force, us_citizens, sensitive_locations,
+                 other_counts=None, profile=None):
+    """
+    Risk score, level and percentages from incident counts. other_counts holds
+    counts for any extra labels the profile weights; profile defaults to the
+    configured one.
+    """
+    profile = profile or get_profile()
+    label_counts = dict(zip(FACTOR_LABELS, (use_of_force, us_citizens, sensitive_locations)))
+    label_counts.update(other_counts or {})
+    risk_score = weighted_score(total_incidents, label_counts, profile)
+    
+    return {
+        'risk_level': risk_level(risk_score, profile),
+        'risk_score': risk_score,
+        'total_incidents': total_incidents,
+        'use_of_force': use_of_force,
+        'use_of_force_pct': round((use_of_force / total_incidents * 100) if total_incidents else 0, 1),
+        'us_citizens': us_citizens,
+        'us_citizens_pct': round((us_citizens / total_incidents * 100) if total_incidents else 0, 1),
+        'sensitive_locations': sensitive_locations,
+        'sensitive_locations_pct': round((sensitive_locations / total_incidents * 100) if total_incidents else 0, 1)
+    }
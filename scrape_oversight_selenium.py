@@ -8,6 +8,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
 import pandas as pd
 import time
+from fingerprints import append_snapshot
+from near_duplicates import dedupe_frame
 
 def scrape_oversight_dashboard_selenium():
     """Scrape House Oversight Dashboard by paginating through results"""
@@ -165,8 +167,12 @@ def scrape_oversight_dashboard_selenium():
         return None
     
     df = pd.DataFrame(all_incidents)
-    df.to_csv('protest_data_oversight.csv', index=False)
-    print(f"✅ Scraped {len(all_incidents)} incidents → saved to protest_data_oversight.csv")
+    df, near = dedupe_frame(df, 'title', ['location'], 'date')
+    if near:
+        print(f"  Dropped {near} near-duplicate reports")
+    # Append only incidents not already in the data (checked against the fingerprint index)
+    snapshot, added = append_snapshot(df, 'protest_data_oversight.csv')
+    print(f"✅ Scraped {len(all_incidents)} incidents, {added} new → saved to protest_data_oversight.csv (version {snapshot['version']})")
     
     return df
 
@@ -0,0 +1,186 @@
+"""
+Full-text incident search: an inverted index over titles, ranked with BM25
+
+Titles are lowercased and split into word tokens (a few stopwords dropped).
+For each term the index keeps a postings list - the rows containing it, in row
+order, as int32 - stored back to back in one array with per-term offsets (CSR),
+next to each posting's BM25 term weight as float32:
+
+    tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average length))
+
+so a query only gathers its terms' postings, multiplies by the term's idf
+and sums per row. Location, category and date filters are intersected with
+those postings before scoring - each candidate row's location/category code
+and day are looked up, so a filter costs the size of the postings, not of the
+rows it selects.
+
+Distinct titles are tokenized once. The index is built on first use for each
+Dataset (one per data version) and kept as long as the dataset.
+"""
+import re
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import risk_matrix
+from dataset import UNKNOWN_DAY
+
+K1 = 1.2
+B = 0.75
+
+TOKEN = re.compile(r'[^\W_]+')
+TOKEN_OR_SEPARATOR = re.compile(r'[^\W_]+|\x00')
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'were', 'with',
+})
+
+# Text column searched, first one the data has
+TEXT_COLUMNS = ('title', 'description')
+
+
+def tokenize(text):
+    """Lowercase word tokens of a string, stopwords dropped"""
+    return [token for token in TOKEN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Inverted index with BM25 weights over one Dataset's titles"""
+
+    def __init__(self, dataset):
+        # Only arrays, not the dataset itself, which for_dataset() keys on weakly
+        self.n_rows = len(dataset)
+        self.location_codes = dataset.codes('location')
+        self.n_locations = len(dataset.location_names)
+        self.category_codes = dataset.codes('category')
+        self.categories = dataset.values('category')
+        self.row_days = dataset.row_days
+        self.recency_rank = dataset.recency_rank
+
+        column = next((name for name in TEXT_COLUMNS if name in dataset.columns), None)
+        titles = dataset.strings(column) if column else np.full(self.n_rows, None, dtype=object)
+        self._build(titles)
+
+    def _build(self, titles):
+        # Tokenize each distinct title once, in one regex pass over all of them
+        # joined by a separator: (title, term, tf) triples grouped by title
+        title_codes, uniques = pd.factorize(pd.Series(titles, dtype=object), sort=False)
+        text = '\x00'.join(str(title) for title in uniques).lower()
+        found = pd.Series(TOKEN_OR_SEPARATOR.findall(text), dtype=object)
+        separator = (found == '\x00').to_numpy()
+        title_index = np.cumsum(separator)
+        kept = ~separator & ~found.isin(STOPWORDS).to_numpy()
+        tokens, title_index = found.to_numpy()[kept], title_index[kept]
+        term_ids, vocabulary = pd.factorize(tokens, sort=False)
+        self.vocabulary = pd.Index(vocabulary, dtype=object)
+        n_terms, n_titles = len(vocabulary), len(uniques)
+
+        pairs = np.unique(title_index.astype(np.int64) * n_terms + term_ids, return_counts=True)
+        keys, tf = pairs
+        title_of, term_of = keys // max(n_terms, 1), keys % max(n_terms, 1)
+        per_title = np.bincount(title_of, minlength=n_titles)
+        title_starts = np.zeros(n_titles + 1, dtype=np.int64)
+        np.cumsum(per_title, out=title_starts[1:])
+        title_length = np.bincount(title_of, weights=tf, minlength=n_titles)
+
+        # Expand to rows: every row gets its title's (term, tf) pairs, rows in order
+        has_title = title_codes >= 0
+        rows = np.flatnonzero(has_title)
+        codes = title_codes[has_title]
+        counts = per_title[codes]
+        first = np.repeat(title_starts[codes] - np.cumsum(counts) + counts, counts)
+        pair = first + np.arange(counts.sum(), dtype=np.int64)
+        posting_rows = np.repeat(rows, counts)
+
+        lengths = np.zeros(self.n_rows, dtype=np.float64)
+        lengths[rows] = title_length[codes]
+        average = lengths[rows].mean() if len(rows) else 1.0
+        tf = tf[pair].astype(np.float64)
+        weights = tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[posting_rows] / average))
+
+        # Group postings by term (stable sort keeps row order within each term)
+        order = np.argsort(term_of[pair], kind='stable')
+        self.postings = posting_rows[order].astype(np.int32)
+        self.weights = weights[order].astype(np.float32)
+        doc_freq = np.bincount(term_of[pair], minlength=n_terms)
+        self.offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.offsets[1:])
+        n_docs = len(rows)
+        self.idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def _filter(self, rows, location_codes, category, since, until):
+        """Bool mask over candidate rows passing every filter given"""
+        keep = np.ones(len(rows), dtype=bool)
+        if location_codes is not None:
+            allowed = np.zeros(self.n_locations + 1, dtype=bool)
+            allowed[np.asarray(location_codes, dtype=np.int64)] = True
+            keep &= allowed[self.location_codes[rows]]
+        if category:
+            per_code = risk_matrix.category_flags(self.categories, [category])[:, 0]
+            keep &= np.append(per_code, False)[self.category_codes[rows]]
+        if since is not None or until is not None:
+            days = self.row_days[rows]
+            keep &= days != UNKNOWN_DAY
+            if since is not None:
+                keep &= days >= since
+            if until is not None:
+                keep &= days <= until
+        return keep
+
+    def search(self, query, location_codes=None, category=None, since=None, until=None, limit=20):
+        """
+        (row ids of the best matches, their scores, total number of matches) for
+        a text query, best first (ties: newest first, then file order). Rows match
+        when they contain any query term. since/until are days since the epoch.
+        """
+        terms = self.vocabulary.get_indexer(list(dict.fromkeys(tokenize(query))))
+        terms = terms[terms >= 0].tolist()
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0), 0
+        rows = np.concatenate([self.postings[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        weights = np.concatenate([self.weights[self.offsets[t]:self.offsets[t + 1]] * np.float32(self.idf[t])
+                                  for t in terms])
+        if location_codes is not None or category or since is not None or until is not None:
+            keep = self._filter(rows, location_codes, category, since, until)
+            rows, weights = rows[keep], weights[keep]
+
+        if len(terms) > 1:
+            # Sum per row: dense accumulator when candidates are a large share of rows
+            if len(rows) > self.n_rows // 16:
+                totals = np.bincount(rows, weights, minlength=self.n_rows)
+                rows = np.flatnonzero(totals > 0)
+                weights = totals[rows]
+            else:
+                rows, inverse = np.unique(rows, return_inverse=True)
+                weights = np.bincount(inverse, weights)
+        scores = weights
+
+        top = np.arange(len(rows))
+        if len(rows) > limit:
+            # Rows above the limit-th best score, then the newest of those tied with it
+            kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            above, tied = np.flatnonzero(scores > kth), np.flatnonzero(scores == kth)
+            wanted = limit - len(above)
+            if len(tied) > wanted:
+                ranks = self.recency_rank[rows[tied]]
+                tied = tied[np.argpartition(ranks, wanted - 1)[:wanted]]
+            top = np.concatenate([above, tied])
+        best = top[np.lexsort((self.recency_rank[rows[top]], -scores[top]))]
+        return rows[best].astype(np.int64), scores[best].astype(np.float64), len(rows)
+
+
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def for_dataset(dataset):
+    """The SearchIndex of a Dataset, built on first use and kept as long as the dataset"""
+    index = _indexes.get(dataset)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(dataset)
+            if index is None:
+                index = _indexes[dataset] = SearchIndex(dataset)
+    return index
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Atomic, versioned data snapshots
+
+Writers never modify a data file in place. Each write of e.g.
+protest_data_oversight.csv produces:
+
+  snapshots/protest_data_oversight/<version>.csv   immutable snapshot
+  snapshots/protest_data_oversight/manifest.json   current version + history
+  protest_data_oversight.csv                       published copy for plain readers
+
+Every file is written to a temporary name, fsynced and renamed into place, so
+a reader sees either the old or the new file, never a truncated one. The
+version is the content hash, which readers can cache on instead of mtime, and
+the last SNAPSHOT_RETAIN versions are kept for rollback:
+
+    python3 snapshots.py list protest_data_oversight.csv
+    python3 snapshots.py rollback protest_data_oversight.csv <version>
+"""
+import json
+import os
+import time
+
+# hashlib, shutil and tempfile are imported by the write functions that use them,
+# keeping this module cheap for readers such as the fast CLI path.
+
+SNAPSHOT_RETAIN = int(os.environ.get('SNAPSHOT_RETAIN', '5'))
+MANIFEST_NAME = 'manifest.json'
+# Unified dataset built from every source by ingest.py; readers default to it
+UNIFIED_PATH = 'protest_data_unified.csv'
+
+
+def snapshot_dir(published_path):
+    """snapshots/<stem>/ next to the published file"""
+    published_path = os.path.abspath(published_path)
+    stem = os.path.splitext(os.path.basename(published_path))[0]
+    return os.path.join(os.path.dirname(published_path), 'snapshots', stem)
+
+
+def data_path(fallback='protest_data_oversight.csv', directory=None):
+    """
+    The unified dataset if it has been built, else fallback (a single source);
+    both taken relative to directory when given, else the working directory
+    """
+    if directory is not None:
+        unified, fallback = os.path.join(directory, UNIFIED_PATH), os.path.join(directory, fallback)
+    else:
+        unified = UNIFIED_PATH
+    return unified if os.path.exists(unified) else fallback
+
+
+def manifest_path(published_path):
+    return os.path.join(snapshot_dir(published_path), MANIFEST_NAME)
+
+
+def atomic_write(path, write, binary=False):
+    """Call write(file) on a temp file beside path, fsync, then rename over path"""
+    import tempfile
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', newline='')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _sha256(path):
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(published_path):
+    """Manifest dict, or None if this file has never been snapshotted"""
+    try:
+        with open(manifest_path(published_path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def current_snapshot(published_path):
+    """
+    Manifest entry of the current version with an absolute 'path' added, or None.
+    Entry keys: version, sha256, rows, created_at, file (and appended_to, the
+    sha256 of the version a write_appended() one extends)
+    """
+    manifest = read_manifest(published_path)
+    if not manifest:
+        return None
+    for entry in manifest['snapshots']:
+        if entry['version'] == manifest['current']:
+            return dict(entry, path=os.path.join(snapshot_dir(published_path), entry['file']))
+    return None
+
+
+def data_version(path):
+    """
+    (file to read, version) for a data file. Snapshotted files are read from their
+    current immutable snapshot and versioned by content hash; anything else by
+    [mtime_ns, size]. Raises FileNotFoundError if there is no data.
+    """
+    snapshot = current_snapshot(path)
+    if snapshot is not None:
+        return snapshot['path'], snapshot['sha256']
+    st = os.stat(path)
+    return path, [st.st_mtime_ns, st.st_size]
+
+
+def current_path(published_path):
+    """File holding the current version: its snapshot if there is one, else the file itself"""
+    snapshot = current_snapshot(published_path)
+    return snapshot['path'] if snapshot else published_path
+
+
+def _publish(snapshot_path, published_path):
+    """Atomically replace the published copy with a snapshot's contents"""
+    import shutil
+    with open(snapshot_path, newline='') as src:
+        atomic_write(os.path.abspath(published_path), lambda dst: shutil.copyfileobj(src, dst))
+
+
+def _save_manifest(published_path, current, entries):
+    manifest = {'current': current, 'snapshots': entries}
+    atomic_write(manifest_path(published_path), lambda f: json.dump(manifest, f, indent=2))
+
+
+def _prune(published_path, entries):
+    """Delete snapshot files that are no longer listed in the manifest"""
+    directory = snapshot_dir(published_path)
+    keep = {entry['file'] for entry in entries} | {MANIFEST_NAME}
+    for name in os.listdir(directory):
+        if name not in keep and not name.startswith('.tmp-'):
+            os.remove(os.path.join(directory, name))
+
+
+def write_snapshot(df, published_path, retain=None):
+    """
+    Write df as a new version of published_path and make it current.
+    Writing content identical to an existing version just makes that version
+    current again. Returns the manifest entry.
+    """
+    return _write_version(lambda f: df.to_csv(f, index=False), len(df), published_path, retain)
+
+
+def write_snapshot_rows(rows, columns, published_path, retain=None):
+    """
+    write_snapshot() for an iterable of row dicts (keys beyond columns are
+    ignored), streamed to disk without building a DataFrame
+    """
+    import csv
+    count = [0]
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count[0] += 1
+
+    return _write_version(write, count, published_path, retain)
+
+
+def write_appended(df, published_path, retain=None):
+    """
+    write_snapshot() of the current data with df's rows appended. The current
+    file is copied through byte for byte, never parsed, and df written after it
+    in that file's column order (columns it lacks are dropped, missing ones left
+    blank). Without current data this is write_snapshot(df).
+    """
+    import csv
+    import shutil
+    try:
+        source, _ = data_version(published_path)
+    except FileNotFoundError:
+        return write_snapshot(df, published_path, retain)
+    with open(source, newline='') as f:
+        columns = next(csv.reader([f.readline()]), None)
+    if not columns:
+        return write_snapshot(df, published_path, retain)
+
+    snapshot = current_snapshot(published_path)
+    if snapshot is not None:
+        rows = snapshot['rows']
+    else:
+        with open(source, newline='') as f:
+            rows = sum(1 for _ in csv.reader(f)) - 1
+
+    with open(source, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        terminated = f.read(1) == b'\n'
+
+    def write(f):
+        with open(source, newline='') as src:
+            shutil.copyfileobj(src, f)
+        if not terminated:
+            f.write('\n')
+        df.reindex(columns=columns).to_csv(f, index=False, header=False, lineterminator='\n')
+
+    parent = snapshot['sha256'] if snapshot is not None else None
+    return _write_version(write, rows + len(df), published_path, retain, appended_to=parent)
+
+
+def is_appended(published_path, base_version, version):
+    """
+    Whether snapshot `version` (sha256) of published_path is snapshot
+    `base_version` with rows appended: reached from it only through
+    write_appended() versions still listed in the manifest. Lets readers
+    holding results for base_version process just the new rows.
+    """
+    if not isinstance(version, str):
+        return False
+    manifest = read_manifest(published_path)
+    parents = {entry['sha256']: entry.get('appended_to') for entry in (manifest or {}).get('snapshots', [])}
+    seen = set()
+    while version in parents and version not in seen:
+        seen.add(version)
+        version = parents[version]
+        if version == base_version:
+            return True
+    return False
+
+
+def _write_version(write, rows, published_path, retain=None, appended_to=None):
+    """
+    Snapshot whatever write(file) writes; rows is the row count (or a one-item
+    list filled by write). appended_to is the sha256 of the version this one
+    extends with appended rows, recorded for is_appended().
+    """
+    import tempfile
+    retain = retain or SNAPSHOT_RETAIN
+    directory = snapshot_dir(published_path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        sha = _sha256(tmp)
+        version = sha[:16]
+        entry = {'version': version, 'sha256': sha, 'rows': rows[0] if isinstance(rows, list) else rows,
+                 'created_at': time.time(), 'file': f"{version}.csv"}
+        if appended_to is not None and appended_to != sha:
+            entry['appended_to'] = appended_to
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(directory, entry['file']))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    manifest = read_manifest(published_path) or {'snapshots': []}
+    entries = [entry] + [e for e in manifest['snapshots'] if e['version'] != version]
+    entries = entries[:retain]
+
+    _save_manifest(published_path, version, entries)
+    _publish(os.path.join(directory, entry['file']), published_path)
+    _prune(published_path, entries)
+    return entry
+
+
+def rollback(published_path, version):
+    """Make a retained version current again. Raises KeyError if it is not retained."""
+    manifest = read_manifest(published_path)
+    entries = manifest['snapshots'] if manifest else []
+    matches = [e for e in entries if e['version'].startswith(version)]
+    if len(matches) != 1:
+        raise KeyError(f"No unique retained snapshot matches {version!r}")
+    entry = matches[0]
+    _save_manifest(published_path, entry['version'], entries)
+    _publish(os.path.join(snapshot_dir(published_path), entry['file']), published_path)
+    return entry
+
+
+def main():
+    # Imported here: readers (including the fast CLI path) don't need argparse
+    import argparse
+    parser = argparse.ArgumentParser(description='List or roll back data snapshots')
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_parser = sub.add_parser('list', help='Show retained versions')
+    list_parser.add_argument('path', help='Published data file, e.g. protest_data_oversight.csv')
+    rollback_parser = sub.add_parser('rollback', help='Make a retained version current')
+    rollback_parser.add_argument('path', help='Published data file, e.g. protest_data_oversight.csv')
+    rollback_parser.add_argument('version', help='Version (or unique prefix) to restore')
+    args = parser.parse_args()
+
+    if args.command == 'rollback':
+        try:
+            entry = rollback(args.path, args.version)
+        except KeyError as e:
+            parser.exit(1, f"❌ {e.args[0]}\n")
+        print(f"✅ {args.path} rolled back to {entry['version']} ({entry['rows']} rows)")
+        return
+
+    manifest = read_manifest(args.path)
+    if not manifest:
+        print(f"No snapshots for {args.path}")
+        return
+    for entry in manifest['snapshots']:
+        marker = '*' if entry['version'] == manifest['current'] else ' '
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created_at']))
+        print(f"{marker} {entry['version']}  {created}  {entry['rows']:>8} rows")
+
+
+if __name__ == "__main__":
+    main()
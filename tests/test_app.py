@@ -7,6 +7,7 @@ import pytest
 import json
 import tempfile
 import os
+import app as app_module
 from app import app
 
 
@@ -137,6 +138,14 @@ class TestAPICheckPost:
         
         assert response.status_code == 400
     
+    def test_api_check_with_non_object_json(self, client):
+        """Test API endpoint with a JSON body that is not an object"""
+        for body in ("[]", '"Portland"', "null"):
+            response = client.post('/api/check', data=body,
+                                  content_type='application/json')
+            assert response.status_code == 400
+            assert json.loads(response.data) == {'error': 'JSON object required'}
+    
     def test_api_check_returns_json(self, client, monkeypatch):
         """Test that API returns proper JSON"""
         def mock_get_risk(city, csv_path='protest_data_oversight.csv'):
@@ -164,35 +173,47 @@ class TestAPICheckGet:
                 'search_term': city
             }
         
-        import calculator
-        monkeypatch.setattr(calculator, 'get_risk_for_city', mock_get_risk)
+        monkeypatch.setattr(app_module, 'get_risk_for_city', mock_get_risk)
         
         response = client.get('/api/check/Portland')
         assert response.status_code == 200
         data = json.loads(response.data)
-        assert 'risk_score' in data
+        assert data == {'risk_level': 'Medium', 'risk_score': 45, 'search_term': 'Portland'}
     
     def test_api_check_get_with_url_encoded_city(self, client, monkeypatch):
         """Test GET endpoint with URL-encoded city name"""
         def mock_get_risk(city, csv_path='protest_data_oversight.csv'):
             return {'risk_score': 30}
         
-        import calculator
-        monkeypatch.setattr(calculator, 'get_risk_for_city', mock_get_risk)
+        monkeypatch.setattr(app_module, 'get_risk_for_city', mock_get_risk)
         
         response = client.get('/api/check/Los%20Angeles')
         assert response.status_code == 200
+        assert json.loads(response.data) == {'risk_score': 30}
     
     def test_api_check_get_returns_json(self, client, monkeypatch):
         """Test that GET endpoint returns JSON"""
         def mock_get_risk(city, csv_path='protest_data_oversight.csv'):
             return {'risk_score': 50}
         
-        import calculator
-        monkeypatch.setattr(calculator, 'get_risk_for_city', mock_get_risk)
+        monkeypatch.setattr(app_module, 'get_risk_for_city', mock_get_risk)
         
         response = client.get('/api/check/Portland')
         assert response.content_type == 'application/json'
+    
+    def test_api_check_get_ambiguous_city(self, client, tmp_path, monkeypatch):
+        """Test a bare city name in several states returns the candidates and no score"""
+        import calculator
+        path = tmp_path / 'incidents.csv'
+        path.write_text('date,location,category\n'
+                        '2026-01-01,"Portland, OR",Concerning Use of Force\n'
+                        '2026-01-02,"Portland, ME",U.S. Citizen\n')
+        monkeypatch.setattr(app_module, 'get_risk_for_city',
+                            lambda city: calculator.get_risk_for_city(city, csv_path=str(path)))
+        
+        data = json.loads(client.get('/api/check/Portland').data)
+        assert data['ambiguous'] and 'risk_score' not in data
+        assert [c['location'] for c in data['candidates']] == ['Portland, OR', 'Portland, ME']
 
 
 class TestCitiesRoute:
@@ -326,6 +347,254 @@ class TestAPITimeline:
         assert data == []
 
 
+class TestAmbiguousCity:
+    """Tests that a city in several states gets candidates, not merged data, on every endpoint"""
+    
+    @pytest.fixture
+    def ambiguous_csv(self, tmp_path):
+        path = tmp_path / 'incidents.csv'
+        path.write_text(
+            "date,location,category,title\n"
+            '2026-01-01,"Portland, OR",Concerning Use of Force,Pepper spray\n'
+            '2026-01-02,"Portland, OR",U.S. Citizen,Citizen detained\n'
+            '2026-01-03,"Portland, ME",Concerning Use of Force,Pepper spray again\n'
+        )
+        return str(path)
+    
+    @staticmethod
+    def assert_candidates(response):
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['ambiguous']
+        assert data['candidates'] == [{'location': 'Portland, OR', 'total_incidents': 2},
+                                      {'location': 'Portland, ME', 'total_incidents': 1}]
+        return data
+    
+    def test_api_timeline(self, client, ambiguous_csv, monkeypatch):
+        """Test /api/timeline answers ambiguous input with the candidates"""
+        import calculator
+        monkeypatch.setattr(app_module, 'get_timeline_data',
+                            lambda city=None: calculator.get_timeline_data(city, csv_path=ambiguous_csv))
+        self.assert_candidates(client.get('/api/timeline?city=Portland'))
+        assert len(json.loads(client.get('/api/timeline?city=Portland, OR').data)) == 2
+    
+    def test_api_incidents(self, client, ambiguous_csv, monkeypatch):
+        """Test /api/incidents answers ambiguous input with the candidates"""
+        import calculator
+        get_incidents = calculator.get_incidents
+        monkeypatch.setattr(calculator, 'get_incidents', lambda *args: get_incidents(*args, csv_path=ambiguous_csv))
+        assert 'incidents' not in self.assert_candidates(client.get('/api/incidents?city=Portland'))
+        assert len(json.loads(client.get('/api/incidents?city=Portland, ME').data)['incidents']) == 1
+    
+    def test_api_search_and_ranking(self, client, ambiguous_csv, monkeypatch):
+        """Test /api/search and /api/ranking answer ambiguous input with the candidates"""
+        import calculator
+        get_search, get_ranking = calculator.get_search, calculator.get_ranking
+        monkeypatch.setattr(calculator, 'get_search', lambda *args: get_search(*args, csv_path=ambiguous_csv))
+        monkeypatch.setattr(calculator, 'get_ranking', lambda *args: get_ranking(*args, csv_path=ambiguous_csv))
+        self.assert_candidates(client.get('/api/search?q=pepper&city=Portland'))
+        self.assert_candidates(client.get('/api/ranking?city=Portland'))
+
+
+class TestAPIRanking:
+    """Tests for /api/ranking endpoint"""
+    
+    def test_api_ranking_passes_params(self, client, monkeypatch):
+        """Test query parameters reach get_ranking()"""
+        calls = []
+        def mock_get_ranking(top=20, as_of=None, city_input=None, csv_path='protest_data_oversight.csv'):
+            calls.append((top, as_of, city_input))
+            return {'as_of': as_of, 'half_life_days': 30.0, 'cities': []}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_ranking', mock_get_ranking)
+        
+        response = client.get('/api/ranking?top=5&as_of=2026-01-31&city=Portland')
+        assert response.status_code == 200
+        assert calls == [(5, '2026-01-31', 'Portland')]
+        assert json.loads(response.data)['as_of'] == '2026-01-31'
+    
+    def test_api_ranking_invalid_params(self, client):
+        """Test a non-integer top or bad date gives 400"""
+        assert client.get('/api/ranking?top=many').status_code == 400
+        assert client.get('/api/ranking?as_of=2026-13-45').status_code == 400
+    
+    def test_api_ranking_top_below_one(self, client, sample_csv, monkeypatch):
+        """Test a top below 1 gives 400 rather than a truncated list"""
+        import calculator
+        get_ranking = calculator.get_ranking
+        monkeypatch.setattr(calculator, 'get_ranking',
+                            lambda *args: get_ranking(*args, csv_path=sample_csv))
+        
+        assert client.get('/api/ranking?top=-3').status_code == 400
+        assert client.get('/api/ranking?top=0').status_code == 400
+        assert client.get('/api/ranking?top=1').status_code == 200
+
+
+class TestAPIIncidents:
+    """Tests for /api/incidents endpoint"""
+    
+    def test_api_incidents_passes_params(self, client, monkeypatch):
+        """Test query parameters reach get_incidents()"""
+        calls = []
+        def mock_get_incidents(city_input=None, category=None, cursor=None, limit=None, csv_path=None):
+            calls.append((city_input, category, cursor, limit))
+            return {'incidents': [], 'next_cursor': None}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_incidents', mock_get_incidents)
+        
+        response = client.get('/api/incidents?city=Portland&category=U.S. Citizen&cursor=abc&limit=5')
+        assert response.status_code == 200
+        assert calls == [('Portland', 'U.S. Citizen', 'abc', '5')]
+        assert json.loads(response.data)['next_cursor'] is None
+    
+    def test_api_incidents_invalid_params(self, client):
+        """Test a bad cursor or limit gives 400"""
+        assert client.get('/api/incidents?cursor=junk').status_code == 400
+        assert client.get('/api/incidents?limit=500').status_code == 400
+
+
+class TestAPISearch:
+    """Tests for /api/search endpoint"""
+    
+    def test_api_search_passes_params(self, client, monkeypatch):
+        """Test query parameters reach get_search()"""
+        calls = []
+        def mock_get_search(query, city_input=None, category=None, since=None, until=None, limit=None,
+                            csv_path=None):
+            calls.append((query, city_input, category, since, until, limit))
+            return {'query': query, 'total': 0, 'results': []}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_search', mock_get_search)
+        
+        response = client.get('/api/search?q=tear gas&city=Portland&category=Use of Force'
+                              '&since=2026-01-01&until=2026-01-31&limit=5')
+        assert response.status_code == 200
+        assert calls == [('tear gas', 'Portland', 'Use of Force', '2026-01-01', '2026-01-31', '5')]
+    
+    def test_api_search_invalid_params(self, client):
+        """Test a missing query or bad date gives 400"""
+        assert client.get('/api/search').status_code == 400
+        assert client.get('/api/search?q=gas&since=yesterday').status_code == 400
+
+
+class TestAPIFacets:
+    """Tests for /api/facets endpoint"""
+    
+    def test_api_facets_passes_params(self, client, monkeypatch):
+        """Test repeated filters and the month range reach get_facets()"""
+        calls = []
+        def mock_get_facets(states=(), categories=(), since=None, until=None, csv_path=None):
+            calls.append((states, categories, since, until))
+            return {'total': 0, 'filters': {}, 'facets': {}}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_facets', mock_get_facets)
+        
+        response = client.get('/api/facets?state=MN&state=IL&category=Use of Force&since=2025-12')
+        assert response.status_code == 200
+        assert calls == [(['MN', 'IL'], ['Use of Force'], '2025-12', None)]
+    
+    def test_api_facets_invalid_month(self, client):
+        """Test a bad month gives 400"""
+        assert client.get('/api/facets?since=soon').status_code == 400
+
+
+class TestAPIRollups:
+    """Tests for /api/check/state/<state> and /api/summary endpoints"""
+    
+    def test_api_check_state(self, client, monkeypatch):
+        """Test the state reaches get_risk_for_state() and city checks still route"""
+        calls = []
+        def mock_get_risk_for_state(state, csv_path=None):
+            calls.append(state)
+            return {'state': state.upper(), 'total_incidents': 4}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_risk_for_state', mock_get_risk_for_state)
+        
+        response = client.get('/api/check/state/mn')
+        assert response.status_code == 200
+        assert response.get_json()['state'] == 'MN'
+        assert calls == ['mn']
+    
+    def test_api_summary(self, client, monkeypatch):
+        """Test the summary is returned as JSON"""
+        import calculator
+        monkeypatch.setattr(calculator, 'get_summary', lambda csv_path=None: {'total_incidents': 7, 'states': []})
+        
+        response = client.get('/api/summary')
+        assert response.status_code == 200
+        assert response.get_json()['total_incidents'] == 7
+
+
+class TestHealthAndReadiness:
+    """Tests for /healthz and /readyz endpoints"""
+    
+    def test_healthz(self, client):
+        """Test liveness always answers ok"""
+        response = client.get('/healthz')
+        assert response.status_code == 200
+        assert response.get_json() == {'status': 'ok'}
+    
+    def test_readyz_before_and_after_warmup(self, client, monkeypatch):
+        """Test readiness is 503 until warm-up finishes, then 200 with its status"""
+        import warmup
+        monkeypatch.setattr(warmup, '_status', dict(warmup._status, ready=False))
+        assert client.get('/readyz').status_code == 503
+        
+        monkeypatch.setattr(warmup, '_status', {'ready': True, 'version': [1, 2], 'rows': 10, 'locations': 3,
+                                                'timings': {'search': 0.1}, 'warmed_at': 0})
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.get_json()['rows'] == 10
+
+
+class TestAPIRiskWhatIf:
+    """Tests for /api/risk/whatif and /api/risk/profiles"""
+    
+    def test_whatif_passes_overrides(self, client, monkeypatch):
+        """Test the body is split into overrides, top and base profile"""
+        calls = []
+        def mock_get_whatif(overrides, top=None, base_profile=None, csv_path='protest_data_oversight.csv'):
+            calls.append((overrides, top, base_profile))
+            return {'profile': {}, 'baseline': {}, 'cities': []}
+        
+        import calculator
+        monkeypatch.setattr(calculator, 'get_whatif', mock_get_whatif)
+        
+        response = client.post('/api/risk/whatif', json={
+            'weights': {'Use of Force': 3}, 'top': 10, 'profile': 'default'})
+        assert response.status_code == 200
+        assert calls == [({'weights': {'Use of Force': 3}}, 10, 'default')]
+    
+    def test_whatif_rejects_bad_profile(self, client):
+        """Test invalid weights, unknown settings and profiles give 400"""
+        assert client.post('/api/risk/whatif', json={'weights': {'Use of Force': 'x'}}).status_code == 400
+        assert client.post('/api/risk/whatif', json={'bogus': 1}).status_code == 400
+        assert client.post('/api/risk/whatif', json={'profile': 'nope'}).status_code == 400
+        assert client.post('/api/risk/whatif', json=[1, 2]).status_code == 400
+    
+    def test_whatif_rejects_top_below_one(self, client, sample_csv, monkeypatch):
+        """Test a top below 1 gives 400"""
+        import calculator
+        get_whatif = calculator.get_whatif
+        monkeypatch.setattr(calculator, 'get_whatif',
+                            lambda *args: get_whatif(*args, csv_path=sample_csv))
+        
+        response = client.post('/api/risk/whatif', json={'top': -2})
+        assert response.status_code == 400
+        assert 'top' in response.get_json()['error']
+    
+    def test_profiles(self, client):
+        """Test configured profiles are listed"""
+        data = json.loads(client.get('/api/risk/profiles').data)
+        assert 'default' in data
+        assert data['default']['weights']['Use of Force'] == 1.5
+
+
 class TestEdgeCases:
     """Edge case tests for the Flask app"""
     
@@ -373,3 +642,29 @@ class TestEdgeCases:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert data == []
+
+
+class TestInstrumentation:
+    """Tests for Server-Timing headers and the /metrics endpoint"""
+    
+    def test_server_timing_header_present(self, client):
+        """Test every response carries a Server-Timing header with a total"""
+        response = client.get('/api/last_updated')
+        assert 'Server-Timing' in response.headers
+        assert 'total;dur=' in response.headers['Server-Timing']
+    
+    def test_server_timing_includes_serialize(self, client):
+        """Test JSON endpoints report serialization time"""
+        response = client.get('/api/cities')
+        assert 'serialize;dur=' in response.headers['Server-Timing']
+    
+    def test_metrics_endpoint(self, client):
+        """Test /metrics returns Prometheus text format"""
+        client.get('/api/cities')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        body = response.data.decode()
+        assert 'protest_checker_request_duration_seconds_bucket' in body
+        assert 'endpoint="/api/cities"' in body
+        assert 'protest_checker_dataset_cache_hits_total' in body
@@ -0,0 +1,209 @@
+"""
+Test suite for the ASGI app (asgi_app.py)
+Tests routes, JSON contracts and background dataset reloads
+"""
+
+import pytest
+from starlette.testclient import TestClient
+import asgi_app
+from asgi_app import DatasetHolder
+
+
+@pytest.fixture
+def data_csv(tmp_path):
+    """Small incidents CSV"""
+    path = tmp_path / 'incidents.csv'
+    path.write_text(
+        "date,location,category,title,source_url\n"
+        '01/20/2026,"Portland, OR",Concerning Use of Force,Test incident 1,https://example.com/1\n'
+        '01/21/2026,"Portland, OR",U.S. Citizen,Test incident 2,https://example.com/2\n'
+        '01/22/2026,"Phoenix, AZ",Concerning Arrest/Detention,Test incident 3,https://example.com/3\n'
+    )
+    return path
+
+
+@pytest.fixture
+def client(data_csv, monkeypatch):
+    """ASGI test client serving the temporary dataset"""
+    monkeypatch.setattr(asgi_app, 'dataset', DatasetHolder(str(data_csv)))
+    monkeypatch.setattr(asgi_app, 'RELOAD_INTERVAL', 0)
+    with TestClient(asgi_app.app) as client:
+        yield client
+
+
+class TestASGIRoutes:
+    """Tests for the ASGI routes"""
+    
+    def test_index_loads(self, client):
+        """Test that index page loads"""
+        assert client.get('/').status_code == 200
+    
+    def test_api_check_get(self, client):
+        """Test GET check returns the same fields as the Flask app"""
+        data = client.get('/api/check/Portland').json()
+        assert data['total_incidents'] == 2
+        assert data['matched_cities'] == ['Portland, OR']
+        assert data['search_term'] == 'Portland'
+        assert 'timeline' in data
+        assert 'last_updated' in data
+    
+    def test_api_check_post(self, client):
+        """Test POST check with JSON body"""
+        response = client.post('/api/check', json={'city': 'Phoenix'})
+        assert response.status_code == 200
+        assert response.json()['total_incidents'] == 1
+    
+    def test_api_check_post_without_city(self, client):
+        """Test POST without a city returns 400"""
+        response = client.post('/api/check', json={})
+        assert response.status_code == 400
+        assert 'error' in response.json()
+    
+    def test_api_check_post_malformed_json(self, client):
+        """Test malformed JSON returns 400"""
+        response = client.post('/api/check', content=b'{"city": invalid}',
+                               headers={'content-type': 'application/json'})
+        assert response.status_code == 400
+    
+    def test_api_check_post_non_object_json(self, client):
+        """Test valid JSON that is not an object returns 400, not 500"""
+        for body in (b'[]', b'"Phoenix"', b'null'):
+            response = client.post('/api/check', content=body,
+                                   headers={'content-type': 'application/json'})
+            assert response.status_code == 400
+            assert response.json() == {'error': 'JSON object required'}
+    
+    def test_api_check_unknown_city(self, client):
+        """Test unknown city returns error with suggestions"""
+        data = client.get('/api/check/Boston').json()
+        assert 'error' in data
+        assert 'Portland, OR' in data['suggestions']
+    
+    def test_check_form(self, client):
+        """Test HTML form submission renders results"""
+        response = client.post('/check', data={'city': 'Portland'})
+        assert response.status_code == 200
+        assert 'Portland' in response.text
+    
+    def test_check_form_ambiguous(self, client, data_csv):
+        """Test a city in several states gets the candidates to pick on every route, not merged data"""
+        with open(data_csv, 'a') as f:
+            f.write('01/23/2026,"Portland, ME",U.S. Citizen,Test incident 4,\n')
+        asgi_app.dataset.refresh()
+        response = client.post('/check', data={'city': 'Portland'})
+        assert response.status_code == 200
+        assert 'Portland, OR (2 incidents)' in response.text
+        assert 'Portland, ME (1 incidents)' in response.text
+        assert 'Risk Score' not in response.text
+        assert client.get('/api/check/Portland').json()['ambiguous']
+        assert client.get('/api/timeline?city=Portland').json()['ambiguous']
+        incidents = client.get('/api/incidents?city=Portland').json()
+        assert incidents['ambiguous'] and 'incidents' not in incidents
+        assert client.get('/api/search?q=test&city=Portland').json()['ambiguous']
+        assert client.get('/api/ranking?city=Portland').json()['ambiguous']
+        assert len(client.get('/api/timeline?city=Portland, ME').json()) == 1
+    
+    def test_api_cities(self, client):
+        """Test cities endpoint"""
+        assert client.get('/api/cities').json() == ['Phoenix, AZ', 'Portland, OR']
+    
+    def test_api_timeline(self, client):
+        """Test timeline endpoint with and without city filter"""
+        assert len(client.get('/api/timeline').json()) == 3
+        assert len(client.get('/api/timeline?city=Phoenix').json()) == 1
+
+    def test_api_ranking(self, client):
+        """Test ranking endpoint orders locations and validates parameters"""
+        data = client.get('/api/ranking?as_of=2026-01-22').json()
+        assert data['as_of'] == '2026-01-22'
+        assert [entry['location'] for entry in data['cities']] == ['Portland, OR', 'Phoenix, AZ']
+        assert client.get('/api/ranking?city=Phoenix&top=1').json()['cities'][0]['rank'] == 2
+        assert client.get('/api/ranking?top=x').status_code == 400
+        assert client.get('/api/ranking?top=-3').status_code == 400
+
+    def test_api_incidents(self, client):
+        """Test incident pages follow the cursor and bad parameters are rejected"""
+        first = client.get('/api/incidents?city=Portland&limit=1').json()
+        assert [i['title'] for i in first['incidents']] == ['Test incident 2']
+        second = client.get(f"/api/incidents?city=Portland&limit=1&cursor={first['next_cursor']}").json()
+        assert [i['title'] for i in second['incidents']] == ['Test incident 1']
+        assert second['next_cursor'] is None
+        assert len(client.get('/api/incidents?category=Use of Force').json()['incidents']) == 1
+        assert client.get('/api/incidents?cursor=junk').status_code == 400
+        assert client.get('/api/incidents?limit=0').status_code == 400
+
+    def test_api_search(self, client):
+        """Test search ranks matching titles and validates parameters"""
+        data = client.get('/api/search?q=incident 3').json()
+        assert data['total'] == 3
+        assert data['results'][0]['title'] == 'Test incident 3'
+        assert client.get('/api/search?q=incident&city=Phoenix').json()['total'] == 1
+        assert client.get('/api/search').status_code == 400
+
+    def test_api_facets(self, client):
+        """Test facet counts under filters and validation"""
+        data = client.get('/api/facets').json()
+        assert data['total'] == 3
+        assert {'value': 'OR', 'count': 2} in data['facets']['state']
+        data = client.get('/api/facets?state=OR&category=U.S. Citizen').json()
+        assert data['total'] == 1
+        assert client.get('/api/facets?until=later').status_code == 400
+
+    def test_api_state_and_summary(self, client):
+        """Test state and national rollups of the served data"""
+        data = client.get('/api/check/state/or').json()
+        assert data['state'] == 'OR'
+        assert data['total_incidents'] == 2
+        assert data['cities'] == [{'location': 'Portland, OR', 'total_incidents': 2}]
+        assert 'last_updated' in data
+        assert 'suggestions' in client.get('/api/check/state/ZZ').json()
+        summary = client.get('/api/summary').json()
+        assert summary['total_incidents'] == 3
+        assert [state['state'] for state in summary['states']] == ['OR', 'AZ']
+
+    def test_health_and_readiness(self, client):
+        """Test the app is live and, once the dataset is warmed, ready"""
+        assert client.get('/healthz').json() == {'status': 'ok'}
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.json()['rows'] == 3
+        assert 'search' in response.json()['timings']
+
+    def test_api_risk_whatif(self, client):
+        """Test what-if rescoring and its validation"""
+        data = client.post('/api/risk/whatif', json={'weights': {'U.S. Citizen': 100}, 'top': 1}).json()
+        assert data['cities'][0]['location'] == 'Portland, OR'
+        assert data['cities'][0]['risk_score'] == 100
+        assert data['cities'][0]['baseline_score'] < 100
+        assert client.post('/api/risk/whatif', json={'weights': {'U.S. Citizen': 'x'}}).status_code == 400
+        assert client.post('/api/risk/whatif', json={'top': -2}).status_code == 400
+
+    def test_server_timing_header(self, client):
+        """Test responses carry Server-Timing"""
+        response = client.get('/api/check/Portland')
+        assert 'total;dur=' in response.headers['server-timing']
+        assert 'match;dur=' in response.headers['server-timing']
+
+
+class TestDatasetHolder:
+    """Tests for DatasetHolder reloads"""
+    
+    def test_refresh_swaps_only_on_change(self, data_csv):
+        """Test refresh loads once and swaps when the file changes"""
+        holder = DatasetHolder(str(data_csv))
+        assert holder.refresh() is True
+        first = holder.current
+        assert holder.refresh() is False
+        assert holder.current is first
+        
+        with open(data_csv, 'a') as f:
+            f.write('01/23/2026,"Boston, MA",U.S. Citizen,Test incident 4,https://example.com/4\n')
+        assert holder.refresh() is True
+        assert len(holder.current) == 4
+        assert len(first) == 3  # old snapshot untouched for in-flight requests
+    
+    def test_missing_file(self, tmp_path):
+        """Test a missing file leaves the holder empty"""
+        holder = DatasetHolder(str(tmp_path / 'missing.csv'))
+        assert holder.refresh() is False
+        assert holder.current is None
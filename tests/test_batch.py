@@ -0,0 +1,170 @@
+"""
+Test suite for batch.py and the checkers' batch modes
+Tests city input, ordered (parallel) scoring and JSONL/CSV output
+"""
+
+import csv
+import io
+import json
+import sys
+import pytest
+import protest_checker
+import risk_checker
+from batch import read_cities, score_cities, write_results
+
+
+def load_offset():
+    return 100
+
+
+def add_offset(city, offset):
+    return {'city': city, 'value': len(city) + offset}
+
+
+def load_missing():
+    raise FileNotFoundError('protest_data.csv')
+
+
+@pytest.fixture
+def cities_file(tmp_path):
+    path = tmp_path / 'cities.txt'
+    path.write_text("Portland\n\n# skipped\n  Phoenix  \nNowhere\n")
+    return str(path)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    (tmp_path / 'protest_data_oversight.csv').write_text(
+        "date,location,category,title,source_url\n"
+        '01/03/2026,"Portland, OR",Concerning Use of Force,First,\n'
+        '01/01/2026,"Phoenix, AZ",U.S. Citizen,Second,\n'
+    )
+    (tmp_path / 'protest_data.csv').write_text(
+        "city,state,date,type,description,source,severity\n"
+        "Portland,OR,2026-01-03,POLICE_VIOLENCE,First,,8\n"
+        "Portland,OR,Unknown,ICE_RAID,Second,,6\n"
+        "Phoenix,AZ,Unknown,ICE_RAID,Third,,5\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestReadCities:
+    """Tests for read_cities()"""
+
+    def test_skips_blank_and_comment_lines(self, cities_file):
+        """Test names are stripped and blanks/comments skipped"""
+        assert list(read_cities(cities_file)) == ['Portland', 'Phoenix', 'Nowhere']
+
+    def test_reads_stdin(self, monkeypatch):
+        """Test '-' reads from stdin"""
+        monkeypatch.setattr(sys, 'stdin', io.StringIO("Chicago\nDenver\n"))
+        assert list(read_cities('-')) == ['Chicago', 'Denver']
+
+
+class TestScoreCities:
+    """Tests for score_cities()"""
+
+    def test_serial_loads_once(self):
+        """Test data is loaded once and results keep input order"""
+        loads = []
+
+        def load():
+            loads.append(1)
+            return 0
+
+        results = list(score_cities(['a', 'bbb', 'cc'], load, add_offset))
+        assert [r['value'] for r in results] == [1, 3, 2]
+        assert loads == [1]
+
+    def test_parallel_keeps_order(self):
+        """Test worker processes return results in input order"""
+        cities = [f'city{"x" * i}' for i in range(40)]
+        results = list(score_cities(cities, load_offset, add_offset, workers=2))
+        assert [r['city'] for r in results] == cities
+        assert results[0]['value'] == 104
+
+    def test_parallel_load_error_raised(self):
+        """Test a worker that cannot load data fails the batch instead of hanging"""
+        with pytest.raises(FileNotFoundError):
+            list(score_cities(['a', 'b'], load_missing, add_offset, workers=2))
+
+
+class TestWriteResults:
+    """Tests for write_results()"""
+
+    def test_jsonl(self):
+        """Test one JSON object per line"""
+        out = io.StringIO()
+        count = write_results([{'a': 1}, {'a': 2}], 'jsonl', ['a'], out)
+        assert count == 2
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == [{'a': 1}, {'a': 2}]
+
+    def test_csv_flattens_lists(self):
+        """Test CSV rows use the given fields and join list values"""
+        out = io.StringIO()
+        write_results([{'a': ['x', 'y'], 'b': 2, 'extra': 3}, {'a': 'z'}], 'csv', ['a', 'b'], out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert rows == [{'a': 'x; y', 'b': '2'}, {'a': 'z', 'b': ''}]
+
+    def test_human(self):
+        """Test human format calls the printer for each result"""
+        printed = []
+        write_results([{'a': 1}], 'human', [], io.StringIO(), human=printed.append)
+        assert printed == [{'a': 1}]
+
+
+class TestCheckerBatchModes:
+    """Tests for --batch in protest_checker.py and risk_checker.py"""
+
+    def test_protest_checker_jsonl(self, data_dir, cities_file, capsys):
+        """Test protest_checker streams one result per city including misses"""
+        protest_checker.batch_main(['--batch', cities_file, '--format', 'jsonl'])
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r['search_term'] for r in results] == ['Portland', 'Phoenix', 'Nowhere']
+        assert results[0]['total_incidents'] == 1
+        assert results[0]['matched_cities'] == ['Portland, OR']
+        assert 'error' in results[2]
+
+    def test_protest_checker_csv(self, data_dir, cities_file, capsys):
+        """Test protest_checker CSV output has the documented columns"""
+        protest_checker.batch_main(['--batch', cities_file, '--format', 'csv'])
+
+        rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+        assert list(rows[0]) == protest_checker.CSV_FIELDS
+        assert rows[1]['risk_level'] == 'Low'
+
+    def test_risk_checker_csv(self, data_dir, cities_file, capsys):
+        """Test risk_checker batch CSV, including cities without data"""
+        risk_checker.batch_main(['--batch', cities_file, '--format', 'csv'])
+
+        rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+        assert [r['city'] for r in rows] == ['Portland', 'Phoenix', 'Nowhere']
+        assert rows[0]['total_count'] == '1'
+        assert rows[1]['error'] == 'no date data'
+        assert rows[2]['error'] == 'no data'
+
+    def test_risk_checker_single_city_output(self, data_dir, capsys):
+        """Test the interactive single-city report is unchanged"""
+        risk_checker.calculate_risk('portland')
+
+        output = capsys.readouterr().out
+        assert 'PROTEST SAFETY ASSESSMENT: PORTLAND' in output
+        assert 'Last 6 months: 1 incidents' in output
+        assert '2026-01-03 | POLICE_VIOLENCE' in output
+
+    def test_risk_checker_ambiguous_city(self, data_dir, capsys):
+        """Test a city name in several states lists them unless the state is given"""
+        with open(data_dir / 'protest_data.csv', 'a') as f:
+            f.write("Portland,ME,2026-01-02,ICE_RAID,Fourth,,4\n")
+        data = risk_checker.load_data()
+
+        result = risk_checker.assess_city('Portland', data)
+        assert result['error'] == 'ambiguous' and 'score' not in result
+        assert result['candidates'] == [{'location': 'Portland, OR', 'total_incidents': 2},
+                                        {'location': 'Portland, ME', 'total_incidents': 1}]
+        assert risk_checker.assess_city('Portland, ME', data)['total_count'] == 1
+
+        risk_checker.print_assessment(result)
+        assert 'Portland, ME (1 incidents)' in capsys.readouterr().out
@@ -15,8 +15,11 @@ from calculator import (
     get_last_updated,
     get_all_cities,
     get_timeline_data,
-    get_risk_for_city
+    get_risk_for_city,
+    load_dataset,
+    preload_dataset
 )
+import metrics
 
 
 class TestNormalizeCityInput:
@@ -259,6 +262,19 @@ class TestCalculateRiskScore:
         
         assert len(result['recent_incidents']) == 5
     
+    def test_recent_incidents_newest_first(self):
+        """Test recent incidents are the latest by date, not the first in the file"""
+        df = pd.DataFrame({
+            'location': ['City'] * 7,
+            'category': ['Use of Force'] * 7,
+            'date': ['2026-01-01', 'Unknown', '2026-01-03', '2026-01-02', '2026-01-07', '2026-01-05', '2026-01-06'],
+            'description': [f'Incident {i}' for i in range(7)]
+        })
+        result = calculate_risk_score(df)
+        
+        assert [i['description'] for i in result['recent_incidents']] == [
+            'Incident 4', 'Incident 6', 'Incident 5', 'Incident 2', 'Incident 3']
+    
     def test_nan_values_handled(self):
         """Test NaN values are handled properly"""
         df = pd.DataFrame({
@@ -504,6 +520,25 @@ class TestGetRiskForCity:
         finally:
             os.unlink(temp_path)
     
+    def test_recent_incidents_merged_across_cities(self):
+        """Test recent incidents of several matched spellings of a city are the newest overall"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write("location,date,category,description\n")
+            f.write('"St. Paul, MN",2026-01-01,Use of Force,Test1\n')
+            f.write('"St Paul, MN",2026-01-04,Use of Force,Test2\n')
+            f.write('"St. Paul, MN",Unknown,Use of Force,Test3\n')
+            f.write('"St. Paul, MN",2026-01-05,Use of Force,Test4\n')
+            f.write('"St Paul, MN",2026-01-02,Use of Force,Test5\n')
+            temp_path = f.name
+        
+        try:
+            result = get_risk_for_city("Saint Paul", csv_path=temp_path)
+            
+            assert [i['description'] for i in result['recent_incidents']] == [
+                'Test4', 'Test2', 'Test5', 'Test1', 'Test3']
+        finally:
+            os.unlink(temp_path)
+    
     def test_city_not_found(self):
         """Test handling of city not found"""
         with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
@@ -575,3 +610,95 @@ class TestGetRiskForCity:
             assert 'Portland, ME' in result['matched_cities']
         finally:
             os.unlink(temp_path)
+
+
+class TestLoadDataset:
+    """Tests for load_dataset() caching and preload_dataset() pinning"""
+    
+    def test_cached_until_file_changes(self):
+        """Test repeated loads reuse the Dataset until the file changes"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write("location,date,category,description\n")
+            f.write('"Portland, OR",2026-01-01,Use of Force,Test1\n')
+            temp_path = f.name
+        
+        try:
+            first = load_dataset(temp_path)
+            hits = metrics.DATASET_CACHE_HITS.value()
+            assert load_dataset(temp_path) is first
+            assert metrics.DATASET_CACHE_HITS.value() == hits + 1
+            
+            reloads = metrics.DATASET_RELOADS.value()
+            with open(temp_path, 'a') as f:
+                f.write('"Phoenix, AZ",2026-01-02,U.S. Citizen,Test2\n')
+            second = load_dataset(temp_path)
+            assert second is not first
+            assert len(second) == 2
+            assert metrics.DATASET_RELOADS.value() == reloads + 1
+        finally:
+            os.unlink(temp_path)
+    
+    def test_missing_file_raises(self):
+        """Test missing files raise FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            load_dataset('/nonexistent/file.csv')
+    
+    def test_preload_pins_dataset(self):
+        """Test a preloaded dataset is served even after the file changes"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write("location,date,category,description\n")
+            f.write('"Portland, OR",2026-01-01,Use of Force,Test1\n')
+            temp_path = f.name
+        
+        try:
+            pinned = preload_dataset(temp_path)
+            with open(temp_path, 'a') as f:
+                f.write('"Phoenix, AZ",2026-01-02,U.S. Citizen,Test2\n')
+            assert load_dataset(temp_path) is pinned
+            assert get_risk_for_city("Phoenix", csv_path=temp_path)['error']
+            
+            # Preloading again is the coordinated reload
+            assert len(preload_dataset(temp_path)) == 2
+            assert get_risk_for_city("Phoenix", csv_path=temp_path)['total_incidents'] == 1
+        finally:
+            import calculator
+            calculator._pinned_datasets.pop(os.path.abspath(temp_path), None)
+            os.unlink(temp_path)
+
+
+class TestDatasetParity:
+    """Tests that Dataset-backed results match the DataFrame functions"""
+    
+    @pytest.fixture
+    def csv_path(self):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write("date,location,category,title,source_url\n")
+            f.write('01/02/2026,"Portland, OR",Concerning Use of Force,First,https://a.example/1\n')
+            f.write('01/01/2026,"Portland, ME","Concerning Arrest/Detention, U.S. Citizen",Second,\n')
+            f.write('Unknown,"Phoenix, AZ",Enforcement Action at a Sensitive Location,Third,https://a.example/3\n')
+            f.write('01/02/2026,"Portland, OR",U.S. Citizen,Fourth,https://a.example/4\n')
+            temp_path = f.name
+        yield temp_path
+        os.unlink(temp_path)
+    
+    def test_risk_matches_dataframe_scoring(self, csv_path):
+        """Test counts, score and recent incidents equal calculate_risk_score()"""
+        df = pd.read_csv(csv_path)
+        expected = calculate_risk_score(find_matching_cities("Portland, OR", df))
+        result = get_risk_for_city("Portland, OR", csv_path=csv_path)
+        
+        for key, value in expected.items():
+            assert result[key] == value, key
+        assert result['matched_cities'] == ['Portland, OR']
+    
+    def test_timeline_skips_unknown_dates(self, csv_path):
+        """Test timeline counts per day and drops Unknown dates"""
+        assert get_timeline_data(csv_path=csv_path) == [
+            {'date': '2026-01-01', 'count': 1},
+            {'date': '2026-01-02', 'count': 2}
+        ]
+    
+    def test_missing_values_are_none(self, csv_path):
+        """Test missing values come back as None"""
+        result = get_risk_for_city("Portland, ME", csv_path=csv_path)
+        assert result['recent_incidents'][0]['source_url'] is None
@@ -0,0 +1,128 @@
+"""
+Test suite for cli_index.py and the protest_checker.py CLI
+Tests that index lookups match the full engine and that stale indexes rebuild
+"""
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+import calculator
+import cli_index
+import protest_checker
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'protest_data_oversight.csv'
+    path.write_text(
+        "date,location,category,title,source_url\n"
+        '01/03/2026,"Portland, OR",Concerning Use of Force,First,https://a.example/1\n'
+        '01/02/2026,"Portland, ME","Concerning Arrest/Detention, U.S. Citizen",Second,\n'
+        '01/01/2026,"Phoenix, AZ",Enforcement Action at a Sensitive Location,Third,https://a.example/3\n'
+        '01/01/2026,"Portland, OR",U.S. Citizen,Fourth,https://a.example/4\n'
+        'Unknown,"New York City, NY",Concerning Use of Force,Fifth,https://a.example/5\n'
+    )
+    return str(path)
+
+
+class TestQuery:
+    """Tests that index answers equal get_risk_for_city()"""
+
+    @pytest.mark.parametrize('city', [
+        'Portland', 'portland, or', 'Portland ME', 'phoenix', 'phoeni', 'New York', 'york', 'Nowhere'
+    ])
+    def test_matches_engine(self, csv_path, city):
+        """Test every field the index returns equals the full engine's value"""
+        expected = calculator.get_risk_for_city(city, csv_path=csv_path)
+        result = cli_index.check_city(city, csv_path)
+
+        for key in ('timeline', 'last_updated'):
+            expected.pop(key, None)
+        assert result == expected
+
+    def test_missing_data_file(self, tmp_path):
+        """Test a missing data file gives the engine's error"""
+        result = cli_index.check_city('Portland', str(tmp_path / 'missing.csv'))
+        assert result == {'error': 'Data file not found. Please run scraper first.'}
+
+
+class TestIndexFile:
+    """Tests for writing, validating and rebuilding the index file"""
+
+    def test_written_next_to_data(self, csv_path):
+        """Test get_index() writes the file with a version header line"""
+        cli_index.get_index(csv_path)
+        path = cli_index.index_path(csv_path)
+        assert path.endswith('protest_data_oversight.index.json')
+        with open(path) as f:
+            header = json.loads(f.readline())
+        assert header['format'] == cli_index.INDEX_FORMAT
+
+    def test_stale_index_rebuilt(self, csv_path):
+        """Test a data change invalidates the index and the next lookup sees it"""
+        cli_index.get_index(csv_path)
+        assert cli_index.load_index(csv_path) is not None
+
+        with open(csv_path, 'a') as f:
+            f.write('01/04/2026,"Tucson, AZ",U.S. Citizen,Sixth,\n')
+        os.utime(csv_path, ns=(0, 0))
+        assert cli_index.load_index(csv_path) is None
+        assert cli_index.check_city('Tucson', csv_path)['total_incidents'] == 1
+        assert cli_index.load_index(csv_path) is not None
+
+    def test_corrupt_index_ignored(self, csv_path):
+        """Test an unreadable index is treated as missing"""
+        with open(cli_index.index_path(csv_path), 'w') as f:
+            f.write('not json')
+        assert cli_index.load_index(csv_path) is None
+        assert cli_index.check_city('Phoenix', csv_path)['total_incidents'] == 1
+
+    def test_no_heavy_imports(self, csv_path):
+        """Test answering from a current index doesn't import pandas"""
+        cli_index.get_index(csv_path)
+        code = ("import sys, cli_index; cli_index.check_city('Portland', sys.argv[1]); "
+                "print('pandas' in sys.modules or 'numpy' in sys.modules)")
+        repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code, csv_path], cwd=repo,
+                                capture_output=True, text=True, check=True).stdout
+        assert output.strip() == 'False'
+
+
+class TestProtestChecker:
+    """Tests for the protest_checker.py CLI output"""
+
+    def test_prints_risk(self, csv_path, monkeypatch, capsys):
+        """Test the CLI prints risk level, statistics and recent incidents"""
+        monkeypatch.chdir(os.path.dirname(csv_path))
+        monkeypatch.setattr(sys, 'argv', ['protest_checker.py', 'Portland, OR'])
+        protest_checker.main()
+
+        output = capsys.readouterr().out
+        assert 'RISK LEVEL: Low' in output
+        assert 'Total incidents: 2' in output
+        assert '[01/03/2026] First' in output
+
+    def test_ambiguous_city(self, csv_path, monkeypatch, capsys):
+        """Test a city in several states lists the candidates instead of a score"""
+        monkeypatch.chdir(os.path.dirname(csv_path))
+        monkeypatch.setattr(sys, 'argv', ['protest_checker.py', 'Portland'])
+        with pytest.raises(SystemExit):
+            protest_checker.main()
+
+        output = capsys.readouterr().out
+        assert 'RISK LEVEL' not in output
+        assert 'Portland, OR (2 incidents)' in output
+        assert 'Portland, ME (1 incidents)' in output
+
+    def test_unknown_city(self, csv_path, monkeypatch, capsys):
+        """Test an unknown city prints the error and suggestions"""
+        monkeypatch.chdir(os.path.dirname(csv_path))
+        monkeypatch.setattr(sys, 'argv', ['protest_checker.py', 'Nowhere'])
+        with pytest.raises(SystemExit):
+            protest_checker.main()
+
+        output = capsys.readouterr().out
+        assert 'No data found for "Nowhere"' in output
+        assert 'Phoenix, AZ' in output
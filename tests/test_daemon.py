@@ -0,0 +1,120 @@
+"""
+Test suite for daemon.py
+Tests that daemon answers match the in-process CLI path and that the client
+falls back cleanly when no daemon is running
+"""
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import pytest
+import cli_index
+import daemon
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'protest_data_oversight.csv'
+    path.write_text(
+        "date,location,category,title,source_url\n"
+        '01/03/2026,"Portland, OR",Concerning Use of Force,First,https://a.example/1\n'
+        '01/02/2026,"Portland, ME","Concerning Arrest/Detention, U.S. Citizen",Second,\n'
+        '01/01/2026,"Phoenix, AZ",Enforcement Action at a Sensitive Location,Third,https://a.example/3\n'
+    )
+    return str(path)
+
+
+@pytest.fixture
+def sock_path(monkeypatch):
+    # Unix socket paths are limited to ~100 bytes, too short for pytest's tmp_path
+    directory = tempfile.mkdtemp(prefix='pcd-')
+    path = os.path.join(directory, 'd.sock')
+    monkeypatch.setenv('PROTEST_CHECKER_SOCKET', path)
+    monkeypatch.delenv('PROTEST_CHECKER_DAEMON', raising=False)
+    yield path
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def running(sock_path, csv_path):
+    thread = threading.Thread(target=daemon.serve, args=(sock_path, [csv_path], 0.05), daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while daemon.request({'op': 'ping'}, sock_path) is None:
+        assert time.time() < deadline, 'daemon did not start'
+        time.sleep(0.02)
+    yield thread
+    daemon.request({'op': 'stop'}, sock_path)
+    thread.join(5)
+
+
+class TestDaemon:
+    """Tests for queries answered by a running daemon"""
+
+    @pytest.mark.parametrize('city', ['Portland', 'portland, me', 'phoeni', 'Nowhere'])
+    def test_matches_cli_index(self, running, csv_path, city):
+        """Test daemon answers equal the in-process index lookup"""
+        assert daemon.check_city(city, csv_path) == cli_index.check_city(city, csv_path)
+
+    def test_missing_data_file(self, running, tmp_path):
+        """Test a data file that doesn't exist gives the usual error"""
+        result = daemon.check_city('Portland', str(tmp_path / 'missing.csv'))
+        assert result == {'error': 'Data file not found. Please run scraper first.'}
+
+    def test_reloads_changed_data(self, running, csv_path):
+        """Test the daemon picks up rows appended to the data file"""
+        assert daemon.check_city('Phoenix', csv_path)['total_incidents'] == 1
+        with open(csv_path, 'a') as f:
+            f.write('01/04/2026,"Phoenix, AZ",Concerning Use of Force,Fourth,\n')
+
+        deadline = time.time() + 10
+        while daemon.check_city('Phoenix', csv_path)['total_incidents'] != 2:
+            assert time.time() < deadline, 'daemon did not reload'
+            time.sleep(0.05)
+
+    def test_refuses_second_daemon(self, running, sock_path):
+        """Test serve() exits rather than stealing a live daemon's socket"""
+        with pytest.raises(SystemExit):
+            daemon.serve(sock_path, [])
+
+    def test_stop_removes_socket(self, running, sock_path):
+        """Test the stop op shuts the server down and cleans up the socket"""
+        assert daemon.request({'op': 'stop'}, sock_path) == {'ok': True}
+        running.join(5)
+        assert not running.is_alive()
+        assert not os.path.exists(sock_path)
+
+
+class TestClientFallback:
+    """Tests that the client returns None so the CLI answers in-process"""
+
+    def test_no_socket(self, sock_path, csv_path):
+        """Test no daemon means None"""
+        assert daemon.check_city('Portland', csv_path) is None
+
+    def test_disabled(self, running, csv_path, monkeypatch):
+        """Test PROTEST_CHECKER_DAEMON=0 skips a running daemon"""
+        with monkeypatch.context() as m:
+            m.setenv('PROTEST_CHECKER_DAEMON', '0')
+            assert daemon.check_city('Portland', csv_path) is None
+
+    def test_stale_socket(self, sock_path, csv_path):
+        """Test a socket file nobody listens on gives None and is replaced by serve()"""
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(sock_path)
+        stale.close()
+        assert daemon.check_city('Portland', csv_path) is None
+
+        thread = threading.Thread(target=daemon.serve, args=(sock_path, [csv_path]), daemon=True)
+        thread.start()
+        try:
+            deadline = time.time() + 10
+            while daemon.request({'op': 'ping'}, sock_path) is None:
+                assert time.time() < deadline, 'daemon did not replace stale socket'
+                time.sleep(0.02)
+        finally:
+            daemon.request({'op': 'stop'}, sock_path)
+            thread.join(5)
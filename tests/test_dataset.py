@@ -0,0 +1,109 @@
+"""
+Test suite for dataset.py
+Tests columnar storage, location index, recency order and row reconstruction
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from dataset import UNKNOWN_DAY, Dataset, TextColumn, most_recent, normalize_locations, recency_keys
+
+
+@pytest.fixture
+def dataset():
+    df = pd.DataFrame({
+        'date': ['01/02/2026', '01/01/2026', 'Unknown', '01/02/2026'],
+        'location': ['Portland, OR', ' Phoenix, AZ', 'Portland, OR', None],
+        'category': ['Use of Force', 'U.S. Citizen', 'Use of Force', 'U.S. Citizen'],
+        'title': ['First', 'Second', None, 'Fourth'],
+        'severity': [3, 1, 3, 2],
+    })
+    return Dataset(df)
+
+
+class TestDataset:
+    """Tests for the Dataset class"""
+
+    def test_coded_columns_are_int32(self, dataset):
+        """Test location, date and category are stored as int32 codes"""
+        for column in ('location', 'date', 'category'):
+            assert dataset.codes(column).dtype == np.int32
+        assert dataset.codes('location')[3] == -1
+
+    def test_text_column_round_trip(self, dataset):
+        """Test packed text columns return the original strings and None"""
+        assert [dataset.record(i)['title'] for i in range(4)] == ['First', 'Second', None, 'Fourth']
+
+    def test_record_has_native_types(self, dataset):
+        """Test records carry plain Python values plus location_normalized"""
+        record = dataset.record(1)
+        assert record['severity'] == 1
+        assert type(record['severity']) is int
+        assert record['location_normalized'] == 'phoenix az'
+
+    def test_rows_for_locations(self, dataset):
+        """Test the location index returns rows in file order"""
+        portland = list(dataset.location_names).index('Portland, OR')
+        phoenix = list(dataset.location_names).index('Phoenix, AZ')
+        assert dataset.rows_for_locations([portland]).tolist() == [0, 2]
+        assert dataset.rows_for_locations([portland, phoenix]).tolist() == [0, 1, 2]
+        assert dataset.rows_for_locations([]).tolist() == []
+        assert dataset.first_row(phoenix) == 1
+
+    def test_recent_rows_newest_first(self):
+        """Test each location's rows come newest first, Unknown last, file order on ties"""
+        dataset = Dataset(pd.DataFrame({
+            'date': ['2026-01-01', 'Unknown', '2026-01-03', '2026-01-02', '2026-01-03', '2026-01-05'],
+            'location': ['Portland, OR', 'Portland, OR', 'Portland, OR', 'Phoenix, AZ', 'Portland, OR',
+                         'Phoenix, AZ'],
+        }))
+        portland = list(dataset.location_names).index('Portland, OR')
+        phoenix = list(dataset.location_names).index('Phoenix, AZ')
+        assert dataset.recent_rows([portland], 5).tolist() == [2, 4, 0, 1]
+        assert dataset.recent_rows([portland], 2).tolist() == [2, 4]
+        assert dataset.recent_rows([portland, phoenix], 3).tolist() == [5, 2, 4]
+        assert dataset.recent_rows([phoenix, portland], 10).tolist() == [5, 2, 4, 3, 0, 1]
+        assert dataset.recent_rows([], 5).tolist() == []
+        assert dataset.recency_rank.tolist() == [4, 5, 1, 3, 2, 0]
+
+    def test_value_counts_excludes_missing(self, dataset):
+        """Test value_counts() counts codes over selected rows"""
+        codes, counts = dataset.value_counts('category', rows=np.array([0, 1, 2]))
+        values = dataset.values('category')
+        assert dict(zip(values[codes], counts)) == {'Use of Force': 2, 'U.S. Citizen': 1}
+
+    def test_unparseable_dates_have_no_day(self, dataset):
+        """Test date_days maps Unknown dates to None"""
+        days = dict(zip(dataset.values('date'), dataset.date_days))
+        assert days == {'01/02/2026': '2026-01-02', '01/01/2026': '2026-01-01', 'Unknown': None}
+
+    def test_missing_location_column(self):
+        """Test a table without a location column still builds"""
+        dataset = Dataset(pd.DataFrame({'date': ['01/01/2026']}))
+        assert len(dataset) == 1
+        assert dataset.record(0)['location_normalized'] is None
+
+
+class TestHelpers:
+    """Tests for module helpers"""
+
+    def test_normalize_locations(self):
+        """Test vectorized normalization matches normalize_city_input()"""
+        series = pd.Series(['  Portland,  OR ', 'Washington, DC'])
+        assert normalize_locations(series).tolist() == ['portland or', 'washington dc']
+
+    def test_text_column_unicode(self):
+        """Test multi-byte UTF-8 text survives packing"""
+        column = TextColumn(pd.Series(['São Paulo', None, '']))
+        assert [column.get(i) for i in range(3)] == ['São Paulo', None, '']
+
+    def test_recency_keys(self):
+        """Test later dates get larger keys and Unknown dates the smallest"""
+        keys = recency_keys(['2026-01-02', 'Unknown', '2026-01-10', None])
+        assert keys[2] > keys[0] > keys[1] == keys[3] == UNKNOWN_DAY
+
+    def test_most_recent(self):
+        """Test the k newest positions come newest first with ties in input order"""
+        assert most_recent([3, 9, 5, 9, 1], 3).tolist() == [1, 3, 2]
+        assert most_recent([3, 9], 5).tolist() == [1, 0]
+        assert most_recent([], 5).tolist() == []
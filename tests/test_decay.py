@@ -0,0 +1,213 @@
+"""
+Test suite for decay.py
+Tests decayed scores against a direct per-incident computation, incremental
+appends and extension of reloaded datasets
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import decay
+from dataset import Dataset
+from snapshots import UNIFIED_PATH, data_version, write_appended, write_snapshot
+
+
+def day(value):
+    return decay.parse_day(value)
+
+
+def snapshot_dataset(path):
+    source, version = data_version(path)
+    return Dataset.from_csv(source, signature=version)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'date': ['01/01/2026', '01/20/2026', 'Unknown', '01/10/2026', '01/15/2026'],
+        'location': ['Portland, OR', 'Portland, OR', 'Phoenix, AZ', 'Phoenix, AZ', 'Chicago, IL'],
+        'category': ['Concerning Use of Force', 'U.S. Citizen', None,
+                     'Enforcement Action at a Sensitive Location', 'Concerning Arrest/Detention'],
+        'title': ['a', 'b', 'c', 'd', 'e'],
+    })
+
+
+def expected_scores(frame, as_of, half_life=decay.HALF_LIFE_DAYS, undated_age=decay.UNDATED_AGE_DAYS):
+    """Direct computation: every incident decayed by its own age"""
+    scores = {}
+    severity = decay.category_severity(frame['category'])
+    for i, row in frame.iterrows():
+        parsed = pd.to_datetime(row['date'], errors='coerce')
+        age = undated_age if pd.isna(parsed) else as_of - day(parsed.date().isoformat())
+        scores[row['location']] = scores.get(row['location'], 0) + severity[i] * 0.5 ** (age / half_life)
+    return scores
+
+
+class TestScores:
+    """Tests for the decayed score of each location"""
+
+    @pytest.mark.parametrize('as_of', ['2026-01-20', '2026-03-01', '2027-01-01'])
+    def test_matches_direct_computation(self, frame, as_of):
+        """Test lazily decayed sums equal decaying each incident separately"""
+        engine = decay.DecayedScores.from_frame(frame)
+        expected = expected_scores(frame, day(as_of))
+        scores = engine.scores(day(as_of))
+        for name, value in expected.items():
+            assert scores[engine.names.index(name)] == pytest.approx(value)
+
+    def test_half_life(self):
+        """Test one incident's score halves every half-life"""
+        engine = decay.DecayedScores(half_life_days=10).append(['X'], [day('2026-01-01')], [4.0])
+        assert engine.scores(day('2026-01-01'))[0] == pytest.approx(4.0)
+        assert engine.scores(day('2026-01-11'))[0] == pytest.approx(2.0)
+        assert engine.scores(day('2026-01-21'))[0] == pytest.approx(1.0)
+
+    def test_severity_column(self):
+        """Test the seed/clean schema uses its severity column and city, state"""
+        df = pd.DataFrame({'city': ['Chicago', 'Chicago'], 'state': ['IL', 'IL'],
+                           'date': ['2026-01-01', '2026-01-01'], 'severity': [8, None]})
+        engine = decay.DecayedScores.from_frame(df)
+        assert engine.names == ['Chicago, IL']
+        assert engine.scores(day('2026-01-01'))[0] == pytest.approx(8 + decay.DEFAULT_SEVERITY)
+
+    def test_dataset_matches_frame(self, frame):
+        """Test the columnar Dataset path gives the same scores as the DataFrame path"""
+        from_frame = decay.DecayedScores.from_frame(frame)
+        from_dataset = decay.DecayedScores.from_dataset(Dataset(frame))
+        assert from_dataset.names == from_frame.names
+        assert np.allclose(from_dataset.scores(day('2026-02-01')), from_frame.scores(day('2026-02-01')))
+
+
+class TestIncremental:
+    """Tests that appending incidents equals scoring everything at once"""
+
+    def test_append_in_batches(self, frame):
+        """Test appending row by row gives the same scores as one batch"""
+        whole = decay.DecayedScores.from_frame(frame)
+        engine = decay.DecayedScores()
+        severity = decay.category_severity(frame['category'])
+        days = decay.to_days(frame['date'])
+        for i in range(len(frame)):
+            engine.append([frame['location'][i]], days[i:i + 1], severity[i:i + 1])
+        assert engine.names == whole.names
+        assert np.allclose(engine.scores(day('2026-02-01')), whole.scores(day('2026-02-01')))
+
+    def test_rebase_keeps_scores(self):
+        """Test incidents far past the reference day rebase instead of overflowing"""
+        engine = decay.DecayedScores(half_life_days=1)
+        engine.append(['X'], [day('2020-01-01')], [1.0])
+        engine.append(['Y'], [day('2026-01-01')], [1.0])
+        scores = engine.scores(day('2026-01-01'))
+        assert np.isfinite(scores).all()
+        assert scores[1] == pytest.approx(1.0)
+        assert engine.reference_day == day('2026-01-01')
+
+    def test_extend_appended_dataset(self, frame):
+        """Test extend() adds only the new rows of an appended dataset"""
+        engine = decay.DecayedScores.from_dataset(Dataset(frame.iloc[:3])).extend(Dataset(frame))
+        assert engine.rows_seen == len(frame)
+        whole = decay.DecayedScores.from_dataset(Dataset(frame))
+        assert np.allclose(engine.scores(day('2026-02-01')), whole.scores(day('2026-02-01')))
+
+    def test_scores_for_extends_appended_snapshot(self, frame, tmp_path):
+        """Test scores_for() extends the last engine when the file's snapshot was appended to"""
+        path = str(tmp_path / 'data.csv')
+        write_snapshot(frame.iloc[:3], path)
+        first = decay.scores_for(path, snapshot_dataset(path))
+        write_appended(frame.iloc[3:], path)
+        second = decay.scores_for(path, snapshot_dataset(path))
+        assert second is not first
+        assert first.rows_seen == 3
+        assert second.rows_seen == len(frame)
+        assert decay.scores_for(path, snapshot_dataset(path)) is second
+        decay._engines.pop(path)
+
+    def test_scores_for_rebuilds_rewrite(self, frame, tmp_path, monkeypatch):
+        """Test a rewritten file (not the last snapshot plus rows) is rescored from scratch"""
+        path = str(tmp_path / 'data.csv')
+        write_snapshot(frame.iloc[:3], path)
+        decay.scores_for(path, snapshot_dataset(path))
+        write_snapshot(frame.iloc[::-1].reset_index(drop=True), path)
+        monkeypatch.setattr(decay.DecayedScores, 'extend', lambda self, dataset: pytest.fail('extended a rewrite'))
+        assert decay.scores_for(path, snapshot_dataset(path)).rows_seen == len(frame)
+        decay._engines.pop(path)
+
+    def test_scores_for_extends_ingested_rows(self, tmp_path, monkeypatch):
+        """Test rows ingest.py adds to the unified file extend the scores, no rescan"""
+        import ingest
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'protest_data_oversight.csv').write_text(
+            "date,location,category,title,source_url\n"
+            '01/03/2026,"Portland, OR",Concerning Use of Force,Tear gas,https://news.example.com/a\n'
+            '01/05/2026,"Phoenix, AZ",U.S. Citizen,Citizen detained,https://news.example.com/b\n'
+        )
+        ingest.ingest()
+        key = os.path.abspath(UNIFIED_PATH)
+        first = decay.scores_for(key, snapshot_dataset(key))
+        with open('protest_data_oversight.csv', 'a') as f:
+            f.write('01/06/2026,"Chicago, IL",Concerning Arrest/Detention,Raid,https://news.example.com/c\n')
+        ingest.ingest()
+
+        rebuild = decay.DecayedScores.from_dataset
+        monkeypatch.setattr(decay.DecayedScores, 'from_dataset', lambda *args: pytest.fail('rebuilt'))
+        dataset = snapshot_dataset(key)
+        second = decay.scores_for(key, dataset)
+        assert second.rows_seen == first.rows_seen + 1
+        assert np.allclose(second.scores(day('2026-02-01')), rebuild(dataset).scores(day('2026-02-01')))
+        decay._engines.pop(key)
+
+
+class TestRanking:
+    """Tests for ranking and single-location lookups"""
+
+    def test_ranking_order(self, frame):
+        """Test locations come out by descending score with overall ranks"""
+        engine = decay.DecayedScores.from_frame(frame)
+        ranking = engine.ranking(day=day('2026-01-20'))
+        scores = [entry['score'] for entry in ranking]
+        assert scores == sorted(scores, reverse=True)
+        assert [entry['rank'] for entry in ranking] == [1, 2, 3]
+        assert ranking[0]['location'] == 'Portland, OR'
+
+    def test_top_and_locations(self, frame):
+        """Test top limits the list and locations filters it without renumbering"""
+        engine = decay.DecayedScores.from_frame(frame)
+        assert len(engine.ranking(1, day('2026-01-20'))) == 1
+        filtered = engine.ranking(day=day('2026-01-20'), locations=['Chicago, IL'])
+        assert [entry['location'] for entry in filtered] == ['Chicago, IL']
+        assert filtered[0] == engine.score('Chicago, IL', day('2026-01-20'))
+
+    @pytest.mark.parametrize('top', [0, -3])
+    def test_top_below_one_rejected(self, frame, top):
+        """Test a top below 1 is an error, not a slice from the end"""
+        with pytest.raises(ValueError):
+            decay.DecayedScores.from_frame(frame).ranking(top)
+
+    def test_unknown_location(self, frame):
+        """Test score() returns None for a location with no incidents"""
+        assert decay.DecayedScores.from_frame(frame).score('Nowhere', day('2026-01-20')) is None
+
+    def test_ties_rank_consistently(self):
+        """Test tied scores get the same ranks from score() and ranking()"""
+        engine = decay.DecayedScores().append(['A', 'B', 'C'], [np.nan] * 3, [1.0, 1.0, 1.0])
+        ranking = engine.ranking()
+        assert [entry['rank'] for entry in ranking] == [1, 2, 3]
+        assert [engine.score(name)['rank'] for name in 'ABC'] == [1, 2, 3]
+
+
+class TestGetRanking:
+    """Tests for calculator.get_ranking()"""
+
+    def test_city_filter(self, temp_csv_file):
+        """Test the city filter returns only matched locations"""
+        import calculator
+        result = calculator.get_ranking(as_of='2026-01-05', city_input='portland', csv_path=temp_csv_file)
+        assert result['as_of'] == '2026-01-05'
+        assert [entry['location'] for entry in result['cities']] == ['Portland, OR']
+
+    def test_missing_file(self, tmp_path):
+        """Test a missing data file gives the usual error"""
+        import calculator
+        result = calculator.get_ranking(csv_path=str(tmp_path / 'missing.csv'))
+        assert result == {'error': 'Data file not found. Please run scraper first.'}
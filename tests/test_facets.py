@@ -0,0 +1,118 @@
+"""
+Test suite for facets.py
+Tests bitmap packing, facet values and counts under combined filters
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import facets
+from calculator import facets_from_dataset
+from dataset import Dataset
+from facets import FacetBitmaps, _pack, _popcount, parse_month
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(pd.DataFrame({
+        'date': ['2026-01-03', '2025-12-20', 'Unknown', '2026-01-15', '2025-12-02', '2026-01-30'],
+        'location': ['Minneapolis, MN', 'Chicago, IL', 'Minneapolis, MN', 'St. Paul, MN', 'Chicago, IL',
+                     'Nowhere'],
+        'category': ['Concerning Use of Force', 'U.S. Citizen, Concerning Use of Force', 'U.S. Citizen',
+                     'Concerning Arrest/Detention', 'Concerning Use of Force', None],
+    }))
+
+
+def counts(facet_entries):
+    return {entry['value']: entry['count'] for entry in facet_entries}
+
+
+class TestBitmaps:
+    """Tests for bitmap helpers"""
+
+    @pytest.mark.parametrize('n', [0, 1, 63, 64, 65, 1000])
+    def test_pack_and_popcount(self, n):
+        """Test packed bitmaps keep every bit and count them"""
+        flags = np.random.default_rng(n).random(n) < 0.3
+        bitmap = _pack(flags)
+        assert bitmap.dtype == np.uint64
+        assert _popcount(bitmap) == flags.sum()
+
+    def test_parse_month(self):
+        """Test months and dates parse to YYYY-MM"""
+        assert parse_month('2026-01') == parse_month('2026-01-31') == '2026-01'
+        with pytest.raises(ValueError):
+            parse_month('January')
+
+
+class TestFacetBitmaps:
+    """Tests for the FacetBitmaps class"""
+
+    def test_values(self, dataset):
+        """Test states come from locations, months from dated rows"""
+        bitmaps = FacetBitmaps(dataset)
+        assert bitmaps.values['state'] == ['IL', 'MN']
+        assert bitmaps.values['month'] == ['2025-12', '2026-01']
+        assert 'Use of Force' in bitmaps.values['category']
+
+    def test_unfiltered_counts(self, dataset):
+        """Test counts over every row; a row can carry several labels"""
+        total, result = FacetBitmaps(dataset).counts({})
+        assert total == 6
+        assert counts(result['state']) == {'MN': 3, 'IL': 2}
+        assert counts(result['month']) == {'2025-12': 2, '2026-01': 3}
+        assert counts(result['category'])['Use of Force'] == 3
+        assert counts(result['category'])['U.S. Citizen'] == 2
+
+    def test_filters_combine(self, dataset):
+        """Test facets AND together and each facet counts under the others only"""
+        total, result = FacetBitmaps(dataset).counts({'state': ['MN'], 'category': ['Use of Force']})
+        assert total == 1
+        assert counts(result['state']) == {'IL': 2, 'MN': 1}
+        assert counts(result['category'])['Use of Force'] == 1
+        assert counts(result['category'])['U.S. Citizen'] == 1
+        assert counts(result['month']) == {'2026-01': 1}
+
+    def test_values_within_facet_or(self, dataset):
+        """Test several selected values of one facet are OR'd"""
+        total, _ = FacetBitmaps(dataset).counts({'state': ['MN', 'IL']})
+        assert total == 5
+
+    def test_unknown_value_selected(self, dataset):
+        """Test selecting a value the data lacks matches nothing but is listed"""
+        total, result = FacetBitmaps(dataset).counts({'state': ['ZZ']})
+        assert total == 0
+        assert {'value': 'ZZ', 'count': 0} in result['state']
+
+    def test_new_label_added_on_demand(self, dataset):
+        """Test a label the profile doesn't weight gets a bitmap when asked for"""
+        total, result = FacetBitmaps(dataset).counts({'category': ['Arrest/Detention']})
+        assert total == 1
+        assert counts(result['category'])['Arrest/Detention'] == 1
+
+    def test_cached_per_dataset(self, dataset):
+        """Test bitmaps are built once per Dataset"""
+        assert facets.for_dataset(dataset) is facets.for_dataset(dataset)
+
+
+class TestFacetsFromDataset:
+    """Tests for calculator.facets_from_dataset()"""
+
+    def test_month_range(self, dataset):
+        """Test since/until select an inclusive month range, dropping undated rows"""
+        result = facets_from_dataset(dataset, since='2026-01')
+        assert result['total'] == 3
+        assert result['filters']['since'] == '2026-01'
+        assert facets_from_dataset(dataset, since='2025-12', until='2025-12')['total'] == 2
+        assert facets_from_dataset(dataset, since='2027-01')['total'] == 0
+
+    def test_comma_separated_values(self, dataset):
+        """Test values may be comma-separated and states any case"""
+        result = facets_from_dataset(dataset, states=['mn,il'])
+        assert result['total'] == 5
+        assert result['filters']['state'] == ['MN', 'IL']
+
+    def test_bad_month(self, dataset):
+        """Test an invalid month raises ValueError"""
+        with pytest.raises(ValueError):
+            facets_from_dataset(dataset, until='2026-13')
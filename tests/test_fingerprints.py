@@ -0,0 +1,136 @@
+"""
+Test suite for fingerprints.py
+Tests URL canonicalization, incident fingerprints, the persisted index and
+appending only unknown incidents to a snapshot
+"""
+
+import os
+import pandas as pd
+import pytest
+import fingerprints
+from fingerprints import FingerprintIndex, append_snapshot, canonical_url, fingerprint_path
+from snapshots import current_snapshot
+
+
+def incidents(urls, locations=None, dates=None, titles=None):
+    n = len(urls)
+    return pd.DataFrame({
+        'date': dates or ['01/20/2026'] * n,
+        'location': locations or ['Portland, OR'] * n,
+        'category': ['Concerning Use of Force'] * n,
+        'title': titles or [f'Incident {i}' for i in range(n)],
+        'source_url': urls,
+    })
+
+
+class TestCanonicalURL:
+    """Tests for canonical_url()"""
+
+    @pytest.mark.parametrize('url', [
+        'https://huffpost.com/entry/us-citizen_n_69',
+        'https://www.huffpost.com/entry/us-citizen_n_69?oom',
+        'http://WWW.HuffPost.com/entry/us-citizen_n_69/',
+        'https://huffpost.com/entry/us-citizen_n_69?utm_source=x&utm_medium=social',
+        'https://huffpost.com:443/entry/us-citizen_n_69#:~:text=ICE',
+        ' https://huffpost.com/entry/us-citizen_n_69?teaserSource=trending ',
+    ])
+    def test_variants_collapse(self, url):
+        """Test tracking params, fragments, scheme, www., port and slash are normalized"""
+        assert canonical_url(url) == 'https://huffpost.com/entry/us-citizen_n_69'
+
+    def test_meaningful_params_kept_sorted(self):
+        """Test non-tracking parameters survive, in a stable order"""
+        assert (canonical_url('https://abcnews.go.com/US/story?utm_sf_post_ref=1&id=129&cid=social&a=2')
+                == 'https://abcnews.go.com/US/story?a=2&id=129')
+
+    def test_path_case_kept(self):
+        """Test the path, unlike the host, stays case-sensitive"""
+        assert canonical_url('https://Example.com/Story/ABC') == 'https://example.com/Story/ABC'
+
+    def test_missing(self):
+        """Test missing URLs canonicalize to empty strings"""
+        assert canonical_url(None) == ''
+        assert canonical_url(float('nan')) == ''
+
+
+class TestFingerprints:
+    """Tests for fingerprints()"""
+
+    def test_same_article_same_fingerprint(self):
+        """Test URL variants of one incident share a fingerprint"""
+        df = incidents(['https://example.com/a?utm_source=x', 'http://www.example.com/a/'])
+        fps = fingerprints.fingerprints(df)
+        assert fps[0] == fps[1]
+
+    def test_location_and_date_distinguish(self):
+        """Test one article citing incidents in several places or days gives several fingerprints"""
+        df = incidents(['https://example.com/a'] * 3,
+                       locations=['Chicago, IL', 'Evanston, IL', 'Chicago, IL'],
+                       dates=['09/19/2025', '09/19/2025', '09/21/2025'])
+        assert len(set(fingerprints.fingerprints(df).tolist())) == 3
+
+    def test_title_used_without_url(self):
+        """Test rows without a URL are keyed on their normalized title"""
+        df = incidents([None, None, None], titles=['Raid at car wash - CBS News', 'Raid at car wash', 'Other'])
+        fps = fingerprints.fingerprints(df)
+        assert fps[0] == fps[1] != fps[2]
+
+
+class TestFingerprintIndex:
+    """Tests for FingerprintIndex"""
+
+    def test_unknown_mask(self):
+        """Test known fingerprints and repeats within the batch are both rejected"""
+        index = FingerprintIndex([1, 2])
+        assert index.unknown(pd.Series([2, 3, 3, 4], dtype='uint64').to_numpy()).tolist() == [False, True, False, True]
+        assert 1 in index and 3 not in index
+
+    def test_unknown_does_not_copy_history(self):
+        """Test a batch is checked against the known set in place, not a copy of it"""
+        class NoCopySet(set):
+            def __iter__(self):
+                raise AssertionError('known fingerprints copied')
+
+        index = FingerprintIndex()
+        index._known = NoCopySet([1, 2])
+        assert index.unknown(pd.Series([2, 5, 5], dtype='uint64').to_numpy()).tolist() == [False, True, False]
+        assert len(index) == 2
+
+    def test_save_and_load(self, tmp_path):
+        """Test a saved index loads only for the version it covers"""
+        path = str(tmp_path / 'data.fingerprints')
+        FingerprintIndex([5, 1, 2 ** 64 - 1]).save(path, 'v1')
+        loaded = FingerprintIndex.load(path, 'v1')
+        assert len(loaded) == 3 and 2 ** 64 - 1 in loaded
+        assert FingerprintIndex.load(path, 'v2') is None
+        assert FingerprintIndex.load(str(tmp_path / 'missing'), 'v1') is None
+
+
+class TestAppendSnapshot:
+    """Tests for append_snapshot()"""
+
+    def test_appends_only_new(self, tmp_path):
+        """Test known incidents are skipped and new ones appended after the history"""
+        path = str(tmp_path / 'protest_data_oversight.csv')
+        entry, added = append_snapshot(incidents(['https://example.com/a', 'https://example.com/b']), path)
+        assert added == 2
+
+        batch = incidents(['https://example.com/b?ocid=BingNewsSerp', 'https://example.com/c',
+                           'https://example.com/c'])
+        entry, added = append_snapshot(batch, path)
+        assert added == 1
+        assert entry['rows'] == 3
+        assert pd.read_csv(path)['source_url'].tolist() == [
+            'https://example.com/a', 'https://example.com/b', 'https://example.com/c']
+
+        index = FingerprintIndex.load(fingerprint_path(path), current_snapshot(path)['sha256'])
+        assert len(index) == 3
+
+    def test_rebuilds_missing_index(self, tmp_path):
+        """Test a missing index is rebuilt from the existing data"""
+        path = str(tmp_path / 'protest_data_oversight.csv')
+        append_snapshot(incidents(['https://example.com/a']), path)
+        os.remove(fingerprint_path(path))
+        _, added = append_snapshot(incidents(['https://www.example.com/a/']), path)
+        assert added == 0
+        assert os.path.exists(fingerprint_path(path))
@@ -0,0 +1,85 @@
+"""
+Test suite for generate_synthetic_data.py
+Tests row counts, schemas, seeded determinism and that the output loads
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import calculator
+from dataset import Dataset
+from generate_synthetic_data import (
+    BASE_CITIES, CLEAN_COLUMNS, OVERSIGHT_COLUMNS, build_city_pool,
+    generate_incidents, write_incidents,
+)
+
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    """500 oversight rows over five cities, written in several chunks"""
+    path = str(tmp_path / 'synthetic.csv')
+    written = write_incidents(path, 500, seed=7, cities=5, chunk_size=200)
+    assert written == 500
+    return path
+
+
+class TestGenerateSyntheticData:
+    """Tests for the synthetic incident generator"""
+
+    def test_row_count_and_columns(self, synthetic_csv):
+        """Test the file has every requested row under the scraper's header"""
+        df = pd.read_csv(synthetic_csv)
+        assert len(df) == 500
+        assert list(df.columns) == OVERSIGHT_COLUMNS
+
+    def test_locations_come_from_pool(self, synthetic_csv):
+        """Test locations are pool cities, or Unknown on misaligned rows"""
+        df = pd.read_csv(synthetic_csv)
+        assert set(df['location']) <= set(BASE_CITIES[:5]) | {'Unknown'}
+
+    def test_clean_schema(self):
+        """Test the clean schema carries the cleaner's columns and severities"""
+        df = generate_incidents(50, schema='clean', seed=1, cities=5)
+        assert list(df.columns) == CLEAN_COLUMNS
+        assert len(df) == 50
+        assert df['severity'].between(1, 10).all()
+        assert set(df['state']) <= {c.split(', ')[1] for c in BASE_CITIES[:5]}
+
+    def test_unknown_schema_rejected(self):
+        """Test an unknown schema name raises ValueError"""
+        with pytest.raises(ValueError):
+            generate_incidents(10, schema='raw')
+
+    def test_zero_rows(self):
+        """Test zero rows gives an empty frame with the right header"""
+        assert list(generate_incidents(0).columns) == OVERSIGHT_COLUMNS
+
+    def test_same_seed_same_file(self, synthetic_csv, tmp_path):
+        """Test a fixed seed reproduces the file byte for byte"""
+        again = str(tmp_path / 'again.csv')
+        write_incidents(again, 500, seed=7, cities=5, chunk_size=200)
+        with open(synthetic_csv, 'rb') as a, open(again, 'rb') as b:
+            assert a.read() == b.read()
+
+    def test_different_seed_differs(self):
+        """Test a different seed gives different incidents"""
+        first = generate_incidents(200, seed=1, cities=5)
+        second = generate_incidents(200, seed=2, cities=5)
+        assert not first.equals(second)
+
+    def test_city_pool_pads_with_towns(self):
+        """Test the pool keeps real cities first and stays unique past them"""
+        pool = build_city_pool(len(BASE_CITIES) + 300)
+        assert pool[:len(BASE_CITIES)] == BASE_CITIES
+        assert len(set(pool)) == len(pool)
+
+    def test_loads_through_dataset_and_calculator(self, synthetic_csv):
+        """Test the file loads as a Dataset and scores through the calculator"""
+        df = pd.read_csv(synthetic_csv)
+        assert len(Dataset.from_csv(synthetic_csv)) == 500
+
+        risk = calculator.get_risk_for_city('Chicago', csv_path=os.path.abspath(synthetic_csv))
+        assert 'error' not in risk
+        assert risk['total_incidents'] == (df['location'] == 'Chicago, IL').sum()
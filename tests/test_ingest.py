@@ -0,0 +1,178 @@
+"""
+Test suite for ingest.py
+Tests mapping both schemas to the canonical one, the date-ordered merge,
+cross-source dedup with provenance and incremental ingests
+"""
+
+import json
+import os
+import pandas as pd
+import pytest
+import ingest
+import risk_checker
+from ingest import from_oversight, from_table
+from snapshots import UNIFIED_PATH, data_path, is_appended
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """Oversight and seed sources in an empty working directory"""
+    (tmp_path / 'protest_data_oversight.csv').write_text(
+        "date,location,category,title,source_url\n"
+        '01/03/2026,"Portland , OR",Concerning Use of Force,Agents fire tear gas,https://news.example.com/a?utm_source=x\n'
+        '01/05/2026,"Phoenix, AZ",U.S. Citizen,Citizen detained,https://news.example.com/b\n'
+        'Concerning Arrest/Detention,Unknown,"Chicago, IL",Misaligned row,https://news.example.com/c\n'
+    )
+    (tmp_path / 'protest_data.csv').write_text(
+        "city,state,date,type,description,source,severity\n"
+        "Portland,OR,Unknown,POLICE_VIOLENCE,Agents fire tear gas,https://news.example.com/a,8\n"
+        "Portland,OR,2026-01-04,ICE_OPERATION,Manual report,https://example.com,6\n"
+        "Denver,CO,2026-01-04,ICE_OPERATION,Another manual report,https://example.com,5\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def unified():
+    return pd.read_csv(UNIFIED_PATH)
+
+
+class TestMapping:
+    """Tests for the per-schema mappers"""
+
+    def test_oversight(self):
+        """Test ISO dates, normalized locations and fixed misaligned rows"""
+        df = pd.DataFrame({
+            'date': ['01/03/2026', 'Concerning Use of Force'],
+            'location': ['Portland , OR', 'Unknown'],
+            'category': ['U.S. Citizen', 'Chicago, IL'],
+            'title': ['One', 'Two'],
+            'source_url': ['https://a.example/1', None],
+        })
+        rows = from_oversight(df).to_dict('records')
+        assert rows[0]['date'] == '2026-01-03'
+        assert rows[0]['location'] == 'Portland, OR'
+        assert rows[0]['type'] == 'CONSTITUTIONAL_VIOLATION'
+        assert rows[1]['date'] == 'Unknown'
+        assert rows[1]['location'] == 'Chicago, IL'
+        assert rows[1]['category'] == 'Concerning Use of Force'
+
+    def test_table(self):
+        """Test the clean/seed schema gets locations, categories and titles"""
+        df = pd.DataFrame({'city': ['Portland', None], 'state': ['OR', 'IL'], 'date': ['2026-01-04', 'Unknown'],
+                           'type': ['POLICE_VIOLENCE', 'ICE_OPERATION'], 'description': ['One', 'Two'],
+                           'source': ['', ''], 'severity': [8, None]})
+        rows = from_table(df).to_dict('records')
+        assert rows[0]['location'] == 'Portland, OR'
+        assert rows[0]['category'] == 'Concerning Use of Force'
+        assert rows[0]['title'] == 'One'
+        assert pd.isna(rows[1]['location'])
+        assert pd.isna(rows[1]['severity'])
+
+
+class TestIngest:
+    """Tests for ingest()"""
+
+    def test_merge_order_and_provenance(self, sources):
+        """Test rows come newest first, Unknown last, each tagged with its source"""
+        entry, added = ingest.ingest()
+        df = unified()
+        assert entry['rows'] == len(df) == 5
+        assert added == {'oversight': 3, 'seed': 2}
+        assert df['date'].tolist() == ['2026-01-05', '2026-01-04', '2026-01-04', '2026-01-03', 'Unknown']
+        assert df['provenance'].tolist() == ['oversight', 'seed', 'seed', 'oversight', 'oversight']
+        assert list(df.columns) == ingest.COLUMNS
+
+    def test_undated_copy_dropped(self, sources):
+        """Test an undated copy of a dated incident (same URL and place) is dropped"""
+        ingest.ingest()
+        portland = unified().query("location == 'Portland, OR'")
+        assert portland['title'].tolist() == ['Manual report', 'Agents fire tear gas']
+
+    def test_site_urls_do_not_collide(self, sources):
+        """Test rows sharing a placeholder URL without a path stay separate"""
+        ingest.ingest()
+        assert {'Manual report', 'Another manual report'} <= set(unified()['title'])
+
+    def test_unchanged_sources_skip(self, sources):
+        """Test a second run with no source changes writes nothing"""
+        first, _ = ingest.ingest()
+        assert ingest.ingest() == (None, {})
+        with open('protest_data_unified.sources.json') as f:
+            assert json.load(f)['version'] == first['sha256']
+
+    def test_incremental_matches_full(self, sources):
+        """Test appending to one source appends only its new rows, the same rows as a rebuild"""
+        first, _ = ingest.ingest()
+        with open(sources / 'protest_data.csv', 'a') as f:
+            f.write("Boston,MA,2026-01-06,ICE_OPERATION,Newest report,https://news.example.com/d,5\n")
+            f.write("Phoenix,AZ,2026-01-05,CONSTITUTIONAL_VIOLATION,Citizen detained,https://news.example.com/b/,6\n")
+        entry, added = ingest.ingest()
+        assert added == {'seed': 1}
+        incremental = unified()
+        assert incremental['title'].iloc[-1] == 'Newest report'
+        assert entry['appended_to'] == first['sha256']
+        assert is_appended(UNIFIED_PATH, first['sha256'], entry['sha256'])
+
+        ingest.ingest(full=True)
+        rebuilt = unified()
+        assert rebuilt['title'].iloc[0] == 'Newest report'
+        assert sorted(map(tuple, rebuilt.astype(str).values)) == sorted(map(tuple, incremental.astype(str).values))
+
+    def test_no_new_rows_keeps_version(self, sources):
+        """Test a changed source adding only known rows keeps the current version"""
+        first, _ = ingest.ingest()
+        with open(sources / 'protest_data.csv', 'a') as f:
+            f.write("Phoenix,AZ,2026-01-05,CONSTITUTIONAL_VIOLATION,Citizen detained,https://news.example.com/b/,6\n")
+        entry, added = ingest.ingest()
+        assert added == {}
+        assert entry['sha256'] == first['sha256']
+        assert ingest.ingest() == (None, {})
+
+    def test_near_duplicates_dropped(self, sources):
+        """Test another outlet's report of a known event is dropped, in one run or a later one"""
+        report = "Portland,OR,2026-01-04,POLICE_VIOLENCE,Agents fire tear gas - KOIN 6,https://koin.example.com/x,8\n"
+        with open(sources / 'protest_data_clean.csv', 'w') as f:
+            f.write("city,state,date,type,description,source,severity\n" + report)
+        entry, added = ingest.ingest()
+        assert 'clean' not in added
+        assert entry['rows'] == 5
+
+        with open(sources / 'protest_data.csv', 'a') as f:
+            f.write(report.replace('koin', 'kgw').replace('KOIN 6', 'KGW'))
+        entry, added = ingest.ingest()
+        assert added == {}
+        assert entry['rows'] == 5
+        assert os.path.exists('protest_data_unified.signatures')
+
+    def test_missing_sources(self, tmp_path, monkeypatch):
+        """Test sources that don't exist are skipped"""
+        monkeypatch.chdir(tmp_path)
+        entry, added = ingest.ingest()
+        assert entry['rows'] == 0
+        assert added == {}
+
+
+class TestReaders:
+    """Tests that entry points read the unified dataset once it exists"""
+
+    def test_data_path_prefers_unified(self, sources):
+        """Test data_path() falls back until the unified file is built"""
+        assert data_path() == 'protest_data_oversight.csv'
+        assert data_path('protest_data.csv') == 'protest_data.csv'
+        ingest.ingest()
+        assert data_path() == data_path('protest_data.csv') == UNIFIED_PATH
+
+    def test_data_path_in_directory(self, sources, monkeypatch):
+        """Test data_path(directory=...) looks in that directory, not the working one"""
+        ingest.ingest()
+        monkeypatch.chdir(sources.parent)
+        assert data_path() == 'protest_data_oversight.csv'
+        assert data_path(directory=str(sources)) == os.path.join(str(sources), UNIFIED_PATH)
+
+    def test_risk_checker_reads_unified(self, sources):
+        """Test risk_checker works on the unified schema"""
+        ingest.ingest()
+        result = risk_checker.assess_city('Portland', risk_checker.load_data())
+        assert result['total_count'] == 2
+        assert result['recent_incidents'][0]['description'] == 'Manual report'
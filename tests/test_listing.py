@@ -0,0 +1,123 @@
+"""
+Test suite for listing.py
+Tests cursor encoding, listing order, keyset paging with filters and cursor
+stability across reloads
+"""
+
+import pandas as pd
+import pytest
+import listing
+from calculator import incidents_from_dataset
+from dataset import Dataset
+from listing import decode_cursor, encode_cursor, parse_limit
+
+
+def make_dataset(rows):
+    return Dataset(pd.DataFrame(rows, columns=['date', 'location', 'category', 'title']))
+
+
+ROWS = [
+    ['2026-01-01', 'Portland, OR', 'Concerning Use of Force', 'A'],
+    ['Unknown', 'Portland, OR', 'Concerning Arrest/Detention', 'B'],
+    ['2026-01-03', 'Portland, OR', 'Concerning Use of Force', 'C'],
+    ['2026-01-02', 'Portland , OR', 'U.S. Citizen', 'D'],
+    ['2026-01-03', 'Portland, OR', 'Concerning Arrest/Detention', 'E'],
+    ['2026-01-05', 'Phoenix, AZ', 'Concerning Use of Force', 'F'],
+    ['2026-01-04', 'Portland , OR', 'Concerning Use of Force', 'G'],
+]
+
+
+def walk(dataset, city=None, category=None, limit=2):
+    """Titles of every page, following next_cursor to the end"""
+    pages, cursor = [], None
+    while True:
+        page = incidents_from_dataset(dataset, city, category, cursor, limit)
+        pages.append([incident['title'] for incident in page['incidents']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+class TestCursor:
+    """Tests for the opaque cursor"""
+
+    def test_round_trip(self):
+        """Test a cursor decodes to the position it encodes"""
+        cursor = encode_cursor(20455, 2 ** 64 - 1)
+        assert decode_cursor(cursor) == (20455, 2 ** 64 - 1)
+        assert '=' not in cursor
+
+    @pytest.mark.parametrize('cursor', ['junk', 'AAAA', '!!!', encode_cursor(1, 2)[:-2]])
+    def test_invalid(self, cursor):
+        """Test malformed cursors are rejected"""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_parse_limit(self):
+        """Test the page size defaults and is bounded"""
+        assert parse_limit(None) == listing.DEFAULT_LIMIT
+        assert parse_limit('5') == 5
+        for bad in ('0', '101', 'x'):
+            with pytest.raises(ValueError):
+                parse_limit(bad)
+
+
+class TestPaging:
+    """Tests for paging through incidents"""
+
+    def test_pages_cover_city_newest_first(self):
+        """Test pages of several matched spellings of a city merge newest first, Unknown last"""
+        pages = walk(make_dataset(ROWS), 'Portland')
+        titles = [title for page in pages for title in page]
+        assert titles[0] == 'G'
+        assert sorted(titles[1:3]) == ['C', 'E']  # same day: order by id
+        assert titles[3:] == ['D', 'A', 'B']
+        assert [len(page) for page in pages] == [2, 2, 2]
+
+    def test_all_incidents(self):
+        """Test no city lists every incident once"""
+        pages = walk(make_dataset(ROWS), limit=3)
+        titles = [title for page in pages for title in page]
+        assert sorted(titles) == sorted(row[3] for row in ROWS)
+        assert titles[0] == 'F' and titles[-1] == 'B'
+
+    def test_category_filter(self):
+        """Test category keeps incidents whose category contains the label"""
+        pages = walk(make_dataset(ROWS), 'Portland', 'Use of Force', limit=1)
+        assert pages == [['G'], ['C'], ['A']]
+
+    def test_exact_last_page_has_no_cursor(self):
+        """Test a page that ends the listing returns no cursor"""
+        page = incidents_from_dataset(make_dataset(ROWS), 'Phoenix', limit=1)
+        assert page['next_cursor'] is None
+        assert page['matched_cities'] == ['Phoenix, AZ']
+
+    def test_identical_rows_both_listed(self):
+        """Test duplicate rows get distinct ids and neither is skipped"""
+        rows = [ROWS[0], ROWS[0], ROWS[2]]
+        assert walk(make_dataset(rows), limit=1) == [['C'], ['A'], ['A']]
+
+    def test_unknown_city(self):
+        """Test an unmatched city returns an error with suggestions"""
+        page = incidents_from_dataset(make_dataset(ROWS), 'Boston')
+        assert 'Boston' in page['error']
+        assert page['suggestions']
+
+    def test_ambiguous_city(self):
+        """Test a city name in several states lists the candidates instead of merged incidents"""
+        page = incidents_from_dataset(make_dataset(ROWS + [['2026-01-06', 'Portland, ME', 'U.S. Citizen', 'H']]),
+                                      'Portland')
+        assert page['ambiguous'] and 'incidents' not in page
+        assert [c['location'] for c in page['candidates']] == ['Portland, OR', 'Portland , OR', 'Portland, ME']
+
+    def test_cursor_stable_across_reload(self):
+        """Test a cursor continues at the same incident after rows are added and reordered"""
+        first = incidents_from_dataset(make_dataset(ROWS), 'Portland', limit=3)
+        seen = [incident['title'] for incident in first['incidents']]
+
+        reloaded = ROWS[::-1] + [['2026-01-10', 'Portland, OR', 'U.S. Citizen', 'New'],
+                                 ['2026-01-02', 'Portland, OR', 'U.S. Citizen', 'Older']]
+        rest = incidents_from_dataset(make_dataset(reloaded), 'Portland', cursor=first['next_cursor'])
+        titles = [incident['title'] for incident in rest['incidents']]
+        assert 'New' not in titles and not set(seen) & set(titles)
+        assert titles == ['D', 'Older', 'A', 'B'] or titles == ['Older', 'D', 'A', 'B']
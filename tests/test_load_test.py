@@ -0,0 +1,147 @@
+"""
+Test suite for load_test.py
+Tests request mix parsing, request building, city popularity and report math
+"""
+
+import json
+
+import pytest
+
+from load_test import (
+    ENDPOINTS, FALLBACK_CITIES, build_request, load_city_popularity,
+    parse_mix, percentile_summary, summarize,
+)
+
+
+class TestParseMix:
+    """Tests for parse_mix()"""
+
+    def test_weights(self):
+        """Test names map to float weights, with 1 when omitted"""
+        assert parse_mix('check=4, cities=1.5,timeline') == {
+            'check': 4.0, 'cities': 1.5, 'timeline': 1.0,
+        }
+
+    def test_unknown_endpoint_rejected(self):
+        """Test an endpoint outside ENDPOINTS raises ValueError"""
+        with pytest.raises(ValueError, match='Unknown endpoint'):
+            parse_mix('check=1,search=2')
+
+    @pytest.mark.parametrize('mix', ['', ',', ' , '])
+    def test_empty_mix_rejected(self, mix):
+        """Test a mix with no endpoints raises ValueError"""
+        with pytest.raises(ValueError, match='empty'):
+            parse_mix(mix)
+
+
+class TestBuildRequest:
+    """Tests for build_request()"""
+
+    def test_check_post_body(self):
+        """Test check sends the city as a JSON body"""
+        method, path, body = build_request('check', 'St. Paul')
+        assert (method, path) == ('POST', '/api/check')
+        assert json.loads(body) == {'city': 'St. Paul'}
+
+    def test_check_get_quotes_city(self):
+        """Test check_get puts the fully quoted city in the path"""
+        assert build_request('check_get', 'Los Angeles, CA') == (
+            'GET', '/api/check/Los%20Angeles%2C%20CA', None,
+        )
+
+    def test_cities(self):
+        """Test cities ignores the city"""
+        assert build_request('cities', 'Chicago') == ('GET', '/api/cities', None)
+
+    def test_timeline_city_or_national(self, monkeypatch):
+        """Test timeline is city-filtered unless the 20% national draw hits"""
+        monkeypatch.setattr('load_test.random.random', lambda: 0.5)
+        assert build_request('timeline', 'New York') == ('GET', '/api/timeline?city=New%20York', None)
+        monkeypatch.setattr('load_test.random.random', lambda: 0.1)
+        assert build_request('timeline', 'New York') == ('GET', '/api/timeline', None)
+
+    def test_every_endpoint_builds(self):
+        """Test each endpoint in ENDPOINTS has a request"""
+        for endpoint in ENDPOINTS:
+            method, path, _ = build_request(endpoint, 'Chicago')
+            assert method in ('GET', 'POST') and path.startswith('/api/')
+
+    def test_unknown_endpoint(self):
+        """Test an unknown endpoint raises ValueError"""
+        with pytest.raises(ValueError):
+            build_request('search', 'Chicago')
+
+
+class TestLoadCityPopularity:
+    """Tests for load_city_popularity()"""
+
+    def test_weights_by_incident_count(self, tmp_path):
+        """Test cities come back busiest first, without Unknown"""
+        path = tmp_path / 'data.csv'
+        path.write_text('date,location\n1,Chicago\n2, Chicago \n3,Unknown\n4,Denver\n')
+        assert load_city_popularity(str(path)) == (['Chicago', 'Denver'], [2.0, 1.0])
+
+    @pytest.mark.parametrize('content', [None, '', 'date,city\n1,Chicago\n', 'date,location\n3,Unknown\n'])
+    def test_fallback_warns(self, tmp_path, capsys, content):
+        """Test missing, empty, location-less or all-Unknown files fall back with a warning"""
+        path = tmp_path / 'data.csv'
+        if content is not None:
+            path.write_text(content)
+        cities, weights = load_city_popularity(str(path))
+        assert cities == FALLBACK_CITIES
+        assert weights == [1.0] * len(FALLBACK_CITIES)
+        assert 'fallback cities' in capsys.readouterr().err
+
+    def test_unexpected_errors_propagate(self, tmp_path):
+        """Test errors other than the expected read failures are not swallowed"""
+        with pytest.raises(IsADirectoryError):
+            load_city_popularity(str(tmp_path))
+
+
+class TestReport:
+    """Tests for percentile_summary() and summarize()"""
+
+    def test_percentiles_in_milliseconds(self):
+        """Test inclusive percentiles over 1..100 ms"""
+        summary = percentile_summary([ms / 1000 for ms in range(1, 101)])
+        assert summary['p50'] == pytest.approx(50.5)
+        assert summary['p95'] == pytest.approx(95.05)
+        assert summary['p99'] == pytest.approx(99.01)
+
+    def test_percentiles_small_samples(self):
+        """Test empty and single-sample inputs"""
+        assert percentile_summary([]) == {'p50': None, 'p95': None, 'p99': None}
+        assert percentile_summary([0.25]) == {'p50': 250.0, 'p95': 250.0, 'p99': 250.0}
+
+    def test_summarize(self):
+        """Test totals, throughput, error rates and per-endpoint blocks"""
+        results = [
+            ('check', 0.010, None),
+            ('check', 0.030, 'HTTP 500'),
+            ('check', 0.020, None),
+            ('cities', 0.040, 'ConnectionError'),
+        ]
+        report = summarize(results, elapsed=2.0)
+
+        assert report['requests'] == 4
+        assert report['throughput_rps'] == 2.0
+        assert report['error_rate'] == 0.5
+        assert report['errors'] == {'HTTP 500': 1, 'ConnectionError': 1}
+        assert report['duration_s'] == 2.0
+        assert report['p50'] == pytest.approx(25.0)
+
+        check = report['endpoints']['check']
+        assert check['requests'] == 3
+        assert check['throughput_rps'] == 1.5
+        assert check['error_rate'] == pytest.approx(1 / 3)
+        assert check['p50'] == pytest.approx(20.0)
+        assert report['endpoints']['cities']['error_rate'] == 1.0
+        assert list(report['endpoints']) == ['check', 'cities']
+
+    def test_summarize_no_results(self):
+        """Test an empty run reports zeros instead of dividing by zero"""
+        report = summarize([], elapsed=0)
+        assert report['requests'] == 0
+        assert report['throughput_rps'] == 0
+        assert report['error_rate'] == 0
+        assert report['endpoints'] == {}
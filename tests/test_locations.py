@@ -0,0 +1,190 @@
+"""
+Test suite for locations.py
+Tests state parsing, the lookup plan and ambiguity reporting
+"""
+
+import pandas as pd
+import pytest
+import locations
+from calculator import risk_from_dataset
+from dataset import Dataset
+from locations import LocationIndex, load_aliases, location_state, split_state, variant_key
+
+NAMES = ['Portland, OR', 'Portland, ME', 'South Portland, ME', 'St. Paul, MN', 'Fort Washington, MD',
+         'New York City, NY', 'Kansas City, MO', 'Nowhere', 'St Paul, MN', 'Minneapolis, MN',
+         'Kenton County, KY', 'Mount Prospect, IL']
+ALIASES = {'NYC': ['New York City, NY', 'New York, NY'], 'Twin Cities': ['Minneapolis, MN', 'St. Paul, MN'],
+           'Motown': 'Detroit, MI'}
+
+
+@pytest.fixture
+def index():
+    return LocationIndex(NAMES, {alias: [t] if isinstance(t, str) else t for alias, t in ALIASES.items()})
+
+
+def resolved(index, user_input):
+    return [index.names[code] for code in index.resolve(user_input).codes]
+
+
+class TestSplitState:
+    """Tests for split_state() and location_state()"""
+
+    @pytest.mark.parametrize('normalized, expected', [
+        ('portland or', ('portland', 'OR')),
+        ('portland oregon', ('portland', 'OR')),
+        ('albany new york', ('albany', 'NY')),
+        ('springfield', ('springfield', None)),
+        ('washington', ('washington', None)),
+        ('new york', ('new york', None)),
+    ])
+    def test_split_state(self, normalized, expected):
+        """Test a trailing state code or name is split off, never the whole input"""
+        assert split_state(normalized) == expected
+
+    def test_location_state(self):
+        """Test the same rule as dataset.location_states()"""
+        assert location_state('Portland, OR') == 'OR'
+        assert location_state('Washington, DC ') == 'DC'
+        assert location_state('Nowhere') is None
+        assert location_state('São Paulo, Brazil') == 'BR'
+
+
+class TestResolve:
+    """Tests for LocationIndex.resolve()"""
+
+    def test_exact(self, index):
+        """Test a full location name matches itself and its other spellings only"""
+        match = index.resolve('PORTLAND, OR')
+        assert match.strategy == 'exact'
+        assert resolved(index, 'PORTLAND, OR') == ['Portland, OR']
+        assert not match.ambiguous
+        assert resolved(index, 'St Paul, MN') == ['St. Paul, MN', 'St Paul, MN']
+
+    @pytest.mark.parametrize('user_input, expected', [
+        ('Portland Oregon', ['Portland, OR']),
+        ('portland, maine', ['Portland, ME']),
+        ('st paul minnesota', ['St. Paul, MN', 'St Paul, MN']),
+    ])
+    def test_city_and_state(self, index, user_input, expected):
+        """Test a trailing state resolves through the composite index, else within the state"""
+        assert index.resolve(user_input).strategy == 'city_state'
+        assert resolved(index, user_input) == expected
+
+    def test_city_without_state_is_ambiguous(self, index):
+        """Test a city name in several states matches each, reported as ambiguous"""
+        match = index.resolve('Portland')
+        assert match.strategy == 'city'
+        assert resolved(index, 'Portland') == ['Portland, OR', 'Portland, ME']
+        assert match.ambiguous
+
+    def test_state_matching_nothing_falls_back(self, index):
+        """Test a city name ending in a state name still resolves"""
+        assert resolved(index, 'Fort Washington') == ['Fort Washington, MD']
+        assert resolved(index, 'Kansas City') == ['Kansas City, MO']
+
+    def test_token_fallback(self, index):
+        """Test partial and prefix input use the token rules over every location"""
+        match = index.resolve('portl')
+        assert match.strategy == 'tokens'
+        assert len(match.codes) == 3 and match.ambiguous
+        assert resolved(index, 'york') == ['New York City, NY']
+
+    @pytest.mark.parametrize('user_input', ['', '  ', 'Boston', 'Springfield IL'])
+    def test_no_match(self, index, user_input):
+        """Test blank input and unknown places match nothing"""
+        assert index.resolve(user_input).codes == []
+
+    def test_candidates(self, index):
+        """Test candidates list each name with its incidents, most first"""
+        totals = [2, 5] + [0] * (len(NAMES) - 2)
+        assert index.candidates([0, 1], totals) == [{'location': 'Portland, ME', 'total_incidents': 5},
+                                                    {'location': 'Portland, OR', 'total_incidents': 2}]
+
+
+class TestAliasesAndVariants:
+    """Tests for the alias table and spelling variants"""
+
+    @pytest.mark.parametrize('city, expected', [
+        ('st. paul', 'saint paul'), ('Ft Myers'.lower(), 'fort myers'), ('mt prospect', 'mount prospect'),
+        ('kenton county', 'kenton'), ('county', 'county'),
+    ])
+    def test_variant_key(self, city, expected):
+        """Test abbreviations are spelled out and county suffixes dropped"""
+        assert variant_key(city) == expected
+
+    @pytest.mark.parametrize('user_input, expected', [
+        ('Saint Paul', ['St. Paul, MN', 'St Paul, MN']),
+        ('st paul', ['St. Paul, MN', 'St Paul, MN']),
+        ('Kenton', ['Kenton County, KY']),
+        ('Mt. Prospect, IL', ['Mount Prospect, IL']),
+    ])
+    def test_variants_match(self, index, user_input, expected):
+        """Test spelling variants of one place resolve to it, unambiguously"""
+        assert resolved(index, user_input) == expected
+        assert not index.resolve(user_input).ambiguous
+
+    def test_alias(self, index):
+        """Test an alias maps to its canonical locations present in the data"""
+        match = index.resolve('nyc')
+        assert match.strategy == 'alias'
+        assert resolved(index, 'NYC') == ['New York City, NY']
+        assert resolved(index, 'twin  cities') == ['St. Paul, MN', 'St Paul, MN', 'Minneapolis, MN']
+        assert not index.resolve('Twin Cities').ambiguous
+
+    def test_alias_without_locations_ignored(self, index):
+        """Test an alias naming nothing in the data falls through to the other rules"""
+        assert index.resolve('Motown').codes == []
+
+    def test_load_aliases(self, tmp_path, monkeypatch):
+        """Test the alias file is read from $LOCATION_ALIASES, single names as lists"""
+        path = tmp_path / 'aliases.json'
+        path.write_text('{"PDX": "Portland, OR", "KC": ["Kansas City, MO", "Kansas City, KS"]}')
+        monkeypatch.setenv('LOCATION_ALIASES', str(path))
+        assert load_aliases() == {'PDX': ['Portland, OR'], 'KC': ['Kansas City, MO', 'Kansas City, KS']}
+        assert resolved(LocationIndex(NAMES), 'pdx') == ['Portland, OR']
+
+    def test_missing_alias_file(self, tmp_path, monkeypatch):
+        """Test a missing alias file means no aliases"""
+        monkeypatch.setenv('LOCATION_ALIASES', str(tmp_path / 'missing.json'))
+        assert load_aliases() == {}
+
+
+class TestRiskFromDataset:
+    """Tests for ambiguity in calculator.risk_from_dataset()"""
+
+    @pytest.fixture
+    def dataset(self):
+        return Dataset(pd.DataFrame({
+            'date': ['2026-01-01', '2026-01-02', '2026-01-03'],
+            'location': ['Portland, OR', 'Portland, ME', 'Portland, OR'],
+            'category': ['Concerning Use of Force', 'U.S. Citizen', None],
+        }))
+
+    def test_ambiguous_result_lists_candidates(self, dataset):
+        """Test different cities are not merged: per-city counts and no score"""
+        result = risk_from_dataset('Portland', dataset)
+        assert result['ambiguous'] and 'error' in result
+        assert 'risk_score' not in result and 'total_incidents' not in result
+        assert result['suggestions'] == ['Portland, OR', 'Portland, ME']
+        assert result['candidates'] == [{'location': 'Portland, OR', 'total_incidents': 2},
+                                        {'location': 'Portland, ME', 'total_incidents': 1}]
+
+    def test_state_narrows(self, dataset):
+        """Test naming the state scores one city only"""
+        result = risk_from_dataset('Portland, Maine', dataset)
+        assert result['matched_cities'] == ['Portland, ME']
+        assert result['total_incidents'] == 1
+        assert not result['ambiguous'] and 'candidates' not in result
+
+    def test_cached_per_dataset(self, dataset):
+        """Test the index is built once per Dataset"""
+        assert locations.for_dataset(dataset) is locations.for_dataset(dataset)
+
+    def test_rebuilt_when_aliases_change(self, dataset, tmp_path, monkeypatch):
+        """Test an edited alias file takes effect without reloading the data"""
+        path = tmp_path / 'aliases.json'
+        path.write_text('{}')
+        monkeypatch.setenv('LOCATION_ALIASES', str(path))
+        assert 'error' in risk_from_dataset('PDX', dataset)
+        path.write_text('{"PDX": "Portland, OR"}')
+        assert risk_from_dataset('PDX', dataset)['matched_cities'] == ['Portland, OR']
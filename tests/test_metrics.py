@@ -0,0 +1,101 @@
+"""
+Test suite for metrics.py
+Tests stage timing, Server-Timing formatting and Prometheus rendering
+"""
+
+import pytest
+import metrics
+from metrics import Counter, Gauge, Histogram, stage
+
+
+class TestStageTiming:
+    """Tests for stage() and per-request collection"""
+
+    def test_stage_recorded_in_request(self):
+        """Test stages are collected between begin_request and end_request"""
+        metrics.begin_request()
+        with stage('test_stage_a'):
+            pass
+        with stage('test_stage_a'):
+            pass
+        timings = metrics.end_request()
+
+        assert 'test_stage_a' in timings
+        assert timings['test_stage_a'] >= 0
+
+    def test_stage_outside_request(self):
+        """Test stages outside a request still feed the histogram"""
+        before = metrics.STAGE_SECONDS.count(stage='test_stage_b')
+        with stage('test_stage_b'):
+            pass
+        assert metrics.STAGE_SECONDS.count(stage='test_stage_b') == before + 1
+        assert metrics.end_request() == {}
+
+    def test_stage_recorded_on_exception(self):
+        """Test a stage is timed even if the block raises"""
+        metrics.begin_request()
+        with pytest.raises(ValueError):
+            with stage('test_stage_c'):
+                raise ValueError('boom')
+        assert 'test_stage_c' in metrics.end_request()
+
+
+class TestServerTimingHeader:
+    """Tests for server_timing_header()"""
+
+    def test_format(self):
+        """Test durations are rendered in milliseconds"""
+        header = metrics.server_timing_header({'load': 0.0012, 'match': 0.0003}, total=0.002)
+        assert header == 'load;dur=1.2, match;dur=0.3, total;dur=2.0'
+
+    def test_empty(self):
+        """Test empty timings"""
+        assert metrics.server_timing_header({}) == ''
+
+
+class TestPrometheusRendering:
+    """Tests for metric types and render()"""
+
+    def test_counter(self):
+        """Test labelled counter increments and renders"""
+        c = Counter('test_counter_total', 'Test counter', ['kind'])
+        c.inc(kind='a')
+        c.inc(2, kind='a')
+        assert c.value(kind='a') == 3
+        assert 'protest_checker_test_counter_total{kind="a"} 3' in c.render()
+
+    def test_counter_rejects_wrong_labels(self):
+        """Test label names are enforced"""
+        c = Counter('test_counter_labels_total', 'Test counter', ['kind'])
+        with pytest.raises(ValueError):
+            c.inc(other='a')
+
+    def test_gauge_callback(self):
+        """Test gauge values can come from a callback"""
+        g = Gauge('test_gauge_cb', 'Test gauge', callback=lambda: 42)
+        assert 'protest_checker_test_gauge_cb 42' in g.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket counts accumulate"""
+        h = Histogram('test_hist_seconds', 'Test histogram', buckets=(0.1, 1.0))
+        h.observe(0.05)
+        h.observe(0.5)
+        h.observe(5)
+        lines = h.render()
+        assert 'protest_checker_test_hist_seconds_bucket{le="0.1"} 1' in lines
+        assert 'protest_checker_test_hist_seconds_bucket{le="1"} 2' in lines
+        assert 'protest_checker_test_hist_seconds_bucket{le="+Inf"} 3' in lines
+        assert 'protest_checker_test_hist_seconds_count 3' in lines
+
+    def test_label_values_escaped(self):
+        """Test quotes in label values are escaped"""
+        c = Counter('test_escape_total', 'Test counter', ['endpoint'])
+        c.inc(endpoint='/api/"x"')
+        assert 'endpoint="/api/\\"x\\""' in c.render()[-1]
+
+    def test_render_includes_help_and_type(self):
+        """Test exposition format has HELP and TYPE lines"""
+        text = metrics.render()
+        assert '# TYPE protest_checker_stage_duration_seconds histogram' in text
+        assert '# HELP protest_checker_dataset_rows' in text
+        assert text.endswith('\n')
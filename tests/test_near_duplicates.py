@@ -0,0 +1,154 @@
+"""
+Test suite for near_duplicates.py
+Tests title normalization, clustering guards (location, numbers, dates),
+the choice of canonical row and matching against earlier batches
+"""
+
+import numpy as np
+import pandas as pd
+import near_duplicates
+from near_duplicates import SignatureIndex, cluster_frame, dedupe_frame, normalize_titles
+
+HEADLINE = 'ICE agents detain father outside elementary school in Chicago suburb'
+
+
+def frame(titles, locations=None, dates=None):
+    n = len(titles)
+    return pd.DataFrame({
+        'date': dates or ['01/10/2026'] * n,
+        'location': locations or ['Chicago, IL'] * n,
+        'title': titles,
+    })
+
+
+class TestNormalize:
+    """Tests for title normalization"""
+
+    def test_outlet_suffixes_removed(self):
+        """Test outlet attribution and link text are stripped"""
+        titles = normalize_titles([
+            f'{HEADLINE} - CBS News',
+            f'{HEADLINE} - The New York Times(opens in a new tab)',
+            f'{HEADLINE} | WBEZ',
+            HEADLINE.upper() + '!',
+        ])
+        assert titles.nunique() == 1
+        assert titles[0] == HEADLINE.lower()
+
+    def test_missing_titles(self):
+        """Test missing titles normalize to empty strings"""
+        assert list(normalize_titles([None, np.nan])) == ['', '']
+
+
+class TestClusters:
+    """Tests for find_clusters() via cluster_frame()"""
+
+    def test_outlet_variants_merge(self):
+        """Test the same headline from different outlets forms one cluster"""
+        df = frame([f'{HEADLINE} - CBS News', f'{HEADLINE} - NBC Chicago',
+                    HEADLINE.replace('father', 'a father'), 'Protesters gather at federal building'])
+        assert list(cluster_frame(df)) == [0, 0, 0, 3]
+
+    def test_different_numbers_not_merged(self):
+        """Test headlines differing only in a number stay separate"""
+        df = frame(['Agents arrest 12 people at car wash raid', 'Agents arrest 40 people at car wash raid'])
+        assert list(cluster_frame(df)) == [0, 1]
+
+    def test_different_locations_not_merged(self):
+        """Test identical headlines in different places stay separate"""
+        df = frame([HEADLINE, HEADLINE], locations=['Chicago, IL', 'Evanston, IL'])
+        assert list(cluster_frame(df)) == [0, 1]
+
+    def test_unknown_location_never_merged(self):
+        """Test rows without a known location are never merged"""
+        df = frame([HEADLINE, HEADLINE, HEADLINE], locations=['Unknown', 'Unknown', None])
+        assert list(cluster_frame(df)) == [0, 1, 2]
+
+    def test_date_gap(self):
+        """Test dated reports more than MAX_DAYS apart stay separate, unknown dates join"""
+        gap = near_duplicates.MAX_DAYS + 1
+        df = frame([HEADLINE] * 3, dates=['01/01/2026', f'01/{1 + gap:02d}/2026', 'Unknown'])
+        canonical = cluster_frame(df)
+        assert canonical[0] != canonical[1]
+        assert canonical[2] in (canonical[0], canonical[1])
+
+    def test_canonical_is_earliest(self):
+        """Test the earliest dated report is kept, undated ones lose to dated"""
+        df = frame([f'{HEADLINE} - A', f'{HEADLINE} - B', f'{HEADLINE} - C'],
+                   dates=['Unknown', '01/12/2026', '01/10/2026'])
+        assert list(cluster_frame(df)) == [2, 2, 2]
+
+
+class TestDedupeFrame:
+    """Tests for dedupe_frame()"""
+
+    def test_idempotent(self):
+        """Test rows close in time are compared even when the bucket's first row is far from them"""
+        df = frame([HEADLINE] * 3, dates=['03/01/2026', '01/12/2026', '01/10/2026'])
+        deduped, removed = dedupe_frame(df)
+        assert removed == 1
+        assert dedupe_frame(deduped)[1] == 0
+
+    def test_keeps_order(self):
+        """Test duplicates are dropped and the remaining rows keep their order"""
+        df = frame(['Protesters gather at federal building', f'{HEADLINE} - CBS News',
+                    'Vigil held for detained workers', f'{HEADLINE} - WBEZ'])
+        deduped, removed = dedupe_frame(df)
+        assert removed == 1
+        assert list(deduped.index) == [0, 1, 2]
+
+    def test_multiple_location_columns(self):
+        """Test the clean schema's city and state columns must both match"""
+        df = pd.DataFrame({'city': ['Chicago', 'Chicago', 'chicago '], 'state': ['IL', 'IN', 'IL'],
+                           'date': ['2026-01-10'] * 3, 'description': [HEADLINE] * 3})
+        deduped, removed = dedupe_frame(df, 'description', ['city', 'state'], 'date')
+        assert removed == 1
+        assert list(deduped.index) == [0, 1]
+
+    def test_empty(self):
+        """Test an empty frame is returned unchanged"""
+        df = frame([])
+        deduped, removed = dedupe_frame(df)
+        assert removed == 0
+        assert deduped.empty
+
+
+class TestSignatureIndex:
+    """Tests for near-duplicates against rows of earlier batches"""
+
+    def test_matches_earlier_batch(self):
+        """Test a new batch is checked against known rows with the same rules as clustering"""
+        known, rows = SignatureIndex.from_frame(frame([HEADLINE, 'Protesters gather at federal building',
+                                                       None], locations=['Chicago, IL', 'Chicago, IL', 'Unknown']))
+        assert list(rows) == [0, 1]
+        batch, _ = SignatureIndex.from_frame(frame(
+            [f'{HEADLINE} - CBS News', HEADLINE, HEADLINE, 'Vigil held for detained workers'],
+            locations=['Chicago, IL', 'Evanston, IL', 'Chicago, IL', 'Chicago, IL'],
+            dates=['01/12/2026', '01/10/2026', '03/01/2026', '01/10/2026']))
+        assert list(known.matches(batch)) == [True, False, False, False]
+
+    def test_add_and_take(self):
+        """Test rows added to the index are matched from then on"""
+        known, _ = SignatureIndex.from_frame(frame([HEADLINE]))
+        batch, _ = SignatureIndex.from_frame(frame(['Vigil held for detained workers', HEADLINE]))
+        known.add(batch.take(np.array([True, False])))
+        assert len(known) == 2
+        assert list(known.matches(batch)) == [True, True]
+
+    def test_empty(self):
+        """Test nothing matches an empty index"""
+        batch, _ = SignatureIndex.from_frame(frame([HEADLINE]))
+        assert not SignatureIndex().matches(batch).any()
+
+    def test_save_and_load(self, tmp_path):
+        """Test the index round-trips for its data version only"""
+        path = str(tmp_path / 'protest_data_clean.signatures')
+        known, _ = SignatureIndex.from_frame(frame([HEADLINE, 'Vigil held for detained workers'],
+                                                   dates=['01/10/2026', 'Unknown']))
+        known.save(path, 'v1')
+        loaded = SignatureIndex.load(path, 'v1')
+        assert np.array_equal(loaded.signatures, known.signatures)
+        assert np.array_equal(loaded.days, known.days, equal_nan=True)
+        assert list(loaded.locations) == list(known.locations)
+        assert SignatureIndex.load(path, 'v2') is None
+        assert SignatureIndex.load(str(tmp_path / 'missing'), 'v1') is None
@@ -0,0 +1,91 @@
+"""
+Test suite for profiling.py
+Tests profile file output and the request profiling middleware
+"""
+
+import os
+import pstats
+import pytest
+import profiling
+from app import app
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app"""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+class TestProfile:
+    """Tests for the profile() context manager"""
+    
+    def test_writes_pstats_and_collapsed(self, tmp_path):
+        """Test both output files are written and readable"""
+        with profiling.profile('unit test', str(tmp_path)) as base:
+            busy_work()
+        
+        assert os.path.exists(base + '.pstats')
+        assert os.path.exists(base + '.collapsed')
+        stats = pstats.Stats(base + '.pstats')
+        assert any(func[2] == 'busy_work' for func in stats.stats)
+    
+    def test_collapsed_format(self, tmp_path):
+        """Test collapsed stacks are 'frame;frame count' lines"""
+        sampler = profiling.StackSampler(0)
+        sampler.stacks['a (x.py:1);b (x.py:5)'] += 3
+        assert sampler.collapsed() == 'a (x.py:1);b (x.py:5) 3\n'
+    
+    def test_profile_name_is_filesystem_safe(self):
+        """Test labels are sanitized for file names"""
+        name = profiling.profile_name('GET /api/check/Los Angeles?x=1')
+        assert '/' not in name
+        assert ' ' not in name
+    
+    def test_profile_if_enabled_noop_when_disabled(self, monkeypatch):
+        """Test CLI hook does nothing unless PROFILE is set"""
+        monkeypatch.setattr(profiling, 'PROFILE_ALL', False)
+        with profiling.profile_if_enabled('cli') as base:
+            pass
+        assert base is None
+
+
+class TestProfilerMiddleware:
+    """Tests for per-request profiling via the WSGI middleware"""
+    
+    def test_disabled_by_default(self, client, monkeypatch):
+        """Test no profiling when neither PROFILE nor PROFILE_TOKEN is set"""
+        monkeypatch.setattr(profiling, 'ENABLED', False)
+        response = client.get('/api/last_updated?profile=anything')
+        assert 'X-Profile' not in response.headers
+    
+    def test_token_profiles_single_request(self, client, monkeypatch, tmp_path):
+        """Test a request with the right token is profiled"""
+        monkeypatch.setattr(profiling, 'ENABLED', True)
+        monkeypatch.setattr(profiling, 'PROFILE_ALL', False)
+        monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 's3cret')
+        monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+        
+        response = client.get('/api/last_updated?profile=s3cret')
+        assert response.status_code == 200
+        name = response.headers['X-Profile']
+        assert (tmp_path / (name + '.pstats')).exists()
+        assert (tmp_path / (name + '.collapsed')).exists()
+        assert int(response.headers['Content-Length']) == len(response.data)
+    
+    def test_wrong_token_not_profiled(self, client, monkeypatch, tmp_path):
+        """Test a request with the wrong token is served normally"""
+        monkeypatch.setattr(profiling, 'ENABLED', True)
+        monkeypatch.setattr(profiling, 'PROFILE_ALL', False)
+        monkeypatch.setattr(profiling, 'PROFILE_TOKEN', 's3cret')
+        monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+        
+        response = client.get('/api/last_updated?profile=guess')
+        assert response.status_code == 200
+        assert 'X-Profile' not in response.headers
+        assert list(tmp_path.iterdir()) == []
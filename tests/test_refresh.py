@@ -0,0 +1,188 @@
+"""
+Test suite for refresh.py
+Tests the refresh pipeline, failure handling and the dataset swap
+"""
+
+import os
+import runpy
+import signal
+import threading
+import pandas as pd
+import pytest
+import calculator
+import metrics
+import refresh
+from refresh import DataWatcher, RefreshScheduler, RefreshError, index_step
+from snapshots import UNIFIED_PATH, write_snapshot
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'protest_data_oversight.csv'
+    path.write_text('location,date,category\n"Portland, OR",01/01/2026,Use of Force\n')
+    yield str(path)
+    calculator._pinned_datasets.pop(os.path.abspath(str(path)), None)
+
+
+def append_row(csv_path, location):
+    with open(csv_path, 'a') as f:
+        f.write(f'"{location}",01/02/2026,U.S. Citizen\n')
+
+
+class TestRunOnce:
+    """Tests for RefreshScheduler.run_once()"""
+
+    def test_steps_run_in_order(self, csv_path):
+        """Test steps run in order with the data path, then on_success"""
+        calls = []
+        steps = {name: (lambda path, name=name: calls.append((name, path))) for name in ('a', 'b')}
+        scheduler = RefreshScheduler(60, ('a', 'b'), csv_path, on_success=lambda: calls.append('done'),
+                                     step_functions=steps)
+
+        assert scheduler.run_once() is True
+        assert calls == [('a', csv_path), ('b', csv_path), 'done']
+        assert scheduler.last_success is not None
+        assert scheduler.last_error is None
+
+    def test_data_path_resolved_per_run(self, csv_path, monkeypatch):
+        """Test without a csv_path each run gets the data file served at that time"""
+        monkeypatch.chdir(os.path.dirname(csv_path))
+        paths = []
+        scheduler = RefreshScheduler(60, ('a',), step_functions={'a': paths.append})
+        scheduler.run_once()
+        open(UNIFIED_PATH, 'w').close()
+        scheduler.run_once()
+        assert paths == ['protest_data_oversight.csv', UNIFIED_PATH]
+
+    def test_failure_stops_pipeline(self, csv_path):
+        """Test a failing step skips later steps and on_success"""
+        calls = []
+
+        def fail(path):
+            raise RefreshError('no incidents')
+
+        steps = {'scrape': fail, 'index': lambda path: calls.append('index')}
+        errors = metrics.REFRESH_RUNS.value(result='error')
+        scheduler = RefreshScheduler(60, ('scrape', 'index'), csv_path,
+                                     on_success=lambda: calls.append('done'), step_functions=steps)
+
+        assert scheduler.run_once() is False
+        assert calls == []
+        assert 'no incidents' in scheduler.last_error
+        assert metrics.REFRESH_RUNS.value(result='error') == errors + 1
+
+    def test_overlapping_run_is_skipped(self, csv_path):
+        """Test a second run while one is in progress returns immediately"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow(path):
+            started.set()
+            release.wait(5)
+
+        scheduler = RefreshScheduler(60, ('slow',), csv_path, step_functions={'slow': slow})
+        worker = threading.Thread(target=scheduler.run_once)
+        worker.start()
+        started.wait(5)
+        try:
+            assert scheduler.running
+            assert scheduler.run_once() is False
+        finally:
+            release.set()
+            worker.join()
+        assert not scheduler.running
+
+
+class TestDatasetSwap:
+    """Tests that requests see the old dataset until the new one is built"""
+
+    def test_index_step_swaps_pinned_dataset(self, csv_path):
+        """Test readers keep the old version until indexing succeeds"""
+        old = calculator.preload_dataset(csv_path)
+        append_row(csv_path, 'Phoenix, AZ')
+        assert calculator.load_dataset(csv_path) is old
+
+        new = index_step(csv_path)
+        assert calculator.load_dataset(csv_path) is new
+        assert len(new) == 2
+        # The old version is untouched for requests still holding it
+        assert len(old) == 1
+
+    def test_failed_index_keeps_old_dataset(self, csv_path):
+        """Test a broken file leaves the served dataset in place"""
+        old = calculator.preload_dataset(csv_path)
+        scheduler = RefreshScheduler(60, ('break', 'index'), csv_path, step_functions={
+            'break': lambda path: os.remove(path),
+            'index': index_step,
+        })
+
+        assert scheduler.run_once() is False
+        assert calculator.load_dataset(csv_path) is old
+
+
+class TestBackgroundLoop:
+    """Tests for start() / stop()"""
+
+    def test_runs_on_interval(self, csv_path):
+        """Test the background thread runs the pipeline repeatedly"""
+        runs = threading.Semaphore(0)
+        scheduler = RefreshScheduler(0.01, ('tick',), csv_path,
+                                     step_functions={'tick': lambda path: runs.release()})
+        scheduler.start()
+        try:
+            assert runs.acquire(timeout=5)
+            assert runs.acquire(timeout=5)
+        finally:
+            scheduler.stop(timeout=5)
+
+
+class TestDataWatcher:
+    """Tests for DataWatcher, the sidecar's signal to the gunicorn master"""
+
+    @pytest.fixture
+    def signals(self, csv_path, monkeypatch):
+        monkeypatch.chdir(os.path.dirname(csv_path))
+        sent = []
+        monkeypatch.setattr(refresh.os, 'kill', lambda pid, sig: sent.append((pid, sig)))
+        return sent
+
+    def test_unchanged_data(self, signals):
+        """Test nothing is sent while the served data stays the same"""
+        watcher = DataWatcher(123)
+        assert watcher.check() is False
+        assert signals == []
+
+    def test_switch_to_unified_file(self, signals):
+        """Test the first unified file counts as a change though the old source is untouched"""
+        watcher = DataWatcher(123)
+        write_snapshot(pd.read_csv('protest_data_oversight.csv'), UNIFIED_PATH)
+        assert watcher.check() is True
+        assert signals == [(123, signal.SIGHUP)]
+        assert watcher.check() is False
+
+    def test_new_snapshot_version(self, signals):
+        """Test a new snapshot of the served file is a change, its rewrite with the same content is not"""
+        frame = pd.read_csv('protest_data_oversight.csv')
+        write_snapshot(frame, UNIFIED_PATH)
+        watcher = DataWatcher(123)
+        write_snapshot(frame, UNIFIED_PATH)
+        assert watcher.check() is False
+        write_snapshot(frame.iloc[:0], UNIFIED_PATH)
+        assert watcher.check() is True
+
+
+class TestGunicornMaster:
+    """Tests for the gunicorn.conf.py hooks"""
+
+    def test_when_ready_starts_sidecar_not_threads(self, monkeypatch):
+        """Test the forking master starts the watcher as a process and no thread"""
+        config = runpy.run_path(os.path.join(os.path.dirname(refresh.__file__), 'gunicorn.conf.py'))
+        started = []
+        monkeypatch.setattr(config['subprocess'], 'Popen', lambda args: started.append(args) or 'process')
+        monkeypatch.setattr(config['gc'], 'freeze', lambda: None)
+        server = type('Arbiter', (), {'pid': 4321})()
+        threads = threading.active_count()
+
+        config['when_ready'](server)
+        assert threading.active_count() == threads
+        assert server.refresh_process == 'process'
+        assert started[0][1:4] == [config['REFRESH_SCRIPT'], '--reload-pid', '4321']
@@ -0,0 +1,102 @@
+"""
+Test suite for risk_matrix.py
+Tests that matrix scores equal per-location score_counts() and what-if rankings
+"""
+
+import pandas as pd
+import pytest
+import calculator
+import risk_matrix
+import scoring
+from dataset import Dataset
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(pd.DataFrame({
+        'date': ['01/03/2026', '01/02/2026', '01/01/2026', '01/01/2026', '01/04/2026', '01/05/2026'],
+        'location': ['Portland, OR', 'Phoenix, AZ', 'Portland, OR', 'Chicago, IL', 'Phoenix, AZ', 'Portland, OR'],
+        'category': ['Concerning Use of Force', 'U.S. Citizen, Concerning Use of Force', None,
+                     'Enforcement Action at a Sensitive Location', 'Concerning Deportation',
+                     'Concerning Arrest/Detention, U.S. Citizen'],
+        'title': ['a', 'b', 'c', 'd', 'e', 'f'],
+    }))
+
+
+def scalar_scores(dataset, profile):
+    """score_counts() for each location on its own"""
+    matrix = risk_matrix.FactorMatrix(dataset)
+    labels = scoring.profile_labels(profile)
+    scores = []
+    for code in range(len(dataset.location_names)):
+        counts = matrix.label_totals([code], labels)
+        result = scoring.score_counts(int(matrix.totals[code]),
+                                      *(counts.pop(label) for label in scoring.FACTOR_LABELS),
+                                      other_counts=counts, profile=profile)
+        scores.append(result['risk_score'])
+    return scores
+
+
+class TestFactorMatrix:
+    """Tests for label counts and vectorized scores"""
+
+    def test_counts(self, dataset):
+        """Test per-location totals and label counts"""
+        matrix = risk_matrix.FactorMatrix(dataset)
+        assert matrix.totals.tolist() == [3, 2, 1]
+        assert matrix.counts(['U.S. Citizen', 'Use of Force']).tolist() == [[1, 1], [1, 1], [0, 0]]
+
+    @pytest.mark.parametrize('overrides', [
+        {},
+        {'weights': {'Use of Force': 7.3, 'Concerning Deportation': 2.5}},
+        {'per_incident': 15, 'volume_cap': 20, 'max_score': 30},
+    ])
+    def test_scores_match_score_counts(self, dataset, overrides):
+        """Test the matrix product equals scoring each location separately"""
+        profile = scoring.resolve_profile(overrides)
+        assert risk_matrix.FactorMatrix(dataset).scores(profile).tolist() == scalar_scores(dataset, profile)
+
+    def test_ranking_with_baseline(self, dataset):
+        """Test rankings are by score and carry baseline score and rank"""
+        matrix = risk_matrix.FactorMatrix(dataset)
+        profile = scoring.resolve_profile({'weights': {'Concerning Deportation': 50}})
+        ranking = matrix.ranking(profile, baseline=scoring.DEFAULT_PROFILE)
+        assert [entry['location'] for entry in ranking] == ['Phoenix, AZ', 'Portland, OR', 'Chicago, IL']
+        assert ranking[0]['rank'] == 1
+        assert ranking[0]['baseline_rank'] == 2
+        assert ranking[0]['baseline_score'] == scalar_scores(dataset, scoring.DEFAULT_PROFILE)[1]
+
+    def test_ties_in_first_incident_order(self, dataset):
+        """Test equal scores rank by first incident"""
+        profile = scoring.resolve_profile({'per_incident': 0, 'weights': {
+            'Use of Force': 0, 'U.S. Citizen': 0, 'Sensitive Location': 0}})
+        ranking = risk_matrix.FactorMatrix(dataset).ranking(profile, top=2)
+        assert [entry['location'] for entry in ranking] == ['Portland, OR', 'Phoenix, AZ']
+
+    @pytest.mark.parametrize('top', [0, -2])
+    def test_top_below_one_rejected(self, dataset, top):
+        """Test a top below 1 is an error, not a slice from the end"""
+        with pytest.raises(ValueError):
+            risk_matrix.FactorMatrix(dataset).ranking(top=top)
+
+    def test_cached_per_dataset(self, dataset):
+        """Test for_dataset() builds once per Dataset"""
+        assert risk_matrix.for_dataset(dataset) is risk_matrix.for_dataset(dataset)
+
+
+class TestWhatIf:
+    """Tests for calculator.get_whatif()"""
+
+    def test_rescored_ranking(self, temp_csv_file):
+        """Test overrides apply over the base profile and are echoed back"""
+        result = calculator.get_whatif({'weights': {'Sensitive Location': 40}}, top=1, csv_path=temp_csv_file)
+        assert result['profile']['weights']['Sensitive Location'] == 40
+        assert result['baseline'] == scoring.get_profile()
+        assert [entry['location'] for entry in result['cities']] == ['Los Angeles, CA']
+
+    def test_invalid_overrides(self, temp_csv_file):
+        """Test bad settings raise ValueError and unknown base profiles KeyError"""
+        with pytest.raises(ValueError):
+            calculator.get_whatif({'weights': {'Use of Force': 'x'}}, csv_path=temp_csv_file)
+        with pytest.raises(KeyError):
+            calculator.get_whatif({}, base_profile='nope', csv_path=temp_csv_file)
@@ -0,0 +1,166 @@
+"""
+Test suite for rollups.py
+Tests city -> state -> national totals, timelines and incremental updates
+"""
+
+import os
+import pandas as pd
+import pytest
+import rollups
+from calculator import state_from_dataset, summary_from_dataset
+from dataset import Dataset
+from rollups import Rollups, rollups_for
+from snapshots import UNIFIED_PATH, data_version, write_appended, write_snapshot
+
+
+def frame(n=None):
+    df = pd.DataFrame({
+        'date': ['2026-01-03', '2026-01-03', 'Unknown', '2026-01-15', '2025-12-02', '2026-01-30'],
+        'location': ['Minneapolis, MN', 'St. Paul, MN', 'Minneapolis, MN', 'Chicago, IL', 'Chicago, IL',
+                     'Nowhere'],
+        'category': ['Concerning Use of Force', 'U.S. Citizen, Concerning Use of Force', 'U.S. Citizen',
+                     'Concerning Arrest/Detention', 'Concerning Use of Force', None],
+    })
+    return df if n is None else df.iloc[:n].reset_index(drop=True)
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(frame())
+
+
+class TestRollups:
+    """Tests for the Rollups class"""
+
+    def test_state_totals(self, dataset):
+        """Test a state sums its cities' incidents and labels"""
+        mn = Rollups.from_dataset(dataset).state('MN')
+        assert mn['state'] == 'MN'
+        assert mn['total_incidents'] == 3
+        assert mn['use_of_force'] == 2
+        assert mn['us_citizens'] == 2
+        assert mn['cities'] == [{'location': 'Minneapolis, MN', 'total_incidents': 2},
+                                {'location': 'St. Paul, MN', 'total_incidents': 1}]
+
+    def test_state_timeline(self, dataset):
+        """Test a state's timeline counts its dated incidents per day"""
+        assert Rollups.from_dataset(dataset).state('mn')['timeline'] == [{'date': '2026-01-03', 'count': 2}]
+
+    def test_unknown_state(self, dataset):
+        """Test a state without incidents gives None"""
+        assert Rollups.from_dataset(dataset).state('TX') is None
+
+    def test_national(self, dataset):
+        """Test national totals include rows outside any state, states listed by count"""
+        national = Rollups.from_dataset(dataset).national()
+        assert national['total_incidents'] == 6
+        assert national['use_of_force'] == 3
+        assert [state['state'] for state in national['states']] == ['MN', 'IL']
+        assert sum(entry['count'] for entry in national['timeline']) == 5
+
+    def test_matches_direct_scoring(self, dataset):
+        """Test a state's score equals scoring its incidents directly"""
+        from calculator import calculate_risk_score
+        df = frame()
+        direct = calculate_risk_score(df[df['location'].str.endswith(', IL')])
+        rolled_up = Rollups.from_dataset(dataset).state('IL')
+        assert rolled_up['risk_score'] == direct['risk_score']
+        assert rolled_up['total_incidents'] == direct['total_incidents']
+
+    def test_extend_equals_rebuild(self):
+        """Test appending rows gives the same rollups as building from all of them"""
+        extended = Rollups.from_dataset(Dataset(frame(3))).extend(Dataset(frame()))
+        rebuilt = Rollups.from_dataset(Dataset(frame()))
+        assert extended.rows_seen == 6
+        assert extended.national() == rebuilt.national()
+        assert extended.state('MN') == rebuilt.state('MN')
+
+
+def snapshot_dataset(path):
+    source, version = data_version(path)
+    return Dataset.from_csv(source, signature=version)
+
+
+class TestRollupsFor:
+    """Tests for rollups_for()"""
+
+    @pytest.fixture
+    def published(self, tmp_path):
+        path = str(tmp_path / 'data.csv')
+        write_snapshot(frame(3), path)
+        yield path
+        rollups._rollups.pop(path, None)
+
+    def test_extends_on_append(self, published):
+        """Test a snapshot appended to the last one extends a copy of the previous rollups"""
+        first = rollups_for(published, snapshot_dataset(published))
+        write_appended(frame().iloc[3:5], published)
+        write_appended(frame().iloc[5:], published)
+        second = rollups_for(published, snapshot_dataset(published))
+        assert second is not first
+        assert first.rows_seen == 3 and second.rows_seen == 6
+        assert second.national() == Rollups.from_dataset(Dataset(frame())).national()
+
+    def test_rewrite_rebuilds(self, published, monkeypatch):
+        """Test a snapshot that isn't the last one plus rows is rebuilt, even with the same last row"""
+        rollups_for(published, snapshot_dataset(published))
+        rewritten = frame()
+        rewritten.loc[0, 'location'] = 'Denver, CO'
+        write_snapshot(rewritten, published)
+        monkeypatch.setattr(Rollups, 'extend', lambda self, dataset: pytest.fail('extended a rewrite'))
+        assert rollups_for(published, snapshot_dataset(published)).state('CO')['total_incidents'] == 1
+
+    def test_extends_ingested_rows(self, tmp_path, monkeypatch):
+        """Test rows ingest.py adds to the unified file extend the rollups, no rescan"""
+        import ingest
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'protest_data_oversight.csv').write_text(
+            "date,location,category,title,source_url\n"
+            '01/03/2026,"Portland, OR",Concerning Use of Force,Tear gas,https://news.example.com/a\n'
+            '01/05/2026,"Phoenix, AZ",U.S. Citizen,Citizen detained,https://news.example.com/b\n'
+        )
+        ingest.ingest()
+        key = os.path.abspath(UNIFIED_PATH)
+        first = rollups_for(key, snapshot_dataset(key))
+        with open('protest_data_oversight.csv', 'a') as f:
+            f.write('01/06/2026,"Salem, OR",Concerning Arrest/Detention,Raid,https://news.example.com/c\n')
+        ingest.ingest()
+
+        rebuild = Rollups.from_dataset
+        monkeypatch.setattr(Rollups, 'from_dataset', lambda *args: pytest.fail('rebuilt'))
+        dataset = snapshot_dataset(key)
+        second = rollups_for(key, dataset)
+        assert second.rows_seen == first.rows_seen + 1
+        assert second.state('OR')['total_incidents'] == 2
+        assert second.national() == rebuild(dataset).national()
+        rollups._rollups.pop(key)
+
+    def test_unsnapshotted_file_rebuilds(self, tmp_path):
+        """Test a plain file, without lineage, is rebuilt when it changes"""
+        path = str(tmp_path / 'plain.csv')
+        frame(3).to_csv(path, index=False)
+        first = rollups_for(path, snapshot_dataset(path))
+        frame().to_csv(path, index=False)
+        assert rollups_for(path, Dataset.from_csv(path, signature=['changed'])).rows_seen == 6
+        assert first.rows_seen == 3
+        rollups._rollups.pop(path)
+
+    def test_cached_without_key(self, dataset):
+        """Test datasets not read from a file get rollups once each"""
+        assert rollups_for(None, dataset) is rollups_for(None, dataset)
+
+
+class TestStateFromDataset:
+    """Tests for calculator.state_from_dataset() and summary_from_dataset()"""
+
+    def test_unknown_state_suggests(self, dataset):
+        """Test an unknown state returns an error listing the known ones"""
+        result = state_from_dataset('TX', dataset)
+        assert 'error' in result
+        assert result['suggestions'] == ['IL', 'MN']
+
+    def test_summary(self, dataset):
+        """Test the summary carries national components and state entries"""
+        summary = summary_from_dataset(dataset)
+        assert summary['total_incidents'] == 6
+        assert set(summary['states'][0]) == {'state', 'total_incidents', 'risk_score', 'risk_level'}
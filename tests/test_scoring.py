@@ -0,0 +1,110 @@
+"""
+Test suite for scoring.py profiles
+Tests profile merging, validation, loading from config and weighted scores
+"""
+
+import json
+import pytest
+import scoring
+from scoring import resolve_profile, score_counts, weighted_score
+
+
+@pytest.fixture
+def profiles_file(tmp_path, monkeypatch):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps({
+        'default': {'weights': {'Use of Force': 2}},
+        'strict': {'thresholds': {'High': 50}},
+    }))
+    monkeypatch.setenv('SCORING_PROFILES', str(path))
+    monkeypatch.delenv('SCORING_PROFILE', raising=False)
+    return path
+
+
+class TestDefaultProfile:
+    """Tests that the built-in profile keeps the original scoring"""
+
+    def test_original_weights(self):
+        """Test 2/incident capped at 40, then 1.5, 1.2 and 2 per label"""
+        result = score_counts(10, 4, 5, 3, profile=scoring.DEFAULT_PROFILE)
+        assert result['risk_score'] == int(20 + 6 + 6 + 6)
+        assert score_counts(30, 0, 0, 0, profile=scoring.DEFAULT_PROFILE)['risk_score'] == 40
+
+    def test_levels(self):
+        """Test the 70/40 thresholds"""
+        assert scoring.risk_level(70, scoring.DEFAULT_PROFILE) == 'High'
+        assert scoring.risk_level(69, scoring.DEFAULT_PROFILE) == 'Medium'
+        assert scoring.risk_level(39, scoring.DEFAULT_PROFILE) == 'Low'
+
+    def test_float_noise_does_not_drop_a_point(self):
+        """Test sums like 69.99999999 still score 70"""
+        profile = resolve_profile({'per_incident': 0, 'weights': {'Use of Force': 0.7,
+                                                                  'U.S. Citizen': 0, 'Sensitive Location': 0}})
+        assert weighted_score(100, {'Use of Force': 100}, profile) == 70
+
+
+class TestResolveProfile:
+    """Tests for merging and validating overrides"""
+
+    def test_merges_weights_per_label(self):
+        """Test overriding one weight keeps the others"""
+        profile = resolve_profile({'weights': {'Use of Force': 3, 'Concerning Deportation': 1}})
+        assert profile['weights'] == {'Use of Force': 3, 'U.S. Citizen': 1.2,
+                                      'Sensitive Location': 2, 'Concerning Deportation': 1}
+        assert profile['volume_cap'] == 40
+
+    def test_extra_label_counts(self):
+        """Test other_counts feed labels beyond the three reported ones"""
+        profile = resolve_profile({'weights': {'Concerning Deportation': 10}})
+        result = score_counts(1, 0, 0, 0, other_counts={'Concerning Deportation': 1}, profile=profile)
+        assert result['risk_score'] == 12
+
+    @pytest.mark.parametrize('overrides', [
+        {'bogus': 1},
+        {'weights': {'Use of Force': 'high'}},
+        {'volume_cap': None},
+        {'thresholds': {'Extreme': 90}},
+        {'max_score': float('inf')},
+    ])
+    def test_rejects_invalid(self, overrides):
+        """Test unknown keys, non-numbers and unknown levels raise ValueError"""
+        with pytest.raises(ValueError):
+            resolve_profile(overrides)
+
+
+class TestLoadProfiles:
+    """Tests for profiles loaded from a JSON config file"""
+
+    def test_named_profiles_build_on_file_default(self, profiles_file):
+        """Test named profiles inherit the file's default, which inherits the built-in one"""
+        profiles = scoring.load_profiles()
+        assert profiles['default']['weights']['Use of Force'] == 2
+        assert profiles['strict']['weights']['Use of Force'] == 2
+        assert profiles['strict']['thresholds'] == {'High': 50, 'Medium': 40}
+
+    def test_selected_by_environment(self, profiles_file, monkeypatch):
+        """Test SCORING_PROFILE picks the active profile"""
+        monkeypatch.setenv('SCORING_PROFILE', 'strict')
+        assert scoring.get_profile()['thresholds']['High'] == 50
+        assert scoring.risk_level(55) == 'High'
+
+    def test_unknown_profile(self, profiles_file):
+        """Test asking for a missing profile raises KeyError"""
+        with pytest.raises(KeyError):
+            scoring.get_profile('nope')
+
+    def test_reloads_when_file_changes(self, profiles_file):
+        """Test edits to the config take effect without a restart"""
+        assert scoring.get_profile()['weights']['Use of Force'] == 2
+        profiles_file.write_text(json.dumps({'default': {'weights': {'Use of Force': 4.5}}}))
+        assert scoring.get_profile()['weights']['Use of Force'] == 4.5
+
+    def test_missing_file(self, tmp_path, monkeypatch):
+        """Test the built-in profile is used when there is no config"""
+        monkeypatch.setenv('SCORING_PROFILES', str(tmp_path / 'missing.json'))
+        assert scoring.load_profiles() == {'default': scoring.DEFAULT_PROFILE}
+
+    def test_shipped_config_matches_builtin(self, monkeypatch):
+        """Test scoring_profiles.json's default keeps today's scores"""
+        monkeypatch.delenv('SCORING_PROFILES', raising=False)
+        assert scoring.load_profiles()['default'] == scoring.DEFAULT_PROFILE
@@ -0,0 +1,136 @@
+"""
+Test suite for search.py
+Tests tokenization, the inverted index, BM25 ranking and filters
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import search
+from calculator import search_from_dataset
+from dataset import Dataset
+from search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(pd.DataFrame({
+        'date': ['2026-01-03', '2026-01-05', 'Unknown', '2026-01-04', '2026-01-02', '2026-01-06'],
+        'location': ['Portland, OR', 'Chicago, IL', 'Portland, OR', 'Chicago, IL', 'Portland , OR',
+                     'Chicago, IL'],
+        'category': ['Concerning Use of Force', 'Concerning Use of Force', 'U.S. Citizen',
+                     'Concerning Arrest/Detention', 'Concerning Use of Force', 'U.S. Citizen'],
+        'title': ['Agents fire pepper spray at protesters outside school',
+                  'Pepper spray used on crowd',
+                  'Citizen detained at hospital',
+                  'Father arrested at school drop-off, children watched',
+                  'Tear gas and pepper spray near the ICE facility, pepper spray again',
+                  None],
+    }))
+
+
+def titles(found):
+    return [result['title'] for result in found['results']]
+
+
+class TestTokenize:
+    """Tests for tokenize()"""
+
+    def test_lowercase_words_without_stopwords(self):
+        """Test punctuation splits words and stopwords are dropped"""
+        assert tokenize("Tear gas fired at the crowd - U.S. citizen's car") == [
+            'tear', 'gas', 'fired', 'crowd', 'u', 's', 'citizen', 's', 'car']
+
+    def test_unicode(self):
+        """Test non-ASCII letters stay in tokens"""
+        assert tokenize('Redada en São Paulo') == ['redada', 'en', 'são', 'paulo']
+
+
+class TestSearchIndex:
+    """Tests for the SearchIndex class"""
+
+    def test_postings_in_row_order(self, dataset):
+        """Test each term's postings list holds its rows in order, once per row"""
+        index = SearchIndex(dataset)
+        term = index.vocabulary.get_loc('pepper')
+        assert index.postings[index.offsets[term]:index.offsets[term + 1]].tolist() == [0, 1, 4]
+        assert index.postings.dtype == np.int32 and index.weights.dtype == np.float32
+
+    def test_bm25_prefers_frequent_and_short(self, dataset):
+        """Test term frequency raises and title length lowers a row's score"""
+        rows, scores, total = SearchIndex(dataset).search('pepper spray')
+        assert total == 3
+        assert rows.tolist() == [4, 1, 0]
+        assert scores[0] > scores[1] > scores[2]
+
+    def test_rare_terms_weigh_more(self, dataset):
+        """Test a row matching a rare term outranks one matching only a common one"""
+        rows, _, _ = SearchIndex(dataset).search('spray drop')
+        assert rows[0] == 3
+
+    def test_unknown_terms(self, dataset):
+        """Test a query with no indexed terms matches nothing"""
+        rows, _, total = SearchIndex(dataset).search('the zebra')
+        assert total == 0 and len(rows) == 0
+
+    def test_limit(self, dataset):
+        """Test results are cut at the limit while total counts every match"""
+        rows, _, total = SearchIndex(dataset).search('pepper school', limit=2)
+        assert len(rows) == 2 and total == 4
+
+    def test_no_title_column(self):
+        """Test data without a title or description builds an empty index"""
+        index = SearchIndex(Dataset(pd.DataFrame({'date': ['2026-01-01'], 'location': ['Portland, OR']})))
+        assert index.search('portland')[2] == 0
+
+    def test_cached_per_dataset(self, dataset):
+        """Test the index is built once per Dataset"""
+        assert search.for_dataset(dataset) is search.for_dataset(dataset)
+
+
+class TestSearchFromDataset:
+    """Tests for calculator.search_from_dataset()"""
+
+    def test_results_carry_scores(self, dataset):
+        """Test results are incident records with rounded scores"""
+        found = search_from_dataset(dataset, 'hospital')
+        assert found['total'] == 1
+        assert found['results'][0]['location'] == 'Portland, OR'
+        assert isinstance(found['results'][0]['score'], float)
+
+    def test_location_filter(self, dataset):
+        """Test city limits results to the matched locations"""
+        found = search_from_dataset(dataset, 'pepper spray', city_input='Portland')
+        assert titles(found)[0].startswith('Tear gas')
+        assert found['total'] == 2
+        assert found['matched_cities'] == ['Portland, OR', 'Portland , OR']
+
+    def test_ambiguous_city(self):
+        """Test a city name in several states lists the candidates instead of merged results"""
+        dataset = Dataset(pd.DataFrame({'date': ['2026-01-01', '2026-01-02'], 'location': ['Portland, OR', 'Portland, ME'],
+                                        'title': ['Pepper spray', 'Pepper spray']}))
+        found = search_from_dataset(dataset, 'pepper', city_input='Portland')
+        assert found['ambiguous'] and 'results' not in found
+        assert found['suggestions'] == ['Portland, OR', 'Portland, ME']
+
+    def test_category_filter(self, dataset):
+        """Test category keeps rows whose category contains the label"""
+        found = search_from_dataset(dataset, 'school', category='Arrest')
+        assert titles(found) == ['Father arrested at school drop-off, children watched']
+
+    def test_date_filter(self, dataset):
+        """Test since/until are inclusive and exclude Unknown dates"""
+        assert search_from_dataset(dataset, 'pepper', since='2026-01-03')['total'] == 2
+        assert search_from_dataset(dataset, 'pepper', until='2026-01-03')['total'] == 2
+        assert search_from_dataset(dataset, 'hospital', until='2026-12-31')['total'] == 0
+
+    @pytest.mark.parametrize('kwargs', [{'query': ''}, {'query': 'x', 'since': '2026-13-01'},
+                                        {'query': 'x', 'limit': '0'}])
+    def test_invalid(self, dataset, kwargs):
+        """Test an empty query, bad date or bad limit raises ValueError"""
+        with pytest.raises(ValueError):
+            search_from_dataset(dataset, **kwargs)
+
+    def test_unknown_city(self, dataset):
+        """Test an unmatched city returns an error with suggestions"""
+        assert 'error' in search_from_dataset(dataset, 'pepper', city_input='Boston')
@@ -0,0 +1,193 @@
+"""
+Test suite for snapshots.py
+Tests versioned writes, the manifest, retention, rollback and readers
+"""
+
+import os
+import pandas as pd
+import pytest
+import calculator
+from snapshots import (
+    write_snapshot,
+    write_appended,
+    is_appended,
+    rollback,
+    read_manifest,
+    current_snapshot,
+    current_path,
+    snapshot_dir
+)
+
+
+def incidents(*locations):
+    return pd.DataFrame({
+        'location': list(locations),
+        'date': ['01/01/2026'] * len(locations),
+        'category': ['Use of Force'] * len(locations),
+    })
+
+
+@pytest.fixture
+def published(tmp_path):
+    path = str(tmp_path / 'protest_data_oversight.csv')
+    yield path
+    calculator._dataset_cache.pop(os.path.abspath(path), None)
+
+
+class TestWriteSnapshot:
+    """Tests for write_snapshot()"""
+
+    def test_writes_snapshot_manifest_and_published_copy(self, published):
+        """Test a write produces all three files with matching content"""
+        entry = write_snapshot(incidents('Portland, OR', 'Phoenix, AZ'), published)
+
+        assert entry['rows'] == 2
+        assert entry['version'] == entry['sha256'][:16]
+        assert read_manifest(published)['current'] == entry['version']
+        with open(current_path(published)) as f, open(published) as g:
+            assert f.read() == g.read()
+        assert pd.read_csv(published)['location'].tolist() == ['Portland, OR', 'Phoenix, AZ']
+
+    def test_no_temp_files_left(self, published):
+        """Test temp files are renamed away"""
+        write_snapshot(incidents('Portland, OR'), published)
+        names = os.listdir(snapshot_dir(published)) + os.listdir(os.path.dirname(published))
+        assert not [name for name in names if name.startswith('.tmp-')]
+
+    def test_identical_content_reuses_version(self, published):
+        """Test rewriting the same data doesn't add a version"""
+        first = write_snapshot(incidents('Portland, OR'), published)
+        second = write_snapshot(incidents('Portland, OR'), published)
+
+        assert first['version'] == second['version']
+        assert len(read_manifest(published)['snapshots']) == 1
+
+    def test_retains_last_n(self, published):
+        """Test only the newest versions are kept, on disk and in the manifest"""
+        versions = [write_snapshot(incidents(f'City {i}, OR'), published, retain=3)['version']
+                    for i in range(5)]
+
+        manifest = read_manifest(published)
+        assert [e['version'] for e in manifest['snapshots']] == versions[:1:-1]
+        files = sorted(os.listdir(snapshot_dir(published)))
+        assert files == sorted([f'{v}.csv' for v in versions[2:]] + ['manifest.json'])
+
+    def test_failed_write_keeps_current(self, published):
+        """Test an exception while writing leaves the current version in place"""
+        entry = write_snapshot(incidents('Portland, OR'), published)
+
+        class Broken(pd.DataFrame):
+            def to_csv(self, *args, **kwargs):
+                raise OSError('disk full')
+
+        with pytest.raises(OSError):
+            write_snapshot(Broken(incidents('Phoenix, AZ')), published)
+        assert current_snapshot(published)['version'] == entry['version']
+        assert pd.read_csv(published)['location'].tolist() == ['Portland, OR']
+
+
+class TestRollback:
+    """Tests for rollback()"""
+
+    def test_rollback_restores_version(self, published):
+        """Test rollback makes an older version current and republishes it"""
+        old = write_snapshot(incidents('Portland, OR'), published)
+        write_snapshot(incidents('Phoenix, AZ'), published)
+
+        restored = rollback(published, old['version'][:8])
+        assert restored['version'] == old['version']
+        assert current_snapshot(published)['version'] == old['version']
+        assert pd.read_csv(published)['location'].tolist() == ['Portland, OR']
+
+    def test_unknown_version(self, published):
+        """Test rolling back to a version that isn't retained raises KeyError"""
+        write_snapshot(incidents('Portland, OR'), published)
+        with pytest.raises(KeyError):
+            rollback(published, 'ffffffff')
+
+
+class TestWriteAppended:
+    """Tests for write_appended()"""
+
+    def test_appends_after_current_version(self, published):
+        """Test the current data is kept byte for byte with the new rows after it"""
+        first = write_snapshot(incidents('Portland, OR'), published)
+        with open(published) as f:
+            before = f.read()
+        entry = write_appended(incidents('Phoenix, AZ')[['category', 'location', 'date']], published)
+
+        assert entry['rows'] == 2 and entry['version'] != first['version']
+        with open(published) as f:
+            assert f.read().startswith(before)
+        assert pd.read_csv(published)['location'].tolist() == ['Portland, OR', 'Phoenix, AZ']
+        # Same bytes as writing the whole frame
+        assert write_snapshot(incidents('Portland, OR', 'Phoenix, AZ'), published)['sha256'] == entry['sha256']
+
+    def test_unsnapshotted_file_without_final_newline(self, tmp_path):
+        """Test a plain file is counted and its last line terminated before appending"""
+        path = str(tmp_path / 'plain.csv')
+        with open(path, 'w') as f:
+            f.write('location,date,category\n"Portland, OR",01/01/2026,Use of Force')
+        entry = write_appended(incidents('Phoenix, AZ'), path)
+        assert entry['rows'] == 2
+        assert pd.read_csv(path)['location'].tolist() == ['Portland, OR', 'Phoenix, AZ']
+
+    def test_lineage(self, published):
+        """Test is_appended() follows appends back to a base version and stops at rewrites"""
+        base = write_snapshot(incidents('Portland, OR'), published)['sha256']
+        once = write_appended(incidents('Phoenix, AZ'), published)['sha256']
+        twice = write_appended(incidents('Chicago, IL'), published)['sha256']
+        assert is_appended(published, base, once) and is_appended(published, base, twice)
+        assert is_appended(published, once, twice)
+        assert not is_appended(published, twice, once)
+
+        rewritten = write_snapshot(incidents('Portland, OR', 'Phoenix, AZ', 'Chicago, IL', 'Denver, CO'),
+                                   published)['sha256']
+        assert not is_appended(published, twice, rewritten)
+        assert not is_appended(published, base, [0, 0])
+
+    def test_no_current_data(self, published):
+        """Test appending to nothing writes the rows as the first version"""
+        entry = write_appended(incidents('Portland, OR'), published)
+        assert entry['rows'] == 1
+        assert pd.read_csv(published).columns.tolist() == ['location', 'date', 'category']
+
+
+class TestReaders:
+    """Tests for readers of snapshotted files"""
+
+    def test_unsnapshotted_file(self, tmp_path):
+        """Test plain files have no manifest and are read directly"""
+        path = str(tmp_path / 'plain.csv')
+        assert read_manifest(path) is None
+        assert current_snapshot(path) is None
+        assert current_path(path) == path
+
+    def test_calculator_caches_by_version_hash(self, published):
+        """Test identical rewrites (new mtime, same hash) stay cached"""
+        entry = write_snapshot(incidents('Portland, OR'), published)
+        first = calculator.load_dataset(published)
+        assert first.signature == entry['sha256']
+
+        os.utime(published, (0, 0))
+        write_snapshot(incidents('Portland, OR'), published)
+        assert calculator.load_dataset(published) is first
+
+        write_snapshot(incidents('Portland, OR', 'Phoenix, AZ'), published)
+        assert len(calculator.load_dataset(published)) == 2
+
+    def test_calculator_follows_rollback(self, published):
+        """Test a rollback is picked up by the next load"""
+        old = write_snapshot(incidents('Portland, OR'), published)
+        write_snapshot(incidents('Phoenix, AZ'), published)
+        assert calculator.get_risk_for_city('Phoenix', csv_path=published)['total_incidents'] == 1
+
+        rollback(published, old['version'])
+        assert 'error' in calculator.get_risk_for_city('Phoenix', csv_path=published)
+
+    def test_last_updated_uses_snapshot_time(self, published):
+        """Test last updated reflects when the current version was written"""
+        write_snapshot(incidents('Portland, OR'), published)
+        os.utime(published, (0, 0))
+        result = calculator.get_last_updated(published)
+        assert result['hours_ago'] == 0
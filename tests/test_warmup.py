@@ -0,0 +1,86 @@
+"""
+Test suite for warmup.py
+Tests index prebuilding, readiness status and step timings
+"""
+
+import os
+import pandas as pd
+import pytest
+import facets
+import locations
+import search
+import warmup
+from dataset import Dataset
+
+
+@pytest.fixture
+def dataset():
+    return Dataset(pd.DataFrame({
+        'date': ['2026-01-03', '2026-01-04', '2026-01-05', 'Unknown'],
+        'location': ['Portland, OR', 'Portland, OR', 'Phoenix, AZ', 'Chicago, IL'],
+        'category': ['Concerning Use of Force', 'U.S. Citizen', None, 'Concerning Use of Force'],
+        'title': ['Pepper spray', 'Detained', 'Raid', 'Tear gas'],
+    }), signature=[1, 2])
+
+
+@pytest.fixture(autouse=True)
+def fresh_status(monkeypatch):
+    """Each test starts from a process that hasn't warmed up"""
+    monkeypatch.setattr(warmup, '_status', dict(warmup._status, ready=False, version=None))
+    monkeypatch.setattr(warmup, '_warmed_key', None)
+
+
+class TestWarm:
+    """Tests for warm()"""
+
+    def test_builds_indexes(self, dataset, monkeypatch):
+        """Test per-dataset indexes exist afterwards, so requests reuse them"""
+        built = []
+        monkeypatch.setattr(search, 'SearchIndex', lambda d: built.append('search') or 'index')
+        warmup.warm(dataset, '/data/a.csv')
+        assert built == ['search']
+        assert search.for_dataset(dataset) == 'index'
+        assert dataset in facets._bitmap_sets and dataset in locations._indexes
+
+    def test_status(self, dataset):
+        """Test the status reports version, counts and a timing per step"""
+        assert not warmup.status()['ready']
+        status = warmup.warm(dataset, '/data/b.csv', timings={'load': 0.5})
+        assert status['ready']
+        assert status['version'] == [1, 2]
+        assert status['rows'] == 4 and status['locations'] == 3
+        assert {'load', 'locations', 'search', 'facets', 'rollups'} <= set(status['timings'])
+        assert warmup.status() == status
+
+
+class TestWarmUp:
+    """Tests for warm_up() on a data file"""
+
+    def test_loads_pins_and_warms(self, tmp_path):
+        """Test the file is pinned and the status carries its load time"""
+        import calculator
+        path = tmp_path / 'incidents.csv'
+        path.write_text('date,location,category\n2026-01-01,"Portland, OR",Concerning Use of Force\n')
+        status = warmup.warm_up(str(path))
+        assert status['ready'] and status['rows'] == 1
+        assert 'load' in status['timings']
+        assert len(calculator.load_dataset(str(path))) == 1
+        calculator._pinned_datasets.pop(os.path.abspath(str(path)))
+
+    def test_skips_warm_version(self, tmp_path, monkeypatch):
+        """Test a reload of an unchanged file doesn't load or warm it again"""
+        import calculator
+        path = tmp_path / 'incidents.csv'
+        path.write_text('date,location,category\n2026-01-01,"Portland, OR",Concerning Use of Force\n')
+        loads = []
+        preload = calculator.preload_dataset
+        monkeypatch.setattr(calculator, 'preload_dataset', lambda p: loads.append(p) or preload(p))
+        first = warmup.warm_up(str(path))
+        assert warmup.warm_up(str(path)) == first
+        assert len(loads) == 1
+
+        with open(path, 'a') as f:
+            f.write('2026-01-02,"Phoenix, AZ",U.S. Citizen\n')
+        assert warmup.warm_up(str(path))['rows'] == 2
+        assert len(loads) == 2
+        calculator._pinned_datasets.pop(os.path.abspath(str(path)))
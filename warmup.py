@@ -0,0 +1,94 @@
+"""
+Startup warm-up and readiness
+
+Before a process serves traffic, warm() builds everything requests would
+otherwise build on first use for the current dataset - the location lookup,
+risk matrix, listing order, search index, facet bitmaps, decayed scores and
+rollups - timing each step. A city check after that only probes and sums
+these, so there is nothing left to warm per city. status() reports whether
+warming has finished for the dataset being served, which /readyz turns into
+200 or 503 so a load balancer only routes to hot workers.
+
+The Flask app warms in the gunicorn master (create_app() and on a data
+reload, skipped when that version is already warm), so forked workers start
+hot; app.py run directly warms before serving too. The ASGI app warms each
+dataset before swapping it in.
+"""
+import os
+import threading
+import time
+
+import calculator
+import decay
+import facets
+import listing
+import locations
+import risk_matrix
+import rollups
+import search
+from metrics import WARMUP_SECONDS
+from snapshots import data_path, data_version
+
+# Status of the last warm-up, replaced whole so readers never see a partial one
+_status = {'ready': False, 'version': None, 'rows': None, 'locations': None, 'timings': {}, 'warmed_at': None}
+_status_lock = threading.Lock()
+# Data file the last warm-up was for (kept out of the status /readyz shows)
+_warmed_key = None
+
+
+def warm(dataset, key, timings=None):
+    """
+    Build a loaded Dataset's indexes, then mark it as the ready version. key is
+    the data file's absolute path; timings may carry earlier steps (such as the
+    load) to report with these. Returns the status.
+    """
+    timings = dict(timings or {})
+
+    def step(name, fn, *args):
+        started = time.perf_counter()
+        fn(*args)
+        timings[name] = round(time.perf_counter() - started, 4)
+        WARMUP_SECONDS.set(timings[name], step=name)
+
+    step('locations', locations.for_dataset, dataset)
+    step('risk_matrix', risk_matrix.for_dataset, dataset)
+    step('listing', listing.for_dataset, dataset)
+    step('search', search.for_dataset, dataset)
+    step('facets', facets.for_dataset, dataset)
+    step('decay', decay.scores_for, key, dataset)
+    step('rollups', rollups.rollups_for, key, dataset)
+
+    global _status, _warmed_key
+    with _status_lock:
+        _warmed_key = key
+        _status = {
+            'ready': True,
+            'version': dataset.signature,
+            'rows': len(dataset),
+            'locations': len(dataset.location_names),
+            'timings': timings,
+            'warmed_at': time.time(),
+        }
+    return _status
+
+
+def warm_up(csv_path=None):
+    """
+    Load (pin) the data file and warm it; gunicorn.conf.py / create_app() entry
+    point. Nothing is redone when this version of the file is already warm.
+    """
+    csv_path = csv_path or data_path()
+    key = os.path.abspath(csv_path)
+    current = status()
+    if current['ready'] and _warmed_key == key and current['version'] == data_version(key)[1]:
+        return current
+    started = time.perf_counter()
+    dataset = calculator.preload_dataset(csv_path)
+    load_seconds = round(time.perf_counter() - started, 4)
+    WARMUP_SECONDS.set(load_seconds, step='load')
+    return warm(dataset, key, timings={'load': load_seconds})
+
+
+def status():
+    """Readiness of this process: ready, dataset version, row/location counts and step timings"""
+    return dict(_status)